@@ -0,0 +1,41 @@
+
+# -*- coding: utf-8 -*-
+"""
+Adivina Quién de Carros 
+Autor: Robin Emmanuel Carlos Gonzalez  (mi versión comentada)
+Fecha: 23/10/2025
+
+Qué hace:
+- Hace preguntas UNA POR UNA (hasta 12) para adivinar el auto pensado.
+  En modo "ganancia" elige la pregunta que más separa a los autos que quedan
+  y se detiene en cuanto solo queda uno.
+- En la ventana: progreso (Paso X/12), barra de avance, cuántos autos quedan
+  posibles y un panel lateral con los candidatos.
+- Antes de adivinar, enseña un RESUMEN de mis respuestas para confirmar.
+- Si no acierta, puedo enseñar el auto y lo guarda (aprende); me avisa si
+  queda igual a otro que ya estaba.
+
+Cómo se usa: `python "Adivina coches.py" [opciones] [comando]` o
+`python -m adivina_coches ...` (ver cli._argumentos).
+- Comandos: gui (la ventana, si no pongo ninguno), jugar (en la terminal),
+  servidor (partidas en JSON lines por TCP o socket Unix), evaluar y bench
+  (juego solo contra el catálogo o contra catálogos sintéticos, en paralelo
+  con --procesos), generar, importar / exportar (CSV o JSON lines),
+  duplicados (--fusionar), compactar, arbol, migrar-sqlite y metricas.
+- --backend elige dónde viven los autos:
+  json         coches_db.json; lo aprendido va primero a coches_db.journal.jsonl
+               (solo agrega líneas) y cada tanto se compacta en el JSON.
+  sqlite       coches_db.sqlite3, todo con consultas.
+  binario      coches_db.bin compilado del JSON, abierto con mmap.
+  particionado coches_db.particiones/, un JSON por valor de --particion-por.
+- --modo (fijo / ganancia), --puntaje (exacto / difuso) y --metricas RUTA.
+
+Dónde está cada cosa:
+- nucleo: constantes, normalización de nombres, bitsets y Auto.
+- catalogo: el formato en disco (migraciones, journal, cerrojo).
+- db: CarDB (backend "json") y EscritorFondo. juego: selector de preguntas,
+  sesión y árbol. motor: MotorJuego, la partida sin UI.
+- backends: sqlite, binario y particionado, y abrir_db.
+- ui_tk (solo se importa para la ventana), consola, cli, servidor.
+- Herramientas: intercambio (importar/exportar), simulacion, metricas.
+"""
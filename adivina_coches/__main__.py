@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""`python -m adivina_coches [opciones] [comando]`: lo mismo que "Adivina coches.py"."""
+
+from .cli import main
+
+main()
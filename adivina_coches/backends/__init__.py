@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Dónde viven los autos. CarDB (adivina_coches.db) es el backend "json"; aquí
+están los otros tres, todos con la misma interfaz, y abrir_db para elegir.
+"""
+
+from typing import Optional
+
+from ..db import CarDB
+from ..nucleo import BACKEND, BIN_PATH, DB_PATH, PARTICIONES_PATH, SQLITE_PATH
+from .binario import CarDBBinario, CatalogoBinario, compilar_binario
+from .particionado import CarDBParticionado, SesionParticionada
+from .sqlite import CarDBSQLite, SesionSQLite
+
+
+def abrir_db(backend: Optional[str] = None, particion_por: Optional[str] = None) -> CarDB:
+    """
+    Creo el CarDB del backend elegido ("json", "sqlite", "binario" o "particionado"),
+    todavía sin cargar. 'particion_por': clave de las partes (solo "particionado").
+    """
+    backend = backend or BACKEND
+    if backend == "sqlite":
+        return CarDBSQLite(SQLITE_PATH, DB_PATH)
+    if backend == "binario":
+        return CarDBBinario(DB_PATH, BIN_PATH)
+    if backend == "particionado":
+        return CarDBParticionado(PARTICIONES_PATH, particion_por, DB_PATH)
+    if backend == "json":
+        return CarDB(DB_PATH)
+    raise ValueError(f"Backend desconocido: {backend!r}")
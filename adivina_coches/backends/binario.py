@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""Backend "binario": el catálogo compilado a un .bin que se abre con mmap y se decodifica perezoso."""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..catalogo import SCHEMA_VERSION, _leer_journal, _recorrer_catalogo, _version_catalogo
+from ..db import CarDB
+from ..nucleo import BIN_PATH, DB_PATH, _normalizar_nombre, np
+
+
+# ============================ CATÁLOGO BINARIO (MMAP) ==========================
+# Formato (little-endian):
+#   cabecera: magic(8) version(u16) m(u16) n(u32) off_dicts(u64) off_codigos(u64) off_textos(u64)
+#   diccionarios: por atributo -> clave (u8 largo + utf8), cantidad (u16),
+#                 y cada valor como JSON (u16 largo + utf8). Código = posición + 1 (0 = no trae el campo).
+#   códigos: n * m bytes (uint8), fila por coche, en el orden de los atributos.
+#   textos: (3n + 1) offsets u32 y luego los bytes utf8 de name, marca y extras (JSON o vacío).
+_BIN_MAGIC = b"ADVCOCH\0"
+_BIN_VERSION = 1
+_BIN_CABECERA = struct.Struct("<8sHHIQQQ")
+
+
+def compilar_binario(cars: Iterable[Dict[str, Any]], attributes: List[Dict[str, Any]], ruta: str) -> None:
+    """
+    Compilo el catálogo al formato binario; 'cars' puede ser perezoso (lo recorro una vez).
+    Escribo a .tmp y hago rename, así los procesos que ya tienen el archivo viejo
+    mapeado no ven nada a medias.
+    """
+    claves = [a["key"] for a in attributes]
+    dicts: List[Dict[Any, int]] = []
+    for a in attributes:
+        valores = [False, True] if a.get("tipo") == "bool" else a.get("opciones", [])
+        dicts.append({v: i + 1 for i, v in enumerate(valores)})
+
+    n = 0
+    codigos = bytearray()
+    offsets = array("I", [0])
+    textos = bytearray()
+    for car in cars:
+        fila = bytearray(len(claves))
+        for j, k in enumerate(claves):
+            if k not in car:
+                continue
+            tabla = dicts[j]
+            if car[k] not in tabla:
+                if len(tabla) >= 255:
+                    raise ValueError(f"No puedo compilar {ruta}: '{k}' tiene más de 255 valores distintos "
+                                     "y el .bin guarda un byte por campo; usa el backend json o sqlite")
+                tabla[car[k]] = len(tabla) + 1
+            fila[j] = tabla[car[k]]
+        codigos += fila
+        n += 1
+        extra = {k: v for k, v in car.items() if k not in claves and k not in ("name", "marca")}
+        for txt in (car.get("name", ""), car.get("marca") or "",
+                    json.dumps(extra, ensure_ascii=False) if extra else ""):
+            textos += txt.encode("utf-8")
+            offsets.append(len(textos))
+
+    tabla_dicts = bytearray()
+    for k, tabla in zip(claves, dicts):
+        kb = k.encode("utf-8")
+        tabla_dicts += struct.pack("<B", len(kb)) + kb + struct.pack("<H", len(tabla))
+        for v in tabla:      # los dict conservan el orden = orden de los códigos
+            vb = json.dumps(v, ensure_ascii=False).encode("utf-8")
+            tabla_dicts += struct.pack("<H", len(vb)) + vb
+
+    off_dicts = _BIN_CABECERA.size
+    off_codigos = off_dicts + len(tabla_dicts)
+    off_textos = off_codigos + len(codigos)
+    tmp = ruta + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_BIN_CABECERA.pack(_BIN_MAGIC, _BIN_VERSION, len(claves), n,
+                                   off_dicts, off_codigos, off_textos))
+        f.write(tabla_dicts)
+        f.write(codigos)
+        f.write(offsets.tobytes())
+        f.write(textos)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ruta)
+
+
+def _cabecera_valida(ruta: str) -> bool:
+    """¿El .bin es de este formato (magic y versión)? Uno cortado o de otra versión no."""
+    with open(ruta, "rb") as f:
+        cab = f.read(_BIN_CABECERA.size)
+    return len(cab) == _BIN_CABECERA.size and _BIN_CABECERA.unpack(cab)[:2] == (_BIN_MAGIC, _BIN_VERSION)
+
+
+class CatalogoBinario:
+    """
+    Lector del formato binario sobre mmap (solo lectura, páginas compartidas
+    entre procesos). Abrir solo lee la cabecera y los diccionarios; cada coche
+    se decodifica cuando alguien lo pide.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.m, self.n, off_dicts, self.off_codigos, off_textos = \
+            _BIN_CABECERA.unpack_from(self.mm, 0)
+        if magic != _BIN_MAGIC or version != _BIN_VERSION:
+            raise ValueError(f"{ruta} no es un catálogo binario v{_BIN_VERSION}")
+
+        self.claves: List[str] = []
+        self.valores: List[List[Any]] = []     # valores[j][codigo - 1]
+        pos = off_dicts
+        for _ in range(self.m):
+            (lk,) = struct.unpack_from("<B", self.mm, pos); pos += 1
+            self.claves.append(self.mm[pos:pos + lk].decode("utf-8")); pos += lk
+            (cant,) = struct.unpack_from("<H", self.mm, pos); pos += 2
+            vals = []
+            for _ in range(cant):
+                (lv,) = struct.unpack_from("<H", self.mm, pos); pos += 2
+                vals.append(json.loads(self.mm[pos:pos + lv].decode("utf-8"))); pos += lv
+            self.valores.append(vals)
+
+        n_off = 3 * self.n + 1
+        self.offsets = memoryview(self.mm)[off_textos:off_textos + 4 * n_off].cast("I")
+        self.off_blob = off_textos + 4 * n_off
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _texto(self, t: int) -> str:
+        a, b = self.offsets[t], self.offsets[t + 1]
+        return self.mm[self.off_blob + a:self.off_blob + b].decode("utf-8")
+
+    def nombre(self, i: int) -> str:
+        return self._texto(3 * i)
+
+    def alias(self, i: int) -> List[str]:
+        """Los alias del coche i (van con los extras; casi siempre vacíos, no decodifico nada más)."""
+        extra = self._texto(3 * i + 2)
+        return json.loads(extra).get("alias") or [] if extra else []
+
+    def fila(self, i: int) -> bytes:
+        base = self.off_codigos + i * self.m
+        return self.mm[base:base + self.m]
+
+    def columna(self, j: int) -> bytes:
+        """Los n códigos de un atributo (slice con paso sobre el mmap, en C)."""
+        ini = self.off_codigos + j
+        return self.mm[ini:ini + self.n * self.m:self.m] if self.n else b""
+
+    def auto(self, i: int) -> Dict[str, Any]:
+        """Decodifico el coche i a un dict igual al del JSON."""
+        car = {"name": self.nombre(i), "marca": self._texto(3 * i + 1)}
+        for j, cod in enumerate(self.fila(i)):
+            if cod:
+                car[self.claves[j]] = self.valores[j][cod - 1]
+        extra = self._texto(3 * i + 2)
+        if extra:
+            car.update(json.loads(extra))
+        return car
+
+    def cerrar(self) -> None:
+        self.offsets.release()
+        self.mm.close()
+
+
+class _VistaCatalogo:
+    """
+    Lista "perezosa" de autos sobre el catálogo binario: decodifica al acceder
+    y guarda el dict (así las actualizaciones de aprender() se quedan).
+    Los autos aprendidos en esta corrida se agregan al final en memoria.
+    """
+
+    def __init__(self, cat: CatalogoBinario):
+        self.cat = cat
+        self._decodificados: Dict[int, Dict[str, Any]] = {}
+        self._nuevos: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.cat) + len(self._nuevos)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += len(self)
+        if i >= len(self.cat):
+            return self._nuevos[i - len(self.cat)]
+        car = self._decodificados.get(i)
+        if car is None:
+            car = self._decodificados[i] = self.cat.auto(i)
+        return car
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __setitem__(self, i: int, car: Dict[str, Any]) -> None:
+        if i < 0:
+            i += len(self)
+        if i >= len(self.cat):
+            self._nuevos[i - len(self.cat)] = car
+        else:
+            self._decodificados[i] = car
+
+    def append(self, car: Dict[str, Any]) -> None:
+        self._nuevos.append(car)
+
+    def nombre(self, i: int) -> str:
+        """Nombre sin decodificar el coche entero."""
+        if i < len(self.cat) and i not in self._decodificados:
+            return self.cat.nombre(i)
+        return self[i].get("name", "")
+
+    def alias(self, i: int) -> List[str]:
+        if i < len(self.cat) and i not in self._decodificados:
+            return self.cat.alias(i)
+        return self[i].get("alias") or []
+
+
+class _FilasBinarias:
+    """Filas de códigos sobre el mmap (para puntuar sin NumPy); cambios en memoria."""
+
+    def __init__(self, cat: CatalogoBinario):
+        self.cat = cat
+        self._cambios: Dict[int, List[int]] = {}
+        self._nuevas: List[List[int]] = []
+
+    def __len__(self) -> int:
+        return len(self.cat) + len(self._nuevas)
+
+    def __getitem__(self, i: int) -> Any:
+        if i >= len(self.cat):
+            return self._nuevas[i - len(self.cat)]
+        return self._cambios.get(i) or self.cat.fila(i)
+
+    def __setitem__(self, i: int, fila: List[int]) -> None:
+        if i >= len(self.cat):
+            self._nuevas[i - len(self.cat)] = fila
+        else:
+            self._cambios[i] = fila
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, fila: List[int]) -> None:
+        self._nuevas.append(fila)
+
+
+class CarDBBinario(CarDB):
+    """
+    CarDB sobre el catálogo compilado (coches_db.bin): abro con mmap y decodifico al pedir.
+    El JSON (+ journal) sigue siendo la fuente: si es más nuevo que el .bin, recompilo.
+    """
+
+    def __init__(self, ruta: str = DB_PATH, ruta_bin: str = BIN_PATH):
+        super().__init__(ruta)
+        self.ruta_bin = ruta_bin
+        self._cat: Optional[CatalogoBinario] = None
+        self._tocados: set = set()    # posiciones cambiadas/agregadas desde que abrí
+
+    def _binario_viejo(self) -> bool:
+        """¿Hay que recompilar? Si falta, si es de otro formato o si el JSON o el journal son más nuevos."""
+        if not os.path.exists(self.ruta_bin) or not os.path.exists(self.ruta):
+            return True
+        if not _cabecera_valida(self.ruta_bin):
+            return True
+        fuente = os.path.getmtime(self.ruta)
+        if os.path.exists(self.ruta_journal):
+            fuente = max(fuente, os.path.getmtime(self.ruta_journal))
+        return os.path.getmtime(self.ruta_bin) < fuente
+
+    def compilar(self) -> None:
+        """Recompilo el .bin desde el JSON + journal, auto por auto (sin cargar el catálogo)."""
+        if not os.path.exists(self.ruta):
+            semilla = CarDB(self.ruta)
+            semilla.cargar()            # escribe el JSON semilla
+            semilla.cerrar()
+        elif _version_catalogo(self.ruta) < SCHEMA_VERSION:
+            self.migrar_archivo()
+        compilar_binario(self._autos_fuente(), self._schema_attributes(), self.ruta_bin)
+
+    def _autos_fuente(self) -> Iterator[Dict[str, Any]]:
+        """Los autos del JSON con el journal encima (upsert por nombre, como _repetir_journal)."""
+        journal: Dict[str, Dict[str, Any]] = {}
+        for ruta in (self.ruta_journal_viejo, self.ruta_journal):   # el de una compactación cortada, primero
+            if os.path.exists(ruta):
+                for car in _leer_journal(ruta)[0]:
+                    journal[_normalizar_nombre(car.get("name", ""))] = car
+        for clave, v in _recorrer_catalogo(self.ruta):
+            if clave == "car":
+                yield journal.pop(_normalizar_nombre(v.get("name", "")), v)
+        yield from journal.values()   # los nuevos, en el orden en que se aprendieron
+
+    def cargar(self) -> None:
+        with self._bloqueo:
+            if self._binario_viejo():
+                self.compilar()
+            self.abrir_binario()
+            self._al_dia()
+        self.arbol = None
+
+    def _recargar(self) -> None:
+        """Otro proceso cambió demasiado: recompilo el .bin desde el JSON y lo reabro."""
+        con_arbol = self.arbol is not None
+        self._cerrar_journal()
+        self.cargar()
+        if con_arbol:
+            self._cargar_arbol()
+
+    def abrir_binario(self) -> None:
+        """Solo mapeo el .bin tal cual (sin mirar el JSON); lo usan también los procesos hijos."""
+        cat = CatalogoBinario(self.ruta_bin)
+        self._cat = cat
+        self.attributes = self._schema_attributes()
+        self.cars = _VistaCatalogo(cat)
+        self._todos = (1 << len(cat)) - 1
+        self._indice, self._con_clave = {}, {}
+        self._claves_indice = set(cat.claves)
+        self._tocados = set()
+        self._por_nombre = None
+        self._por_vector = None
+        self.generacion += 1
+
+        self._columnas = list(cat.claves)
+        self._codigos = {k: {v: i + 1 for i, v in enumerate(vals)}
+                         for k, vals in zip(cat.claves, cat.valores)}
+        self._tablas_puntos = {}
+        if np is not None:
+            self._mat = np.frombuffer(cat.mm, dtype=np.uint8, count=len(cat) * cat.m,
+                                      offset=cat.off_codigos).reshape(len(cat), cat.m)
+        else:
+            self._mat = _FilasBinarias(cat)
+
+    # --- Índice perezoso ---
+    def _bits_columna(self, j: int, codigos: set) -> int:
+        """Bitset de los autos del .bin cuyo código en la columna j está en 'codigos'."""
+        tabla = bytes(0x31 if c in codigos else 0x30 for c in range(256))   # '1' / '0'
+        banderas = self._cat.columna(j).translate(tabla)
+        return int(banderas[::-1], 2) if banderas else 0   # bit 0 = coche 0
+
+    def _corregir(self, bits: int, cumple) -> int:
+        """Ajusto un bitset del .bin con los autos que cambié/agregué en memoria."""
+        for pos in self._tocados:
+            if cumple(self.cars[pos]):
+                bits |= 1 << pos
+            else:
+                bits &= ~(1 << pos)
+        return bits
+
+    def _bits(self, key: str, value: Any) -> int:
+        if (key, value) not in self._indice:
+            if key in self._codigos:
+                cod = self._codigos[key].get(value)
+                bits = self._bits_columna(self._columnas.index(key), {cod}) if cod else 0
+                bits = self._corregir(bits, lambda c: key in c and c[key] == value)
+            else:   # name/marca/extras: no están codificados, recorro (raro)
+                return super()._bits(key, value)
+            self._indice[(key, value)] = bits
+        return self._indice[(key, value)]
+
+    def _bits_con_clave(self, key: str) -> int:
+        if key not in self._con_clave:
+            if key in self._codigos:
+                bits = self._bits_columna(self._columnas.index(key), set(range(1, 256)))
+                bits = self._corregir(bits, lambda c: key in c)
+            else:
+                return super()._bits_con_clave(key)
+            self._con_clave[key] = bits
+        return self._con_clave[key]
+
+    def _indexar_auto(self, pos: int, car: Dict[str, Any]) -> None:
+        # Solo toco lo que ya esté en caché; lo demás se calculará con _tocados
+        self._tocados.add(pos)
+        bit = 1 << pos
+        for k, v in car.items():
+            if k not in self._claves_indice:   # alias (lista) y demás: no los indexo
+                continue
+            if (k, v) in self._indice:
+                self._indice[(k, v)] |= bit
+            if k in self._con_clave:
+                self._con_clave[k] |= bit
+
+    def _poner_fila(self, pos: int, car: Dict[str, Any]) -> None:
+        if np is not None and not self._mat.flags.writeable:
+            self._mat = self._mat.astype(np.int16)   # copia escribible (y sin tope de 255)
+        super()._poner_fila(pos, car)
+
+    def _nombre_en(self, pos: int) -> str:
+        """El índice de nombres se arma al primer aprender/buscar leyendo solo la tabla de textos."""
+        return self.cars.nombre(pos)
+
+    def _alias_en(self, pos: int) -> List[str]:
+        return self.cars.alias(pos)
+
+    def ruta_binaria(self) -> Optional[str]:
+        """El mío: cargar() ya lo recompiló si el JSON o el journal eran más nuevos."""
+        return self.ruta_bin
+
+    def guardar(self, cars: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Para compactar el journal sí escribo el JSON completo (decodificando de a uno)."""
+        super().guardar(self.iterar_autos() if cars is None else cars)
+
+    def iterar_autos(self) -> Iterator[Dict[str, Any]]:
+        """Como iter(cars) pero sin guardar cada dict decodificado en la vista."""
+        vista = self.cars
+        for i in range(len(vista)):
+            if i >= len(vista.cat):
+                yield vista[i]                  # aprendido en esta corrida
+            else:
+                yield vista._decodificados.get(i) or vista.cat.auto(i)
+
+    def importar_autos(self, autos: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        El .bin no se edita en sitio: importo sobre el JSON (la fuente, con su
+        journal), recompilo el .bin con el resultado y lo vuelvo a abrir.
+        """
+        self.cerrar()
+        with self._bloqueo:
+            origen = CarDB(self.ruta)
+            origen.cargar()
+            try:
+                resultado = origen.importar_autos(autos)
+                compilar_binario(origen.cars, origen.attributes, self.ruta_bin)
+            finally:
+                origen.cerrar()
+            self.abrir_binario()
+            self._al_dia()
+        self._rehacer_arbol()
+        return resultado
+
+    def fusionar_duplicados(self, misma_marca: bool = True) -> int:
+        """Fusiono sobre el JSON y recompilo el .bin (si quité alguno): la vista mmap no se reordena."""
+        self.cerrar()
+        with self._bloqueo:
+            origen = CarDB(self.ruta)
+            origen.cargar()
+            try:
+                quitados = origen.fusionar_duplicados(misma_marca)
+                if quitados:
+                    compilar_binario(origen.cars, origen.attributes, self.ruta_bin)
+            finally:
+                origen.cerrar()
+            self.abrir_binario()
+            self._al_dia()
+        self._rehacer_arbol()
+        return quitados
+
+    def cerrar(self) -> None:
+        super().cerrar()
+        # El mmap lo suelta el GC: puede haber arrays de NumPy apuntando a él.
@@ -0,0 +1,741 @@
+# -*- coding: utf-8 -*-
+"""Backend "particionado": una carpeta con un JSON (+ journal) por valor de una clave y un manifiesto."""
+
+import json
+import os
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..catalogo import (SCHEMA_VERSION, _escribir_catalogo, _leer_entradas, _migrar_auto, _recorrer_catalogo,
+                        _stat_archivo)
+from ..db import CarDB
+from ..juego import SelectorPreguntas, SesionJuego
+from ..nucleo import (Auto, DB_PATH, JOURNAL_COMPACTAR_CADA, JOURNAL_FSYNC_CADA, MODO_PREGUNTAS, PARTICIONES_PATH,
+                      PARTICION_POR, PESOS_PUNTAJE, PESO_PUNTAJE, _FALTA, _a_json, _contar, _normalizar_nombre,
+                      _valores)
+
+
+# ============================ CATÁLOGO PARTICIONADO ============================
+class _Particion:
+    """
+    Una parte del catálogo (los autos con clave == valor) y su resumen del manifiesto:
+    cuántos autos tienen cada valor, para saber sin abrirla si puede tener candidatos.
+    """
+
+    def __init__(self, carpeta: str, valor: Any, archivo: str, n: int = 0,
+                 valores: Optional[Dict[str, Iterable[Tuple[Any, int]]]] = None,
+                 faltan: Optional[Dict[str, int]] = None):
+        self.valor = valor
+        self.archivo = archivo
+        self.ruta = os.path.join(carpeta, archivo)
+        self.ruta_journal = os.path.splitext(self.ruta)[0] + ".journal.jsonl"
+        self.n = n
+        self.valores: Dict[str, Dict[Any, int]] = {k: dict(pares) for k, pares in (valores or {}).items()}
+        self.faltan: Dict[str, int] = dict(faltan or {})
+        self.primero = float("inf")   # el menor orden de sus autos (ver CarDBParticionado.ids_top)
+        self.cargada = False
+        self.journal = None     # archivo abierto en modo append (perezoso), como en CarDB
+        self.leido = 0          # hasta qué byte del journal tengo aplicado (cargada o no: el mapa de nombres)
+        self.entradas = 0       # líneas en el journal desde la última vez que la reescribí
+
+    @classmethod
+    def de_manifiesto(cls, carpeta: str, datos: Dict[str, Any]) -> "_Particion":
+        valores, faltan = datos.get("valores"), datos.get("faltan")
+        if "n" not in datos:   # manifiesto de antes de los conteos: solo los valores
+            valores = {k: [(v, 0) for v in vals] for k, vals in (valores or {}).items()}
+            faltan = dict.fromkeys(faltan or (), 0)
+        return cls(carpeta, datos["valor"], datos["archivo"], datos.get("n", 0), valores, faltan)
+
+    def a_manifiesto(self) -> Dict[str, Any]:
+        return {"valor": self.valor, "archivo": self.archivo, "n": self.n,
+                "valores": {k: sorted(tabla.items(), key=lambda par: str(par[0])) for k, tabla in self.valores.items()},
+                "faltan": self.faltan}
+
+    def anotar(self, car: Dict[str, Any], claves: Tuple[str, ...]) -> bool:
+        """Sumo los valores del auto al resumen (si son nuevos); True si cambió (hay que reescribir el manifiesto)."""
+        cambio = False
+        for k, v in zip(claves, _valores(car, claves)):
+            if v is _FALTA:
+                if k not in self.faltan:
+                    self.faltan[k] = 0
+                    cambio = True
+            elif v not in self.valores.setdefault(k, {}):
+                self.valores[k][v] = 0
+                cambio = True
+        return cambio
+
+    def resumir(self, autos: List[Dict[str, Any]], claves: Tuple[str, ...]) -> None:
+        """Resumen exacto de estos autos, con conteos (al reescribir la parte)."""
+        self.n = len(autos)
+        self.valores, self.faltan = {k: {} for k in claves}, {}
+        for car in autos:
+            for k, v in zip(claves, _valores(car, claves)):
+                if v is _FALTA:
+                    self.faltan[k] = self.faltan.get(k, 0) + 1
+                else:
+                    self.valores[k][v] = self.valores[k].get(v, 0) + 1
+
+    def puede(self, respuestas: Dict[str, Any]) -> bool:
+        """¿Puede tener candidatos exactos? Las claves sin resumen (name, extras) no descartan."""
+        for k, v in respuestas.items():
+            if v in ("", None) or k not in self.valores:
+                continue
+            if v not in self.valores[k] and k not in self.faltan:
+                return False
+        return True
+
+
+class CarDBParticionado(CarDB):
+    """
+    CarDB sobre una carpeta de partes: un JSON (+ journal) por valor de 'clave' y un
+    manifiesto con el resumen de cada parte y el mapa nombre -> (parte, orden).
+    Cada operación carga solo las partes que le tocan; self.cars va ordenado por 'orden'.
+    """
+
+    def __init__(self, carpeta: str = PARTICIONES_PATH, clave: Optional[str] = None,
+                 ruta_json: str = DB_PATH):
+        super().__init__(os.path.join(carpeta, "manifiesto.json"))
+        self.carpeta = carpeta
+        self.ruta_json = ruta_json
+        self._clave_pedida = clave    # None = la del manifiesto (o PARTICION_POR si no hay)
+        self.clave = clave or PARTICION_POR
+        self._particiones: List[_Particion] = []
+        self._por_valor: Dict[Any, _Particion] = {}
+        self._claves_resumen: Tuple[str, ...] = ()
+        self._movidas: set = set()    # partes de las que salió un auto (aprender cambió su clave)
+        self._nombres: Dict[str, Tuple[_Particion, int]] = {}   # nombre/alias normalizado -> (parte, orden)
+        self._total = 0               # autos del catálogo entero (cargados o no)
+        self._siguiente = 0           # orden del próximo auto nuevo
+        self._orden: List[int] = []   # orden de cada auto de self.cars (creciente)
+        self._cargas = 0              # sube cada vez que las posiciones de self.cars cambian
+
+    def cargar(self) -> None:
+        """
+        Leo solo el manifiesto y los journals (las partes, al pedirlas). Si no hay,
+        reparto el JSON (o la semilla, si tampoco hay JSON: no creo otro catálogo al
+        lado); si me piden otra clave que la del manifiesto, reparto todo de nuevo por esa.
+        """
+        self.attributes = self._schema_attributes()
+        self._claves_resumen = tuple(a["key"] for a in self.attributes)
+        if self.clave not in self._claves_resumen:
+            raise ValueError(f"No puedo particionar por {self.clave!r}: no es una pregunta del esquema")
+        os.makedirs(self.carpeta, exist_ok=True)
+        with self._bloqueo, self._cerrojo:
+            if not os.path.exists(self.ruta):
+                origen = CarDB(self.ruta_json)
+                if os.path.exists(self.ruta_json):
+                    origen.cargar()
+                    origen.cerrar()
+                else:
+                    origen._semilla()
+                self.cars = origen.cars
+                self._reindexar()   # el orden de cada auto es su posición en el JSON
+                self._reescribir()
+            else:
+                con_nombres = self._leer_manifiesto()
+                self.cars, self._orden = [], []
+                self._reindexar()
+                if not con_nombres or (self._clave_pedida and self._clave_pedida != self.clave):
+                    # manifiesto de antes del mapa de nombres (y los conteos): lo armo una vez
+                    self.cargar_particiones()
+                    self.clave = self._clave_pedida or self.clave
+                    self._reescribir()
+
+    # --- Manifiesto y mapa de nombres ---
+    def _leer_manifiesto(self) -> bool:
+        """Manifiesto + lo que los journals agregaron al mapa desde entonces. False si no trae el mapa."""
+        self._visto = _stat_archivo(self.ruta)
+        with open(self.ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        self.clave = datos["clave"]
+        self._revision = int(datos.get("revision", 0))
+        self._particiones = [_Particion.de_manifiesto(self.carpeta, d) for d in datos.get("particiones", [])]
+        self._por_valor = {p.valor: p for p in self._particiones}
+        self._total = int(datos.get("total", 0))
+        self._siguiente = int(datos.get("siguiente", 0))
+        self._nombres = {}
+        for clave, (i, orden) in datos.get("nombres", {}).items():
+            p = self._particiones[i]
+            self._nombres[clave] = (p, orden)
+            p.primero = min(p.primero, orden)
+        for p in self._particiones:
+            if os.path.exists(p.ruta_journal):
+                entradas, p.leido, _ = _leer_entradas(p.ruta_journal)
+                p.entradas = len(entradas)
+                self._anotar_entradas(p, entradas)
+        return "nombres" in datos
+
+    def _escribir_manifiesto(self) -> None:
+        """
+        Write-then-rename; la revisión sube: otro proceso que lo vea cambiado se pone al día.
+        Sin indent: el mapa tiene una entrada por auto y así json usa el codificador en C.
+        """
+        self._revision += 1
+        indice = {p: i for i, p in enumerate(self._particiones)}
+        datos = {"schema_version": SCHEMA_VERSION, "revision": self._revision, "clave": self.clave,
+                 "total": self._total, "siguiente": self._siguiente,
+                 "particiones": [p.a_manifiesto() for p in self._particiones],
+                 "nombres": {clave: [indice[p], orden] for clave, (p, orden) in self._nombres.items()
+                             if p in indice}}
+        tmp = self.ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.ruta)
+        self._visto = _stat_archivo(self.ruta)
+
+    def _anotar_nombre(self, car: Dict[str, Any], p: _Particion, orden: int) -> None:
+        """El auto (y sus alias) vive en la parte p con ese orden; un nombre nuevo suma al total."""
+        clave = _normalizar_nombre(car.get("name", ""))
+        if clave not in self._nombres:
+            self._total += 1
+        self._nombres[clave] = (p, orden)
+        for alias in car.get("alias") or []:
+            actual = self._nombres.setdefault(_normalizar_nombre(alias), (p, orden))
+            if actual[1] == orden:   # un nombre real (de otro auto) gana a un alias
+                self._nombres[_normalizar_nombre(alias)] = (p, orden)
+        p.primero = min(p.primero, orden)
+        self._siguiente = max(self._siguiente, orden + 1)
+
+    def _anotar_entradas(self, p: _Particion, entradas: List[Dict[str, Any]]) -> None:
+        """Líneas del journal de p: al mapa (con el orden que anotó quien la escribió) y al resumen."""
+        for e in entradas:
+            car = e["car"]
+            orden = e.get("orden")
+            if orden is None:   # línea de antes del orden
+                previo = self._nombres.get(_normalizar_nombre(car.get("name", "")))
+                orden = previo[1] if previo is not None else self._siguiente
+            self._anotar_nombre(car, p, orden)
+            p.anotar(car, self._claves_resumen)
+
+    def _orden_de(self, car: Dict[str, Any]) -> int:
+        """El orden del auto según el mapa; si no está (importar, el primer reparto), uno nuevo al final."""
+        previo = self._nombres.get(_normalizar_nombre(car.get("name", "")))
+        if previo is not None:
+            return previo[1]
+        orden = self._siguiente
+        self._anotar_nombre(car, self._particion_de(car), orden)
+        return orden
+
+    def _valor(self, car: Dict[str, Any]) -> Any:
+        """Valor de la clave de partición del auto ("" si no la trae)."""
+        v = car.get(self.clave)
+        return "" if v in ("", None) else v
+
+    def _nueva_particion(self, valor: Any, usados: set) -> _Particion:
+        """Parte vacía para 'valor'; el archivo lleva la clave y el valor sin acentos ni símbolos."""
+        texto = "".join(c if c.isalnum() else "_" for c in _normalizar_nombre(str(valor))) or "_"
+        archivo, n = f"{self.clave}={texto}.json", 1
+        while archivo in usados:
+            n += 1
+            archivo = f"{self.clave}={texto}-{n}.json"
+        p = _Particion(self.carpeta, valor, archivo)
+        p.resumir([], self._claves_resumen)
+        p.cargada = True
+        return p
+
+    def _parte(self, valor: Any) -> _Particion:
+        """La parte de ese valor (si es nuevo, la creo)."""
+        p = self._por_valor.get(valor)
+        if p is None:
+            p = self._nueva_particion(valor, {q.archivo for q in self._particiones})
+            self._particiones.append(p)
+            self._por_valor[valor] = p
+        return p
+
+    def _particion_de(self, car: Dict[str, Any]) -> _Particion:
+        """La parte donde va el auto."""
+        return self._parte(self._valor(car))
+
+    # --- Carga perezosa de partes ---
+    def _leer_particion(self, p: _Particion) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Los autos de una parte (su JSON y encima su journal, upsert por nombre) y el
+        orden de cada uno. Salteo los que el mapa pone en otra parte: se mudaron y
+        la línea del journal de su parte nueva quedó escrita antes que esta.
+        """
+        autos: List[Dict[str, Any]] = []
+        if os.path.exists(p.ruta):
+            desde = 0
+            for clave, v in _recorrer_catalogo(p.ruta):
+                if clave == "car":
+                    autos.append(Auto.de(v if desde >= SCHEMA_VERSION else _migrar_auto(v, desde)))
+                elif clave == "schema_version":
+                    desde = int(v)
+        claves = [_normalizar_nombre(c.get("name", "")) for c in autos]
+        p.leido = p.entradas = 0
+        if os.path.exists(p.ruta_journal):
+            entradas, p.leido, _ = _leer_entradas(p.ruta_journal)
+            p.entradas = len(entradas)
+            self._anotar_entradas(p, entradas)
+            pos_por_nombre: Dict[str, int] = {}
+            for i, clave in enumerate(claves):
+                pos_por_nombre.setdefault(clave, i)
+            for e in entradas:
+                car = Auto.de(e["car"])
+                clave = _normalizar_nombre(car.get("name", ""))
+                if clave in pos_por_nombre:
+                    autos[pos_por_nombre[clave]] = car
+                else:
+                    pos_por_nombre[clave] = len(autos)
+                    autos.append(car)
+                    claves.append(clave)
+        propios, ordenes = [], []
+        for car, clave in zip(autos, claves):
+            previo = self._nombres.get(clave)
+            if previo is None:   # manifiesto sin mapa: lo voy armando
+                previo = (p, self._siguiente)
+                self._anotar_nombre(car, p, previo[1])
+            if previo[0] is p:
+                propios.append(car)
+                ordenes.append(previo[1])
+        return propios, ordenes
+
+    def _cargar(self, partes: Iterable[_Particion]) -> None:
+        """Sumo a self.cars las partes que falten, todo ordenado por 'orden', y rehago el índice (una vez)."""
+        partes = [p for p in partes if not p.cargada]
+        if not partes:
+            return
+        with self._bloqueo, self._cerrojo:
+            filas = list(zip(self._orden, self.cars))
+            for p in partes:
+                if not p.cargada:
+                    autos, ordenes = self._leer_particion(p)
+                    filas += zip(ordenes, autos)
+                    p.cargada = True
+            filas.sort(key=lambda fila: fila[0])
+            self._orden = [orden for orden, _ in filas]
+            self.cars = [car for _, car in filas]
+            self._cargas += 1
+            self._reindexar()
+
+    def cargar_particiones(self) -> None:
+        """Cargo todas las partes que falten (el catálogo entero queda en memoria)."""
+        self._cargar(self._particiones)
+
+    def _reindexar(self, por_nombre: Optional[Dict[str, int]] = None) -> None:
+        # importar y fusionar cambian self.cars por su cuenta: el orden sale del mapa
+        if len(self._orden) != len(self.cars):
+            self._orden = [self._orden_de(car) for car in self.cars]
+            self._cargas += 1
+        super()._reindexar(por_nombre)
+
+    def __len__(self) -> int:
+        return self._total
+
+    def _cota(self, p: _Particion, respuestas: Dict[str, Any]) -> int:
+        """Lo más que puede sumar un auto de la parte p según su resumen (ver _top)."""
+        total = 0
+        for k, v in respuestas.items():
+            if v in ("", None):
+                continue
+            if k not in p.valores:   # name, extras: sin resumen, puede que sume todo
+                total += 1 if self.puntaje == "exacto" else PESOS_PUNTAJE.get(k, PESO_PUNTAJE)
+            elif self.puntaje == "exacto":
+                total += v in p.valores[k]
+            else:
+                total += max((self._puntos(k, v, x) for x in p.valores[k]), default=0)
+        return total
+
+    def _cargar_candidatas(self, respuestas: Dict[str, Any]) -> None:
+        """Las partes que pueden tener candidatos exactos; las demás ni las abro."""
+        self._cargar([p for p in self._particiones if p.puede(respuestas)])
+
+    def ids_exactos(self, respuestas: Dict[str, Any]) -> array:
+        self._cargar_candidatas(respuestas)
+        return super().ids_exactos(respuestas)
+
+    def ids_top(self, respuestas: Dict[str, Any], k: int = 3) -> List[Tuple[int, int]]:
+        """
+        Cargo solo las partes que pueden entrar al top-k: las de mejor cota hasta
+        tener k autos y luego las que podrían superar al k-ésimo de lo ya cargado
+        (o empatarlo con un auto de orden menor: en empate gana el primero del catálogo).
+        """
+        if k > 0 and not all(p.cargada for p in self._particiones):
+            with self._bloqueo, self._cerrojo:
+                pendientes = sorted((p for p in self._particiones if not p.cargada),
+                                    key=lambda p: -self._cota(p, respuestas))
+                while pendientes and len(self.cars) < k:
+                    self._cargar([pendientes.pop(0)])
+                top = super().ids_top(respuestas, k)
+                umbral, orden = (top[-1][1], self._orden[top[-1][0]]) if len(top) == k else (-1, 0)
+
+                def entra(p: _Particion) -> bool:
+                    cota = self._cota(p, respuestas)
+                    return cota > umbral or (cota == umbral and p.primero < orden)
+                self._cargar([p for p in pendientes if entra(p)])
+        return super().ids_top(respuestas, k)
+
+    # --- Partida, aprender y herramientas: solo las partes que tocan ---
+    def nueva_sesion(self, modo: Optional[str] = None) -> "SesionParticionada":
+        return SesionParticionada(self, modo)
+
+    def usa_arbol(self) -> bool:
+        """El árbol necesita el catálogo entero en memoria: el modo "ganancia" usa el selector."""
+        return False
+
+    def _selector_inicial(self) -> SelectorPreguntas:
+        """La primera pregunta del modo "ganancia" sale de los conteos del manifiesto (no abro partes)."""
+        conteos: Dict[str, Dict[Any, int]] = {k: {} for k in self._claves_resumen}
+        sin_clave = dict.fromkeys(self._claves_resumen, 0)
+        total = 0
+        for p in self._particiones:
+            total += p.n
+            for k, tabla in p.valores.items():
+                for v, c in tabla.items():
+                    if c:
+                        conteos[k][v] = conteos[k].get(v, 0) + c
+            for k, c in p.faltan.items():
+                sin_clave[k] += c
+        return SelectorPreguntas.desde_conteos(total, conteos, sin_clave)
+
+    def aprender(self, nombre: str, respuestas: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Cargo la parte del auto (por el mapa de nombres) y la de su valor de la clave
+        si lo cambia: sus gemelos, con el mismo vector, están en esa misma parte.
+        """
+        with self._bloqueo, self._cerrojo:
+            self._refrescar()
+            previo = self._nombres.get(_normalizar_nombre(" ".join(nombre.split())))
+            partes = [previo[0]] if previo is not None else []
+            valor = respuestas.get(self.clave)
+            if valor not in ("", None) or previo is None:
+                p = self._por_valor.get("" if valor in ("", None) else valor)
+                if p is not None:
+                    partes.append(p)
+            self._cargar(partes)
+            return super().aprender(nombre, respuestas)
+
+    def _agregar(self, nuevo: Dict[str, Any], clave: str) -> int:
+        previo = self._nombres.get(clave)   # lo escribió otro proceso: trae su orden
+        orden = previo[1] if previo is not None else self._siguiente
+        pos = super()._agregar(nuevo, clave)
+        self._orden.append(orden)
+        self._siguiente = max(self._siguiente, orden + 1)
+        return pos
+
+    def importar_autos(self, autos: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """Cargo solo las partes que tocan: la de cada auto que ya existe y la de su valor nuevo."""
+        autos = list(autos)
+        with self._bloqueo, self._cerrojo:
+            self._refrescar()
+            partes = set()
+            for car in autos:
+                previo = self._nombres.get(_normalizar_nombre(car.get("name", "")))
+                if previo is not None:
+                    partes.add(previo[0])
+                p = self._por_valor.get(self._valor(car))
+                if p is not None:
+                    partes.add(p)
+            self._cargar([p for p in self._particiones if p in partes])
+            return super().importar_autos(autos)
+
+    def fusionar_duplicados(self, misma_marca: bool = True) -> int:
+        with self._bloqueo, self._cerrojo:
+            self._refrescar()
+            self.cargar_particiones()
+            return super().fusionar_duplicados(misma_marca)
+
+    def grupos_indistinguibles(self) -> List[List[Dict[str, Any]]]:
+        """
+        Dos gemelos tienen el mismo valor de la clave: busco parte por parte. Las no
+        cargadas, en un CarDB en memoria que suelto al terminar cada una.
+        """
+        grupos = [(self._orden[g[0]], [self.cars[i] for i in g]) for g in self._grupos_posiciones()]
+        for p in self._particiones:
+            if p.cargada:
+                continue
+            autos, ordenes = self._leer_particion(p)
+            aparte = CarDB(os.devnull)
+            aparte.attributes, aparte.cars = self.attributes, autos
+            aparte._reindexar()
+            grupos += [(ordenes[g[0]], [aparte.cars[i] for i in g]) for g in aparte._grupos_posiciones()]
+        grupos.sort(key=lambda g: (-len(g[1]), g[0]))
+        return [g for _, g in grupos]
+
+    def buscar_por_nombre(self, nombre: str) -> Optional[Dict[str, Any]]:
+        previo = self._nombres.get(_normalizar_nombre(nombre))
+        if previo is None:
+            return None
+        self._cargar([previo[0]])
+        return super().buscar_por_nombre(nombre)
+
+    def iterar_autos(self) -> Iterator[Dict[str, Any]]:
+        """Parte por parte: las cargadas desde memoria y las demás leídas de a una (nunca todas juntas)."""
+        por_valor: Dict[Any, List[Dict[str, Any]]] = {}
+        for car in self.cars:
+            por_valor.setdefault(self._valor(car), []).append(car)
+        for p in list(self._particiones):
+            yield from por_valor.get(p.valor, []) if p.cargada else self._leer_particion(p)[0]
+
+    # --- Escritura: journal por parte ---
+    def _cambiar(self, pos: int, cambios: Dict[str, Any], reemplazar: bool = False) -> Dict[str, Any]:
+        antes = self._valor(self.cars[pos])
+        car = super()._cambiar(pos, cambios, reemplazar)
+        if self._valor(car) != antes and antes in self._por_valor:
+            self._movidas.add(self._por_valor[antes])
+        return car
+
+    def _registrar(self, car: Dict[str, Any]) -> None:
+        """
+        Como en CarDB, pero la línea va al journal de SU parte (la de car[clave]),
+        con el orden del auto: las demás ni se tocan. Si el auto cambió de parte,
+        la vieja se reescribe sin él.
+        """
+        p = self._particion_de(car)
+        orden = self._orden[self._indice_nombres()[_normalizar_nombre(car.get("name", ""))]]
+        self._anotar_nombre(car, p, orden)
+        cambio = p.anotar(car, self._claves_resumen)
+        if p.journal is None:
+            p.journal = open(p.ruta_journal, "ab")
+            if p.journal.tell() > 0:
+                p.journal.write(b"\n")   # por si la última línea quedó cortada
+        p.journal.write(json.dumps({"op": "upsert", "v": SCHEMA_VERSION, "orden": orden, "car": car},
+                                   ensure_ascii=False, default=_a_json).encode("utf-8") + b"\n")
+        p.journal.flush()
+        p.leido = p.journal.tell()
+        p.entradas += 1
+        self._sin_fsync += 1
+        movidas, self._movidas = self._movidas - {p}, set()
+        if movidas:
+            self._reescribir(list(movidas))   # ya escribe el manifiesto
+        elif cambio:
+            self._escribir_manifiesto()
+        if self._escritor is not None:
+            self._escritor.pedir()
+            return
+        if self._sin_fsync >= JOURNAL_FSYNC_CADA:
+            self.sincronizar_journal()
+        if p.entradas >= JOURNAL_COMPACTAR_CADA:
+            self.compactar(solo_llenas=True)
+
+    def sincronizar_journal(self) -> None:
+        if self._sin_fsync:
+            for p in self._particiones:
+                if p.journal is not None:
+                    os.fsync(p.journal.fileno())
+        self._sin_fsync = 0
+
+    def _cerrar_journal(self) -> None:
+        self.sincronizar_journal()
+        for p in self._particiones:
+            if p.journal is not None:
+                p.journal.close()
+                p.journal = None
+
+    def _persistir(self) -> None:
+        with self._cerrojo:
+            self.sincronizar_journal()
+            toca = any(p.entradas >= JOURNAL_COMPACTAR_CADA for p in self._particiones)
+        if toca:
+            self.compactar(solo_llenas=True)
+
+    def compactar(self, solo_llenas: bool = False) -> None:
+        """Reescribo solo las partes con journal (tras importar o fusionar, las cargadas)."""
+        with self._bloqueo, self._cerrojo:
+            self._refrescar()
+            if self._sin_journal:
+                if all(p.cargada for p in self._particiones):
+                    self._reescribir()
+                else:
+                    self._reescribir([p for p in self._particiones if p.cargada])
+                self._sin_journal = False
+                return
+            if solo_llenas:
+                partes = [p for p in self._particiones if p.entradas >= JOURNAL_COMPACTAR_CADA]
+            else:
+                partes = [p for p in self._particiones if p.entradas or os.path.exists(p.ruta_journal)]
+            if partes:
+                self._reescribir(partes)
+
+    def guardar(self, cars: Optional[List[Dict[str, Any]]] = None) -> None:
+        """No hay un JSON único: reparto self.cars entero en partes ('cars' no aplica)."""
+        with self._bloqueo, self._cerrojo:
+            self.cargar_particiones()
+            self._reescribir()
+
+    def _reescribir(self, partes: Optional[List[_Particion]] = None) -> None:
+        """
+        Reescribo esas partes (JSON, journal vacío, resumen y mapa) y luego el manifiesto.
+        partes=None: reparto TODO self.cars de nuevo.
+        """
+        grupos: Dict[Any, List[int]] = {}
+        if partes is None or any(p.cargada for p in partes):
+            for pos, car in enumerate(self.cars):
+                grupos.setdefault(self._valor(car), []).append(pos)
+        sobran: List[_Particion] = []
+        if partes is None:
+            self._cerrar_journal()
+            reuso = {p.valor: p for p in self._particiones if p.archivo.startswith(f"{self.clave}=")}
+            usados = {p.archivo for p in reuso.values()}
+            partes = []
+            for valor in sorted(grupos, key=str):
+                p = reuso.pop(valor, None) or self._nueva_particion(valor, usados)
+                usados.add(p.archivo)
+                p.cargada = True
+                p.primero = float("inf")
+                partes.append(p)
+            sobran = [p for p in self._particiones if p not in partes]
+            self._particiones, self._por_valor = partes, {p.valor: p for p in partes}
+            self._nombres, self._total = {}, 0
+        else:
+            partes = list(partes) + [self._parte(valor) for valor in grupos if valor not in self._por_valor]
+        for p in partes:
+            if p.journal is not None:
+                os.fsync(p.journal.fileno())
+                p.journal.close()
+                p.journal = None
+            if p.cargada:
+                posiciones = grupos.get(p.valor, [])
+                autos, ordenes = [self.cars[i] for i in posiciones], [self._orden[i] for i in posiciones]
+            else:
+                autos, ordenes = self._leer_particion(p)
+            _escribir_catalogo(p.ruta, self.attributes, autos)
+            if os.path.exists(p.ruta_journal):
+                os.remove(p.ruta_journal)
+            p.leido = p.entradas = 0
+            p.resumir(autos, self._claves_resumen)
+            for car, orden in zip(autos, ordenes):
+                self._anotar_nombre(car, p, orden)
+        self._escribir_manifiesto()
+        for p in sobran:   # recién ahora: el manifiesto viejo todavía las nombraba
+            for r in (p.ruta, p.ruta_journal):
+                if os.path.exists(r):
+                    os.remove(r)
+
+    # --- Varios procesos sobre la misma carpeta ---
+    def _hay_cambios(self) -> bool:
+        """Manifiesto reescrito, o journal de alguna parte que creció (un stat por parte)."""
+        if self._visto is None:
+            return False
+        if _stat_archivo(self.ruta) != self._visto:
+            return True
+        for p in self._particiones:
+            st = _stat_archivo(p.ruta_journal)
+            if (st[1] if st else 0) != p.leido:
+                return True
+        return False
+
+    def _refrescar(self) -> int:
+        """
+        Leo la cola del journal de cada parte: las líneas van al mapa de nombres y,
+        si la parte está cargada, también a self.cars. Si reescribieron algo, recargo.
+        """
+        if not self._hay_cambios():
+            return 0
+        tamanos = {}
+        for p in self._particiones:
+            st = _stat_archivo(p.ruta_journal)
+            tamanos[p.archivo] = st[1] if st else 0
+        if _stat_archivo(self.ruta) != self._visto or any(tamanos[p.archivo] < p.leido for p in self._particiones):
+            n = len(self.cars)
+            self._recargar()
+            return max(n, 1)
+        cambiados = 0
+        for p in self._particiones:
+            if tamanos[p.archivo] != p.leido:
+                entradas, p.leido, _ = _leer_entradas(p.ruta_journal, p.leido)
+                p.entradas += len(entradas)
+                self._anotar_entradas(p, entradas)
+                if p.cargada:
+                    for e in entradas:
+                        self._aplicar(e["car"])
+                cambiados += len(entradas)
+        if cambiados:
+            self.generacion += 1   # una parte sin cargar pudo ganar candidatos (su resumen creció)
+        self._movidas = set()
+        return cambiados
+
+    def _recargar(self) -> None:
+        """Releo el manifiesto y vuelvo a cargar las mismas partes."""
+        cargadas = {p.valor for p in self._particiones if p.cargada}
+        self._cerrar_journal()
+        self._leer_manifiesto()
+        self.cars, self._orden = [], []
+        self._cargas += 1
+        self._por_nombre = None
+        self._reindexar()
+        self._cargar([p for p in self._particiones if p.valor in cargadas])
+
+
+class SesionParticionada(SesionJuego):
+    """
+    SesionJuego que solo carga las partes que pueden tener candidatos.
+    Si cargar partes reordenó self.cars, deshacer repite las respuestas en vez del pop.
+    """
+
+    def __init__(self, db: CarDBParticionado, modo: Optional[str] = None):
+        self.db = db
+        self.modo = modo or MODO_PREGUNTAS
+        self.respuestas: Dict[str, Any] = {}
+        self._pila: List[Tuple[str, Optional[int], int, Any, int]] = []
+        self._desde_cero()
+
+    def _desde_cero(self) -> None:
+        self.vivos: Optional[int] = None
+        self.n_vivos = len(self.db)
+        self.selector = self.db._selector_inicial() if self.modo == "ganancia" else None
+        self._cargas = self.db._cargas
+
+    def _al_dia(self) -> None:
+        """Si el catálogo se reordenó (cargué partes), rehago 'vivos' para las respuestas de hoy."""
+        if self._cargas == self.db._cargas:
+            return
+        self._cargas = self.db._cargas
+        if self.vivos is not None:
+            self.vivos = self.db._mascara_exacta(self.respuestas)
+            self.n_vivos = _contar(self.vivos)
+            if self.selector is not None:
+                self.selector = SelectorPreguntas(self.db, self.vivos)
+
+    def responder(self, key: str, value: Any) -> None:
+        if value not in ("", None):
+            self.db._cargar_candidatas(dict(self.respuestas, **{key: value}))
+        self._al_dia()
+        mascara = None if value in ("", None) else self.db._mascara(key, value)   # antes de tocar nada
+        estado_sel = self.selector.estado() if self.selector is not None else None
+        self._pila.append((key, self.vivos, self.n_vivos, estado_sel, self._cargas))
+        self.respuestas[key] = value
+        if mascara is None:
+            return
+        if self.vivos is None:   # primera respuesta de verdad: desde acá, bitsets
+            self.vivos = mascara
+            self.n_vivos = _contar(self.vivos)
+            if self.selector is not None:
+                self.selector = SelectorPreguntas(self.db, self.vivos)
+            return
+        nuevos = self.vivos & mascara
+        fuera = self.vivos & ~nuevos
+        if fuera:
+            self.vivos = nuevos
+            self.n_vivos -= _contar(fuera)
+            if self.selector is not None:
+                self.selector.descartar(fuera)
+
+    def deshacer(self) -> Optional[str]:
+        if not self._pila:
+            return None
+        key, vivos, n_vivos, estado_sel, cargas = self._pila.pop()
+        self.respuestas.pop(key, None)
+        if cargas != self.db._cargas:   # la foto es de otras posiciones: repito el resto
+            self.sincronizar()
+            return key
+        self.vivos, self.n_vivos, self._cargas = vivos, n_vivos, cargas
+        if self.selector is not None:
+            self.selector.restaurar(estado_sel)
+        return key
+
+    def candidatos(self) -> List[Dict[str, Any]]:
+        if self.vivos is None:   # sin respuestas: todos (esto sí carga el catálogo entero)
+            return self.db.candidatos_exactos(self.respuestas)
+        self._al_dia()
+        return self.db._autos_de(self.vivos)
+
+    def sincronizar(self) -> None:
+        pasos = [(key, self.respuestas.get(key, "")) for key, *_ in self._pila]
+        self.respuestas.clear()          # mismo dict: la UI lo tiene referenciado
+        self._pila = []
+        self._desde_cero()
+        for key, value in pasos:
+            self.responder(key, value)
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""Backend "sqlite": una tabla con índices; aprender y las búsquedas son consultas."""
+
+import json
+import os
+import sqlite3
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..db import CarDB
+from ..juego import SelectorPreguntas
+from ..nucleo import DB_PATH, MODO_PREGUNTAS, SQLITE_PATH, _normalizar_nombre
+
+
+# ============================ BACKEND SQLITE ===================================
+class CarDBSQLite(CarDB):
+    """
+    Misma interfaz que CarDB, pero los autos viven en una tabla SQLite (una columna por
+    clave, NULL = no lo trae). Nunca cargo el catálogo entero: todo son consultas.
+    """
+
+    def __init__(self, ruta: str = SQLITE_PATH, ruta_json: str = DB_PATH):
+        # Lo de CarDB (rutas, índices vacíos, ...) vale igual; el journal y el árbol
+        # no los uso: SQLite ya escribe en transacciones y SesionSQLite cuenta con GROUP BY.
+        super().__init__(ruta)
+        self.ruta_json = ruta_json
+        self._bools: set = set()
+        self.conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._alias: Optional[Tuple[int, Any]] = None   # (generación, _fusionados())
+
+    def cargar(self) -> None:
+        """
+        Abro (o creo) la base. Si la tabla está vacía, migro el JSON de DB_PATH
+        si existe; si no, meto la semilla.
+        """
+        self.attributes = self._schema_attributes()
+        self._columnas = [a["key"] for a in self.attributes]
+        self._bools = {a["key"] for a in self.attributes if a.get("tipo") == "bool"}
+        # Otro hilo puede aprender (servidor, ventana): se turnan con db.lectura()
+        self.conn = sqlite3.connect(self.ruta, check_same_thread=False)
+        cols = ", ".join(self._columnas)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS autos ("
+                          f"id INTEGER PRIMARY KEY, name TEXT NOT NULL, marca, {cols}, extra TEXT, clave TEXT)")
+        if "clave" not in {c[1] for c in self.conn.execute("PRAGMA table_info(autos)")}:
+            self._agregar_clave()
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_autos_clave ON autos(clave)")
+        for k in self._columnas:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS ix_autos_{k} ON autos({k})")
+        self.conn.commit()
+
+        if self.conn.execute("SELECT 1 FROM autos LIMIT 1").fetchone() is None:
+            if os.path.exists(self.ruta_json):
+                self.migrar_desde_json(self.ruta_json)
+            else:
+                semilla = CarDB()
+                semilla._semilla()
+                self._insertar(semilla.cars)
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refrescar(self) -> int:
+        """
+        Entre procesos ya se turna SQLite; solo miro si OTRA conexión escribió
+        (PRAGMA data_version cambia) y, si es así, la cache de respuestas no vale.
+        """
+        if self.conn is None:
+            return 0
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return 0
+        self._data_version = version
+        self.generacion += 1
+        return 1
+
+    def _agregar_clave(self) -> None:
+        """
+        Base de antes de la columna 'clave': la agrego y la lleno en una transacción.
+        Si dos nombres chocan, el de id menor se queda la clave y el otro lleva "#id".
+        """
+        with self.conn:
+            self.conn.execute("ALTER TABLE autos ADD COLUMN clave TEXT")
+            usadas: set = set()
+            filas = []
+            for id_auto, nombre in self.conn.execute("SELECT id, name FROM autos ORDER BY id").fetchall():
+                clave = _normalizar_nombre(nombre)
+                if clave in usadas:
+                    clave = f"{clave}#{id_auto}"
+                usadas.add(clave)
+                filas.append((clave, id_auto))
+            self.conn.executemany("UPDATE autos SET clave = ? WHERE id = ?", filas)
+            self.conn.execute("DROP INDEX IF EXISTS ux_autos_name")
+
+    def migrar_desde_json(self, ruta_json: str = DB_PATH) -> int:
+        """
+        Paso un coches_db.json (con su journal y migración de esquema) a la tabla.
+        Si un nombre ya existe, lo reemplazo. Devuelvo cuántos autos pasé.
+        """
+        origen = CarDB(ruta_json)
+        origen.cargar()
+        self._insertar(origen.cars)
+        return len(origen.cars)
+
+    def _insertar(self, cars: List[Dict[str, Any]]) -> None:
+        """
+        Upsert en bloque (una sola transacción). Uso ON CONFLICT y no REPLACE:
+        REPLACE borra e inserta, cambia el id y con él el orden de desempate.
+        """
+        cols = ["name", "marca"] + self._columnas + ["extra", "clave"]
+        marcas = ", ".join("?" for _ in cols)
+        sets = ", ".join(f"{c} = excluded.{c}" for c in cols[:-1])
+        sql = (f"INSERT INTO autos ({', '.join(cols)}) VALUES ({marcas}) "
+               f"ON CONFLICT(clave) DO UPDATE SET {sets}")
+        with self.conn:
+            self.conn.executemany(sql, (self._a_fila(c) for c in cars))
+
+    def _a_fila(self, car: Dict[str, Any]) -> List[Any]:
+        conocidas = {"name", "marca", *self._columnas}
+        extra = {k: v for k, v in car.items() if k not in conocidas}
+        return ([car.get("name", ""), car.get("marca")] + [car.get(k) for k in self._columnas]
+                + [json.dumps(extra, ensure_ascii=False) if extra else None,
+                   _normalizar_nombre(car.get("name", ""))])
+
+    def _a_auto(self, fila: sqlite3.Row) -> Dict[str, Any]:
+        """Fila -> dict como los del JSON (sin NULLs y con bools de verdad)."""
+        car = {"name": fila["name"], "marca": fila["marca"]}
+        for k in self._columnas:
+            v = fila[k]
+            if v is None:
+                continue
+            car[k] = bool(v) if k in self._bools and v in (0, 1) else v
+        if fila["extra"]:
+            car.update(json.loads(fila["extra"]))
+        return car
+
+    def _consultar(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        cur = self.conn.execute(sql, params)
+        cur.row_factory = sqlite3.Row
+        return [self._a_auto(f) for f in cur]
+
+    def _campo(self, key: str) -> Tuple[str, List[Any]]:
+        """
+        Expresión SQL de un campo y sus parámetros: la columna, o para las claves
+        fuera del esquema el valor dentro de 'extra' (NULL si el auto no lo trae).
+        """
+        if key in self._columnas or key in ("name", "marca"):
+            return key, []
+        return "json_extract(extra, ?)", [f'$."{key}"']
+
+    def _where(self, respuestas: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """WHERE con la misma regla: vacías se ignoran y NULL (no trae el campo) pasa."""
+        partes, params = [], []
+        for k, v in respuestas.items():
+            if v in ("", None):
+                continue
+            campo, extra = self._campo(k)
+            if extra:   # dentro del JSON: sin índice, una sola expresión
+                partes.append(f"IFNULL({campo} = ?, 1)")
+                params += extra + [v]
+            else:
+                partes.append(f"({k} = ? OR {k} IS NULL)")
+                params.append(v)
+        return (" WHERE " + " AND ".join(partes)) if partes else "", params
+
+    def __len__(self) -> int:
+        return self.contar({})
+
+    @property
+    def cars(self) -> List[Dict[str, Any]]:
+        """Aquí no hay lista en memoria: para recorrer, iterar_autos(); para contar, len(db)."""
+        raise TypeError("CarDBSQLite: los autos viven en la tabla; usar iterar_autos() o len(db)")
+
+    @cars.setter
+    def cars(self, autos: List[Dict[str, Any]]) -> None:
+        """CarDB.__init__ la deja vacía; aquí no hay lista: se cambia con aprender o migrar_desde_json."""
+        if autos:
+            raise TypeError("CarDBSQLite: los autos viven en la tabla, no se asigna la lista")
+
+    def guardar(self, cars: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Cada cambio ya es una transacción: solo confirmo. Con 'cars' (una foto,
+        como en CarDB) la tabla pasa a ser esa, en UNA transacción.
+        """
+        if self.conn is None:
+            return
+        if cars is not None:
+            with self.conn:
+                self.conn.execute("DELETE FROM autos")
+                self._insertar(cars)
+            self.generacion += 1
+        self.conn.commit()
+
+    def compactar(self) -> None:
+        if self.conn is not None:
+            self.conn.execute("VACUUM")
+
+    def usa_arbol(self) -> bool:
+        return False
+
+    def iniciar_escritor(self, espera: float = 0.5) -> None:
+        """Sin escritor de fondo: cada aprender() ya es una transacción corta de SQLite."""
+        return None
+
+    def cerrar(self) -> None:
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def contar(self, respuestas: Dict[str, Any]) -> int:
+        def calcular() -> int:
+            where, params = self._where(respuestas)
+            return self.conn.execute(f"SELECT COUNT(*) FROM autos{where}", params).fetchone()[0]
+        return self.cache.obtener(respuestas, self.generacion, ("n",), calcular)
+
+    def candidatos_exactos(self, respuestas: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """La cache guarda solo los ids; con ellos leo las filas por clave primaria."""
+        return self._por_ids(self.ids_exactos(respuestas))
+
+    def ids_exactos(self, respuestas: Dict[str, Any]) -> array:
+        def calcular() -> array:
+            where, params = self._where(respuestas)
+            return array("q", (i for (i,) in self.conn.execute(f"SELECT id FROM autos{where} ORDER BY id", params)))
+        return self.cache.obtener(respuestas, self.generacion, ("ids",), calcular)
+
+    def nombres_de(self, ids: Iterable[int]) -> List[str]:
+        ids = list(ids)
+        nombres = dict(self.conn.execute(f"SELECT id, name FROM autos WHERE id IN ({', '.join('?' for _ in ids)})",
+                                         ids)) if ids else {}
+        return [nombres.get(i, "") for i in ids]
+
+    def _por_ids(self, ids) -> List[Dict[str, Any]]:
+        """Filas de esos ids, en el mismo orden (de a 500: límite de parámetros de SQLite)."""
+        por_id: Dict[int, Dict[str, Any]] = {}
+        for i in range(0, len(ids), 500):
+            trozo = list(ids[i:i + 500])
+            cur = self.conn.execute(f"SELECT * FROM autos WHERE id IN ({', '.join('?' for _ in trozo)})", trozo)
+            cur.row_factory = sqlite3.Row
+            por_id.update((f["id"], self._a_auto(f)) for f in cur)
+        return [por_id[i] for i in ids if i in por_id]
+
+    def mejores_coincidencias(self, respuestas: Dict[str, Any], k: int = 3) -> List[Tuple[Dict[str, Any], int]]:
+        """Mismo top-k, calculado por SQLite: suma de comparaciones, ORDER BY puntos, id."""
+        top = self.ids_top(respuestas, k)
+        autos = self._por_ids([i for i, _ in top])
+        return [(car, pts) for car, (_, pts) in zip(autos, top)]
+
+    def _top(self, respuestas: Dict[str, Any], k: int) -> List[Tuple[int, int]]:
+        sumas, params = [], []
+        if self.puntaje == "difuso":
+            # Mismos pesos y cercanías que CarDB: un CASE por pregunta con los valores
+            # que suman algo; las redundantes, MAX() de ambas
+            for grupo in self._grupos_puntaje(respuestas)[0]:
+                casos = []
+                for key in grupo:
+                    attr = next(a for a in self.attributes if a["key"] == key)
+                    valores = [False, True] if attr.get("tipo") == "bool" else list(attr.get("opciones", []))
+                    if respuestas[key] not in valores:
+                        valores.append(respuestas[key])
+                    ramas = []
+                    for valor in valores:
+                        pts = self._puntos(key, respuestas[key], valor)
+                        if pts:
+                            ramas.append(f"WHEN ? THEN {pts}")
+                            params.append(valor)
+                    casos.append(f"CASE {key} {' '.join(ramas)} ELSE 0 END" if ramas else "0")
+                sumas.append(casos[0] if len(casos) == 1 else f"MAX({', '.join(casos)})")
+            # name, marca y las claves fuera del esquema: como en CarDB, solo suma el valor igual
+            for key, v in self._grupos_puntaje(respuestas)[1].items():
+                campo, extra = self._campo(key)
+                sumas.append(f"IFNULL({campo} = ?, 0) * {self._puntos(key, v, v)}")
+                params += extra + [v]
+        else:
+            for key, v in respuestas.items():
+                if v in ("", None):
+                    continue
+                campo, extra = self._campo(key)
+                sumas.append(f"IFNULL({campo} = ?, 0)")
+                params += extra + [v]
+        pts = " + ".join(sumas) if sumas else "0"
+        return self.conn.execute(f"SELECT id, ({pts}) AS pts FROM autos ORDER BY pts DESC, id LIMIT ?",
+                                 params + [k]).fetchall()
+
+    def aprender(self, nombre: str, respuestas: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Igual que en JSON: si el nombre (o un alias) existe, por su clave normalizada, actualizo;
+        si no, inserto. Devuelvo los autos que quedan indistinguibles de él.
+        """
+        nombre = " ".join(nombre.split())
+        if not nombre:
+            return []
+        id_auto = self._id_por_nombre(nombre)
+        fila = None if id_auto is None else self.conn.execute("SELECT id, marca FROM autos WHERE id = ?",
+                                                              [id_auto]).fetchone()
+        with self._cerrojo, self.conn:
+            if fila is not None:
+                campos = {k: v for k, v in respuestas.items()
+                          if v not in ("", None) and k in self._columnas}
+                if not fila[1]:
+                    campos["marca"] = nombre.split()[0]
+                if campos:
+                    sets = ", ".join(f"{k} = ?" for k in campos)
+                    self.conn.execute(f"UPDATE autos SET {sets} WHERE id = ?", list(campos.values()) + [fila[0]])
+                    self.generacion += 1
+                return self._gemelos(fila[0])
+            nuevo = {"name": nombre, "marca": nombre.split()[0]}
+            for k in self._columnas:
+                nuevo[k] = respuestas.get(k, "")   # sin contestar: vacío, como en JSON
+            nuevo["clave"] = _normalizar_nombre(nombre)
+            cols = ["name", "marca"] + self._columnas + ["clave"]
+            cur = self.conn.execute(f"INSERT INTO autos ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                                    [nuevo[c] for c in cols])
+        self.generacion += 1
+        return self._gemelos(cur.lastrowid)
+
+    def _gemelos(self, id_auto: int) -> List[Dict[str, Any]]:
+        """Los otros autos con todas las columnas del esquema iguales (IS: NULL = NULL)."""
+        iguales = " AND ".join(f"b.{k} IS a.{k}" for k in self._columnas)
+        return self._consultar(f"SELECT b.* FROM autos a JOIN autos b ON b.id != a.id AND {iguales} "
+                               f"WHERE a.id = ? ORDER BY b.id", [id_auto])
+
+    def grupos_indistinguibles(self) -> List[List[Dict[str, Any]]]:
+        """Igual que en CarDB, con un GROUP BY por todas las columnas del esquema."""
+        cols = ", ".join(self._columnas)
+        grupos = [[int(i) for i in ids.split(",")] for (ids,) in self.conn.execute(
+            f"SELECT group_concat(id) FROM autos GROUP BY {cols} HAVING COUNT(*) > 1")]
+        grupos = [sorted(g) for g in grupos]
+        grupos.sort(key=lambda g: (-len(g), g[0]))
+        return [self._consultar(f"SELECT * FROM autos WHERE id IN ({', '.join('?' for _ in g)}) ORDER BY id", g)
+                for g in grupos]
+
+    def fusionar_duplicados(self, misma_marca: bool = True) -> int:
+        """Igual que en CarDB, en una transacción: me quedo con el id menor de cada grupo."""
+        cols = ", ".join(self._columnas)
+        with self.conn:
+            grupos = self.conn.execute(f"SELECT group_concat(id) FROM autos "
+                                       f"GROUP BY {cols} HAVING COUNT(*) > 1").fetchall()
+            fuera: List[int] = []
+            for (ids,) in grupos:
+                ids = sorted(int(i) for i in ids.split(","))
+                filas = {i: (nombre, marca, json.loads(extra) if extra else {}) for i, nombre, marca, extra in
+                         self.conn.execute(f"SELECT id, name, marca, extra FROM autos "
+                                           f"WHERE id IN ({', '.join('?' for _ in ids)})", ids)}
+                por_marca: Dict[str, List[int]] = {}
+                for i in ids:
+                    por_marca.setdefault(_normalizar_nombre(filas[i][1] or "") if misma_marca else "", []).append(i)
+                for queda, *sobran in por_marca.values():
+                    if not sobran:
+                        continue
+                    extra = filas[queda][2]
+                    alias = list(extra.get("alias", []))
+                    for i in sobran:
+                        alias += [filas[i][0]] + list(filas[i][2].get("alias", []))
+                    extra["alias"] = alias
+                    self.conn.execute("UPDATE autos SET extra = ? WHERE id = ?",
+                                      [json.dumps(extra, ensure_ascii=False), queda])
+                    fuera += sobran
+            for i in range(0, len(fuera), 500):   # límite de parámetros de SQLite
+                trozo = fuera[i:i + 500]
+                self.conn.execute(f"DELETE FROM autos WHERE id IN ({', '.join('?' for _ in trozo)})", trozo)
+        if fuera:
+            self.generacion += 1
+        return len(fuera)
+
+    def _fusionados(self) -> Tuple[Dict[str, int], Dict[int, Tuple[str, List[str]]]]:
+        """
+        Los autos que quedaron de una fusión: alias normalizado -> id, e id -> (nombre, alias).
+        Recorro solo las filas con alias y una vez por generación.
+        """
+        if self._alias is None or self._alias[0] != self.generacion:
+            por_alias: Dict[str, int] = {}
+            quedaron: Dict[int, Tuple[str, List[str]]] = {}
+            for id_auto, nombre, extra in self.conn.execute(
+                    "SELECT id, name, extra FROM autos WHERE extra LIKE '%\"alias\"%' ORDER BY id"):
+                alias = json.loads(extra).get("alias") or []
+                for a in alias:
+                    por_alias.setdefault(_normalizar_nombre(a), id_auto)
+                quedaron[id_auto] = (nombre, alias)
+            self._alias = (self.generacion, (por_alias, quedaron))
+        return self._alias[1]
+
+    def _id_por_nombre(self, nombre: str) -> Optional[int]:
+        """El id del auto con ese nombre (índice único de 'clave') o, si no hay, del que lo tiene como alias."""
+        clave = _normalizar_nombre(nombre)
+        fila = self.conn.execute("SELECT id FROM autos WHERE clave = ?", [clave]).fetchone()
+        if fila is not None:
+            return fila[0]
+        return self._fusionados()[0].get(clave)
+
+    def buscar_por_nombre(self, nombre: str) -> Optional[Dict[str, Any]]:
+        """Por 'clave': da igual mayúsculas, acentos o espacios de más, como en el JSON. Los alias también valen."""
+        id_auto = self._id_por_nombre(nombre)
+        if id_auto is None:
+            return None
+        return self._consultar("SELECT * FROM autos WHERE id = ?", [id_auto])[0]
+
+    def importar_autos(self, autos: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Un solo executemany en UNA transacción (upsert por nombre, ver _insertar).
+        Un nombre que es alias de un auto fusionado actualiza a ese, y los alias se quedan.
+        """
+        total = 0
+        por_alias, quedaron = self._fusionados()
+        por_nombre = {_normalizar_nombre(nombre): i for i, (nombre, _) in quedaron.items()}
+
+        def contados() -> Iterator[Dict[str, Any]]:
+            nonlocal total
+            for car in autos:
+                total += 1
+                clave = _normalizar_nombre(car.get("name", ""))
+                id_auto = por_nombre.get(clave, por_alias.get(clave))
+                if id_auto is not None:
+                    nombre, alias = quedaron[id_auto]
+                    car = dict(car, name=nombre)
+                    car.setdefault("alias", alias)
+                yield car
+
+        antes = self.conn.execute("SELECT COUNT(*) FROM autos").fetchone()[0]
+        self._insertar(contados())
+        self.generacion += 1
+        nuevos = self.conn.execute("SELECT COUNT(*) FROM autos").fetchone()[0] - antes
+        return nuevos, total - nuevos
+
+    def iterar_autos(self) -> Iterator[Dict[str, Any]]:
+        """Recorro el cursor: nunca tengo la tabla entera en memoria."""
+        cur = self.conn.execute("SELECT * FROM autos ORDER BY id")
+        cur.row_factory = sqlite3.Row
+        for fila in cur:
+            yield self._a_auto(fila)
+
+    def nueva_sesion(self, modo: Optional[str] = None) -> "SesionSQLite":
+        return SesionSQLite(self, modo)
+
+
+class SesionSQLite:
+    """
+    Misma interfaz que SesionJuego sobre CarDBSQLite: cada paso es un COUNT y la pila
+    guarda (clave, n_vivos), así deshacer sigue siendo un pop.
+    """
+
+    def __init__(self, db: CarDBSQLite, modo: Optional[str] = None):
+        self.db = db
+        self.modo = modo or MODO_PREGUNTAS
+        self.respuestas: Dict[str, Any] = {}
+        self.n_vivos = db.contar({})
+        self._pila: List[Tuple[str, int]] = []
+
+    def responder(self, key: str, value: Any) -> None:
+        n_vivos = self.n_vivos if value in ("", None) else self.db.contar({**self.respuestas, key: value})
+        self._pila.append((key, self.n_vivos))
+        self.respuestas[key] = value
+        self.n_vivos = n_vivos
+
+    def deshacer(self) -> Optional[str]:
+        if not self._pila:
+            return None
+        key, self.n_vivos = self._pila.pop()
+        self.respuestas.pop(key, None)
+        return key
+
+    def siguiente(self, pendientes: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """En modo "ganancia" son N GROUP BY: la elegida queda en la cache del prefijo."""
+        if self.modo != "ganancia":
+            return pendientes[0] if pendientes else None
+        claves = tuple(a["key"] for a in pendientes)
+        elegida = self.db.cache.obtener(self.respuestas, self.db.generacion, ("siguiente", claves),
+                                        lambda: self._elegir(pendientes))
+        return next((a for a in pendientes if a["key"] == elegida), None)
+
+    def _elegir(self, pendientes: List[Dict[str, Any]]) -> Optional[str]:
+        where, params = self.db._where(self.respuestas)
+        conteos, sin_clave = {}, {}
+        for a in pendientes:
+            k = a["key"]
+            filas = self.db.conn.execute(f"SELECT {k}, COUNT(*) FROM autos{where} GROUP BY {k}", params)
+            conteos[k] = {}
+            sin_clave[k] = 0
+            for v, c in filas:
+                if v is None:
+                    sin_clave[k] = c
+                else:
+                    conteos[k][v] = c
+        elegida = SelectorPreguntas.desde_conteos(self.n_vivos, conteos, sin_clave).elegir(pendientes)
+        return None if elegida is None else elegida["key"]
+
+    def candidatos(self) -> List[Dict[str, Any]]:
+        return self.db.candidatos_exactos(self.respuestas)
+
+    def sincronizar(self) -> None:
+        """Tras aprender: recuento (las respuestas y la pila siguen igual)."""
+        self.n_vivos = self.db.contar(self.respuestas)
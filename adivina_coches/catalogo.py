@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+El formato en disco del catálogo JSON: migraciones de esquema, lectura por
+partes, cabecera, escritura atómica, el journal y el cerrojo entre procesos.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Cerrojo entre procesos sobre el catálogo (ver CerrojoArchivo): fcntl en POSIX,
+# msvcrt en Windows.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from .nucleo import _a_json, _inferir_segmento
+
+
+# ============================ MIGRACIONES DE ESQUEMA ===========================
+# Cada paso migra UN auto y se puede repetir; solo corro los posteriores al
+# "schema_version" del archivo. Para agregar uno: @_migracion(SIGUIENTE_VERSION).
+_MIGRACIONES: List[Tuple[int, Callable[[Dict[str, Any]], None]]] = []
+
+
+def _migracion(version: int):
+    def registrar(paso: Callable[[Dict[str, Any]], None]):
+        _MIGRACIONES.append((version, paso))
+        _MIGRACIONES.sort(key=lambda vp: vp[0])
+        return paso
+    return registrar
+
+
+@_migracion(1)
+def _puertas_como_texto(car: Dict[str, Any]) -> None:
+    if "puertas" in car and isinstance(car["puertas"], int):
+        car["puertas"] = str(car["puertas"])
+
+
+@_migracion(2)
+def _nombre_y_marca(car: Dict[str, Any]) -> None:
+    # name/marca mínimos para no romper UI
+    if "name" not in car:
+        car["name"] = car.get("marca", "Auto")
+    if "marca" not in car or not car["marca"]:
+        nm = car.get("name", "")
+        car["marca"] = nm.split()[0] if nm else "Marca"
+
+
+@_migracion(3)
+def _banderas_y_combustible(car: Dict[str, Any]) -> None:
+    # Banderas y combustible coherentes
+    if "electrico" not in car:
+        car["electrico"] = False
+    if "hibrido" not in car:
+        car["hibrido"] = True if car.get("combustible") == "hibrido" else False
+    if "combustible" not in car or not car["combustible"]:
+        if car.get("electrico"): car["combustible"] = "electrico"
+        elif car.get("hibrido"): car["combustible"] = "hibrido"
+        else: car["combustible"] = "gasolina"
+
+
+@_migracion(4)
+def _valores_por_defecto(car: Dict[str, Any]) -> None:
+    # Otros por defecto sensatos (evitan None/clave faltante)
+    if "origen" not in car or not car["origen"]:
+        car["origen"] = "americana"
+    if "lujo" not in car:
+        car["lujo"] = False
+    if "puertas" not in car or not car["puertas"]:
+        car["puertas"] = "2" if car.get("tipo") in {"coupe","convertible"} else "4"
+    if "traccion" not in car or not car["traccion"]:
+        car["traccion"] = "4x4" if car.get("traccion4x4") else "delantera"
+    if "transmision" not in car or not car["transmision"]:
+        car["transmision"] = "automatica"
+    if "anio" not in car or not car["anio"]:
+        car["anio"] = "2016-2020"
+    if "precio" not in car or not car["precio"]:
+        car["precio"] = "medio"
+
+
+@_migracion(5)
+def _segmento(car: Dict[str, Any]) -> None:
+    # Nuevo campo: segmento (si no viene, lo infiero de tipo/precio)
+    if "segmento" not in car or not car["segmento"]:
+        car["segmento"] = _inferir_segmento(car)
+
+
+SCHEMA_VERSION = _MIGRACIONES[-1][0]
+
+
+def _migrar_auto(car: Dict[str, Any], desde: int = 0) -> Dict[str, Any]:
+    """Corro sobre el auto los pasos con versión > desde."""
+    for version, paso in _MIGRACIONES:
+        if version > desde:
+            paso(car)
+    return car
+
+
+def _recorrer_catalogo(ruta: str, bloque: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    """
+    Leo un coches_db.json SIN cargarlo entero: doy (clave, valor) por campo de arriba
+    y ("car", auto) por cada auto, en orden.
+    """
+    dec = json.JSONDecoder()
+    with open(ruta, "r", encoding="utf-8") as f:
+        buf, pos, fin = "", 0, False
+
+        def rellenar() -> None:
+            nonlocal buf, pos, fin
+            mas = f.read(bloque)
+            fin = not mas
+            buf, pos = buf[pos:] + mas, 0
+
+        def simbolo() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf):
+                    c = buf[pos]
+                    pos += 1
+                    return c
+                if fin:
+                    raise ValueError(f"{ruta}: JSON cortado")
+                rellenar()
+
+        def valor() -> Any:
+            nonlocal pos
+            simbolo()
+            pos -= 1
+            while True:
+                try:
+                    v, fin_valor = dec.raw_decode(buf, pos)
+                    # un número cortado ("12" de "12500.0") decodifica igual: exijo un separador detrás
+                    if fin or (fin_valor < len(buf) and buf[fin_valor] in ",:]} \t\r\n"):
+                        pos = fin_valor
+                        return v
+                except json.JSONDecodeError:
+                    if fin:
+                        raise
+                rellenar()
+
+        if simbolo() != "{":
+            raise ValueError(f"{ruta}: no es un catálogo")
+        c = simbolo()
+        while c != "}":
+            pos -= 1
+            clave = valor()
+            if simbolo() != ":":
+                raise ValueError(f"{ruta}: falta ':'")
+            if clave == "cars":
+                if simbolo() != "[":
+                    raise ValueError(f"{ruta}: 'cars' no es una lista")
+                c = simbolo()
+                if c != "]":
+                    pos -= 1
+                    while c != "]":
+                        yield "car", valor()
+                        c = simbolo()
+                        if c not in ",]":
+                            raise ValueError(f"{ruta}: esperaba ',' o ']'")
+            else:
+                yield clave, valor()
+            c = simbolo()
+            if c == ",":
+                c = simbolo()
+            elif c != "}":
+                raise ValueError(f"{ruta}: esperaba ',' o '}}'")
+
+
+def _cabecera_catalogo(ruta: str) -> Dict[str, Any]:
+    """
+    Los campos de arriba del archivo (schema_version, revision, attributes) sin
+    leer los autos: guardar los escribe antes de "cars".
+    """
+    cabecera: Dict[str, Any] = {}
+    for clave, v in _recorrer_catalogo(ruta):
+        if clave in ("cars", "car"):
+            break
+        cabecera[clave] = v
+    return cabecera
+
+
+def _version_catalogo(ruta: str) -> int:
+    """schema_version del archivo; sin ella es un archivo de antes del versionado: 0."""
+    return int(_cabecera_catalogo(ruta).get("schema_version", 0))
+
+
+def _revision_catalogo(ruta: str) -> int:
+    """Revisión del archivo: sube con cada compactación (ver CarDB.refrescar); 0 si no la trae."""
+    return int(_cabecera_catalogo(ruta).get("revision", 0))
+
+
+def _escribir_catalogo(ruta: str, attributes: List[Dict[str, Any]],
+                       cars: Iterable[Dict[str, Any]], revision: int = 0) -> int:
+    """
+    Escribo el catálogo auto por auto (una línea por auto), con write-then-rename.
+    Sirve para iterables perezosos: nunca junto la lista en memoria. Devuelvo cuántos escribí.
+    """
+    tmp = ruta + ".tmp"
+    n = 0
+    a_texto = json.JSONEncoder(ensure_ascii=False, default=_a_json).encode   # uno para todos los autos
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write('{"schema_version": ' + str(SCHEMA_VERSION) + ', "revision": ' + str(revision)
+                + ', "attributes": ' + json.dumps(attributes, ensure_ascii=False) + ', "cars": [\n')
+        for car in cars:
+            f.write((",\n" if n else "") + a_texto(car))
+            n += 1
+        f.write("\n]}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ruta)
+    return n
+
+
+def _leer_journal(ruta: str, desde: int = 0) -> Tuple[List[Dict[str, Any]], int, Optional[int]]:
+    """
+    Leo las líneas COMPLETAS del journal desde 'desde'. Devuelvo (autos, hasta dónde leí,
+    revisión de la cabecera base si la crucé); una línea cortada queda para la próxima.
+    """
+    entradas, leido, base = _leer_entradas(ruta, desde)
+    return [e["car"] for e in entradas], leido, base
+
+
+def _leer_entradas(ruta: str, desde: int = 0) -> Tuple[List[Dict[str, Any]], int, Optional[int]]:
+    """Como _leer_journal, pero con la línea {"op": "upsert", ...} entera (el particionado anota su "orden")."""
+    with open(ruta, "rb") as f:
+        f.seek(desde)
+        datos = f.read()
+    fin = datos.rfind(b"\n") + 1
+    entradas, base = [], None
+    for linea in datos[:fin].splitlines():
+        try:
+            entrada = json.loads(linea)
+        except ValueError:
+            continue   # línea cortada por un corte de luz: la salto, lo demás sí vale
+        if not isinstance(entrada, dict):
+            continue
+        if entrada.get("op") == "base":
+            base = entrada.get("revision")
+        elif entrada.get("op") == "upsert" and entrada.get("car"):
+            # Líneas de antes del versionado (sin "v"): todos los pasos. Las de
+            # ahora ya están al día: migrarlas rellenaría lo que quedó vacío a propósito
+            entrada["car"] = _migrar_auto(entrada["car"], int(entrada.get("v", 0)))
+            entradas.append(entrada)
+    return entradas, desde + fin, base
+
+
+def _base_journal(ruta: str) -> Optional[int]:
+    """Revisión de la cabecera {"op": "base"} del journal (primera línea), o None."""
+    try:
+        with open(ruta, "rb") as f:
+            entrada = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    if isinstance(entrada, dict) and entrada.get("op") == "base":
+        return entrada.get("revision")
+    return None
+
+
+def _stat_archivo(ruta: str) -> Optional[Tuple[int, int, int]]:
+    """(inodo, tamaño, mtime) o None si no existe: para ver barato si alguien lo cambió."""
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+# ============================ VARIOS PROCESOS: LAS REGLAS ======================
+# Varios procesos sobre el mismo coches_db.json: solo escribo con CerrojoArchivo tomado
+# y poniéndome al día antes. El JSON trae "revision" (sube al compactar) y el journal
+# empieza con {"op": "base", "revision": R}; _leido siempre cae al final de una línea.
+# Compactar: journal -> .compactando, JSON nuevo (rename), .compactando -> .anterior.
+
+
+# ============================ CERROJO ENTRE PROCESOS ===========================
+class CerrojoArchivo:
+    """
+    Cerrojo entre PROCESOS sobre <catálogo>.lock (flock / msvcrt). Los hilos del mismo
+    proceso pasan directo (se turnan con CarDB._cerrojo). Uno por archivo: CerrojoArchivo.de(ruta).
+    """
+
+    _por_ruta: Dict[str, "CerrojoArchivo"] = {}
+    _registro = threading.Lock()
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._mutex = threading.Lock()
+        self._duenos = 0              # cuántos hilos del proceso están adentro
+        self._f = None                # el .lock se abre recién al usarlo
+        self.esperas = 0              # veces que otro proceso lo tenía y esperé
+
+    @classmethod
+    def de(cls, ruta_catalogo: str) -> "CerrojoArchivo":
+        ruta = os.path.abspath(ruta_catalogo) + ".lock"
+        with cls._registro:
+            if ruta not in cls._por_ruta:
+                cls._por_ruta[ruta] = cls(ruta)
+            return cls._por_ruta[ruta]
+
+    @classmethod
+    def _olvidar(cls) -> None:
+        """
+        En el hijo de un fork(): heredó los .lock abiertos (la MISMA descripción que el
+        padre, y flock no separaría a uno del otro) y los contadores. Arranco de cero.
+        """
+        cls._por_ruta = {}
+        cls._registro = threading.Lock()
+
+    def __enter__(self) -> "CerrojoArchivo":
+        with self._mutex:
+            if self._duenos == 0:
+                if self._f is None:
+                    self._f = open(self.ruta, "a+b")
+                self._bloquear()
+            self._duenos += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        with self._mutex:
+            self._duenos -= 1
+            if self._duenos == 0:
+                self._desbloquear()
+
+    def _bloquear(self) -> None:
+        fd = self._f.fileno()
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.esperas += 1
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            return
+        self._f.seek(0)
+        esperé = False
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if not esperé:
+                    self.esperas += 1
+                    esperé = True
+                time.sleep(0.05)
+
+    def _desbloquear(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+        else:
+            self._f.seek(0)
+            msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=CerrojoArchivo._olvidar)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""La línea de comandos: _argumentos y main (ver el docstring del paquete)."""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import List, Optional
+
+from .backends import CarDBSQLite, abrir_db, compilar_binario
+from .consola import jugar_cli
+from .intercambio import exportar, importar
+from .metricas import activar_metricas, medir_clases, resumen_metricas
+from .nucleo import (ARBOL_MAX_NODOS, BACKEND, DB_PATH, IMPORTAR_BLOQUE, MODO_PREGUNTAS, MODO_PUNTAJE,
+                     PARTICION_POR, SQLITE_PATH, _CLAVES_ESQUEMA)
+from .servidor import ServidorJuego
+from .simulacion import benchmark, escribir_catalogo_sintetico, evaluar_paralelo, simular
+
+
+# ============================ PUNTO DE ENTRADA =================================
+def _argumentos() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="Adivina coches.py", description="Adivina Quién de Carros")
+    parser.add_argument("--backend", choices=["json", "sqlite", "binario", "particionado"],
+                        help=f"dónde viven los autos (por defecto: {BACKEND})")
+    parser.add_argument("--particion-por", choices=_CLAVES_ESQUEMA,
+                        help=f"con --backend particionado: clave de las partes (por defecto: {PARTICION_POR}); "
+                             "si cambia, reparto el catálogo de nuevo")
+    parser.add_argument("--modo", choices=["fijo", "ganancia"],
+                        help=f"orden de preguntas (por defecto: {MODO_PREGUNTAS})")
+    parser.add_argument("--puntaje", choices=["exacto", "difuso"],
+                        help=f"cómo puntúo la mejor coincidencia (por defecto: {MODO_PUNTAJE})")
+    parser.add_argument("--metricas", metavar="RUTA",
+                        help="mide los métodos calientes y al salir vuelca a RUTA (.json o .prom); "
+                             "también con la variable ADIVINA_METRICAS")
+    sub = parser.add_subparsers(dest="comando")
+    sub.add_parser("gui", help="abre la ventana (lo que pasa si no pongo comando)")
+    sub.add_parser("jugar", help="juega en la terminal, sin ventana")
+    ev = sub.add_parser("evaluar", help="juega solo contra cada auto del catálogo")
+    ev.add_argument("--limite", type=int, help="solo una muestra de N autos")
+    ev.add_argument("--ruido", type=float, default=0.0, help="probabilidad de contestar mal")
+    ev.add_argument("--saltos", type=float, default=0.0, help="probabilidad de saltar una pregunta")
+    ev.add_argument("--semilla", type=int, default=0)
+    ev.add_argument("--procesos", type=int, default=1,
+                    help="reparte la evaluación en N procesos (usa el catálogo binario)")
+    be = sub.add_parser("bench", help="simula sobre catálogos sintéticos de varios tamaños")
+    be.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000])
+    be.add_argument("--juegos", type=int, default=200, help="juegos por tamaño")
+    be.add_argument("--ruido", type=float, default=0.0)
+    be.add_argument("--saltos", type=float, default=0.0)
+    be.add_argument("--semilla", type=int, default=0)
+    be.add_argument("--procesos", type=int, default=1)
+    ge = sub.add_parser("generar", help="escribe un catálogo sintético en JSON")
+    ge.add_argument("n", type=int)
+    ge.add_argument("--salida", default="coches_sinteticos.json")
+    ge.add_argument("--semilla", type=int, default=0)
+    sv = sub.add_parser("servidor", help="sirve partidas en JSON lines (TCP local o socket Unix)")
+    sv.add_argument("--host", default="127.0.0.1")
+    sv.add_argument("--puerto", type=int, default=8765)
+    sv.add_argument("--unix", help="ruta de socket Unix (en vez de TCP)")
+    sub.add_parser("compactar", help="reescribe el JSON y vacía el journal")
+    ar = sub.add_parser("arbol", help="recompila el árbol de decisión del modo ganancia")
+    ar.add_argument("--nodos", type=int, default=ARBOL_MAX_NODOS)
+    du = sub.add_parser("duplicados", help="lista los grupos de autos que ninguna pregunta separa")
+    du.add_argument("--fusionar", action="store_true",
+                    help="deja uno por grupo (y marca) con los demás como alias; reescribe el catálogo")
+    du.add_argument("--entre-marcas", action="store_true", help="al fusionar, no exigir la misma marca")
+    im = sub.add_parser("importar", help="carga autos en bloque desde CSV o JSON lines (upsert por nombre)")
+    im.add_argument("archivo")
+    im.add_argument("--formato", choices=["csv", "jsonl"], help="por defecto, según la extensión")
+    im.add_argument("--rechazos", help="dónde escribo las filas inválidas (def.: <archivo>.rechazos.jsonl)")
+    im.add_argument("--bloque", type=int, default=IMPORTAR_BLOQUE, help="filas por tanda")
+    ex = sub.add_parser("exportar", help="escribe el catálogo en CSV o JSON lines")
+    ex.add_argument("archivo")
+    ex.add_argument("--formato", choices=["csv", "jsonl"], help="por defecto, según la extensión")
+    me = sub.add_parser("metricas", help="muestra el resumen de un volcado de métricas (.json)")
+    me.add_argument("archivo")
+    sub.add_parser("migrar-sqlite", help="copia el JSON a la base SQLite")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = _argumentos().parse_args(argv)
+    if args.comando == "metricas":
+        with open(args.archivo, "r", encoding="utf-8") as f:
+            print(resumen_metricas(json.load(f)))
+        return
+    ruta_metricas = args.metricas or os.environ.get("ADIVINA_METRICAS")
+    if ruta_metricas:
+        activar_metricas("metricas.json" if ruta_metricas == "1" else ruta_metricas)
+
+    if args.comando == "bench":
+        reportes = benchmark(args.tamanos, args.juegos, args.modo, args.ruido, args.saltos,
+                             args.semilla, args.procesos, args.puntaje)
+        print(json.dumps(reportes, ensure_ascii=False, indent=2))
+        return
+    if args.comando == "generar":
+        escribir_catalogo_sintetico(args.salida, args.n, args.semilla)
+        print(f"{args.n} autos sintéticos en {args.salida}")
+        return
+
+    if args.comando == "migrar-sqlite":
+        sq = CarDBSQLite(SQLITE_PATH, DB_PATH)
+        sq.cargar()
+        n = sq.migrar_desde_json(DB_PATH)
+        sq.cerrar()
+        print(f"{n} autos migrados a {SQLITE_PATH}")
+        return
+
+    db = abrir_db(args.backend, args.particion_por)
+    db.cargar()
+    if args.puntaje:
+        db.puntaje = args.puntaje
+    try:
+        if args.comando == "jugar":
+            jugar_cli(db, args.modo)
+        elif args.comando == "evaluar" and args.procesos > 1:
+            # Los hijos mapean un .bin del catálogo que abrí: el del backend (si tiene)
+            # o uno temporal compilado desde db
+            with tempfile.TemporaryDirectory() as tmp:
+                ruta_bin = db.ruta_binaria()
+                if ruta_bin is None:
+                    ruta_bin = os.path.join(tmp, "evaluar.bin")
+                    compilar_binario(list(db.iterar_autos()), db.attributes, ruta_bin)
+                reporte = evaluar_paralelo(ruta_bin, args.procesos, args.modo, args.ruido, args.saltos,
+                                           args.limite, args.semilla, args.puntaje)
+            print(json.dumps(reporte, ensure_ascii=False, indent=2))
+        elif args.comando == "evaluar":
+            reporte = simular(db, args.modo, args.ruido, args.saltos, args.limite, args.semilla)
+            print(json.dumps(reporte, ensure_ascii=False, indent=2))
+        elif args.comando == "servidor":
+            try:
+                asyncio.run(ServidorJuego(db, args.modo).correr(args.host, args.puerto, args.unix))
+            except KeyboardInterrupt:
+                pass
+        elif args.comando == "compactar":
+            db.compactar()
+        elif args.comando == "importar":
+            reporte = importar(db, args.archivo, args.formato, args.rechazos, args.bloque)
+            print(json.dumps(reporte, ensure_ascii=False, indent=2))
+        elif args.comando == "exportar":
+            n = exportar(db, args.archivo, args.formato)
+            print(f"{n} autos exportados a {args.archivo}")
+        elif args.comando == "duplicados":
+            if args.fusionar:
+                quitados = db.fusionar_duplicados(misma_marca=not args.entre_marcas)
+                print(f"{quitados} autos fusionados; quedan {len(db)}")
+            grupos = db.grupos_indistinguibles()
+            for grupo in grupos:
+                print(f"{len(grupo)}: " + " | ".join(c.get("name", "—") for c in grupo))
+            print(f"{len(grupos)} grupos indistinguibles "
+                  f"({sum(len(g) for g in grupos)} autos)")
+        elif args.comando == "arbol":
+            if not db.usa_arbol():
+                print("Este backend no usa árbol de decisión")
+            else:
+                t0 = time.perf_counter()
+                db.compilar_arbol(args.nodos)
+                print(f"Árbol compilado en {time.perf_counter() - t0:.2f}s -> {db.ruta_arbol}")
+        else:
+            from .ui_tk import App   # tkinter recién aquí: lo demás corre sin pantalla
+            medir_clases(App)
+            app = App(db, args.modo)
+            app.mainloop()
+    finally:
+        db.cerrar()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Jugar en la terminal (comando "jugar"), sin ventana."""
+
+from typing import Any, Dict, Optional, Tuple
+
+from .db import CarDB
+from .motor import MotorJuego, _aviso_gemelos
+
+
+# ============================ MODO CONSOLA (SIN VENTANA) =======================
+def _leer_respuesta(attr: Dict[str, Any], texto: str) -> Tuple[str, Any]:
+    """
+    Interpreto lo que escribió el jugador en la terminal:
+    "" = saltar, "<" = atrás, "?" = adivinar ya; si no, la respuesta.
+    Devuelvo (accion, valor) con accion en {"responder", "saltar", "atras", "adivinar", "invalido"}.
+    """
+    texto = texto.strip()
+    if texto == "":
+        return "saltar", ""
+    if texto == "<":
+        return "atras", None
+    if texto == "?":
+        return "adivinar", None
+    if attr.get("tipo") == "bool":
+        t = texto.lower()
+        if t in ("s", "si", "sí", "y"):
+            return "responder", True
+        if t in ("n", "no"):
+            return "responder", False
+        return "invalido", None
+    opciones = attr.get("opciones", [])
+    if texto.isdigit() and 1 <= int(texto) <= len(opciones):
+        return "responder", opciones[int(texto) - 1]
+    if texto in opciones:
+        return "responder", texto
+    return "invalido", None
+
+
+def jugar_cli(db: CarDB, modo: Optional[str] = None) -> None:
+    """Una partida en la terminal, con el mismo motor que la ventana."""
+    motor = MotorJuego(db, modo)
+    print("Adivina Quién — Carros (Enter = saltar, < = atrás, ? = adivinar ya)")
+    while True:
+        attr = motor.pregunta_actual()
+        if attr is None:
+            break
+        paso, total = motor.progreso()
+        print(f"\n[Paso {paso}/{total} · {motor.n_vivos} autos posibles] {attr['pregunta']}")
+        if attr.get("tipo") == "bool":
+            print("  s = Sí, n = No")
+        else:
+            for i, op in enumerate(attr.get("opciones", []), 1):
+                print(f"  {i}) {op}")
+        accion, valor = _leer_respuesta(attr, input("> "))
+        if accion == "responder":
+            motor.responder(attr["key"], valor)
+        elif accion == "saltar":
+            motor.saltar()
+        elif accion == "atras":
+            motor.atras()
+        elif accion == "adivinar":
+            break
+        else:
+            print("No entendí, otra vez.")
+
+    print("\n" + motor.resumen())
+    tipo, opciones = motor.adivinar()
+    if tipo == "varios":
+        print(f"\nHay {len(opciones)} coincidencias exactas: "
+              + ", ".join(c.get("name", "—") for c, _ in opciones[:10]))
+    for car, _ in (opciones if tipo in ("exacto", "aproximado") else []):
+        if input(f"\n¿Es {car.get('name', '—')}? (s/n) ").strip().lower() in ("s", "si", "sí", "y"):
+            print("🎯 ¡Adiviné!")
+            return
+    nombre = input("\nNo acerté 😅 ¿Cuál era? (Enter para no guardar) ").strip()
+    if nombre:
+        gemelos = motor.aprender(nombre)
+        print(f"¡Guardado! Aprendí: {nombre}")
+        if gemelos:
+            print(_aviso_gemelos(nombre, gemelos))
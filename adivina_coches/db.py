@@ -0,0 +1,1316 @@
+# -*- coding: utf-8 -*-
+"""
+CarDB: el catálogo en memoria (backend "json": archivo + journal) con sus
+índices, el puntaje de mejor_coincidencia, la cache de respuestas y el
+EscritorFondo que guarda lo aprendido en otro hilo.
+"""
+
+import concurrent.futures
+import heapq
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .catalogo import (CerrojoArchivo, SCHEMA_VERSION, _base_journal, _cabecera_catalogo, _escribir_catalogo,
+                       _leer_journal, _migrar_auto, _recorrer_catalogo, _revision_catalogo, _stat_archivo,
+                       _version_catalogo)
+from .juego import ArbolPreguntas, SesionArbol, SesionJuego
+from .nucleo import (ARBOL_MAX_NODOS, Auto, CACHE_RESPUESTAS, CERCANIA_ORDINAL, DB_PATH, INDICE_PASADAS_MAX,
+                     JOURNAL_COMPACTAR_CADA, JOURNAL_FSYNC_CADA, MODO_PREGUNTAS, MODO_PUNTAJE, ORDINALES,
+                     PESOS_PUNTAJE, PESO_PUNTAJE, REDUNDANTES, _FALTA, _a_json, _bitset, _bitset_iguales, _columna,
+                     _normalizar_nombre, _posiciones, _valores, np)
+
+
+# ============================ CACHE DE RESPUESTAS ==============================
+class CacheRespuestas:
+    """
+    LRU de lo que sale de unas respuestas (ids, n, top-k, siguiente pregunta), por prefijo.
+    La clave ignora el orden y lo saltado; si cambia la generación del catálogo, vacío todo.
+    """
+
+    def __init__(self, capacidad: int = CACHE_RESPUESTAS):
+        self.capacidad = capacidad
+        self.generacion = 0
+        self._datos: "OrderedDict[frozenset, Dict[Any, Any]]" = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.por_campo: Dict[str, List[int]] = {}    # campo -> [aciertos, fallos]
+
+    @staticmethod
+    def clave(respuestas: Dict[str, Any]) -> Optional[frozenset]:
+        """frozenset de respuestas no vacías, o None si algún valor no se puede hashear."""
+        try:
+            clave = frozenset((k, v) for k, v in respuestas.items() if v not in ("", None))
+            hash(clave)
+        except TypeError:
+            return None
+        return clave
+
+    def obtener(self, respuestas: Dict[str, Any], generacion: int, campo: Tuple[Any, ...],
+                calcular: Callable[[], Any]) -> Any:
+        """Devuelvo el 'campo' de este prefijo; si no lo tengo, lo calculo y lo guardo."""
+        clave = self.clave(respuestas) if self.capacidad > 0 else None
+        if clave is None:
+            return calcular()
+        with self._cerrojo:
+            if generacion != self.generacion:       # el catálogo cambió: todo viejo
+                if self._datos:
+                    self.invalidaciones += 1
+                self._datos.clear()
+                self.generacion = generacion
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                self._datos.move_to_end(clave)
+                if campo in entrada:
+                    self._contar(campo[0], 0)
+                    return entrada[campo]
+            self._contar(campo[0], 1)
+        valor = calcular()                          # fuera del cerrojo (puede tardar)
+        with self._cerrojo:
+            if generacion != self.generacion:       # aprendieron mientras calculaba
+                return valor
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                entrada = self._datos[clave] = {}
+                while len(self._datos) > self.capacidad:
+                    self._datos.popitem(last=False)
+            entrada[campo] = valor
+        return valor
+
+    def _contar(self, campo: str, i: int) -> None:
+        if i:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        self.por_campo.setdefault(campo, [0, 0])[i] += 1
+
+    def vaciar(self) -> None:
+        with self._cerrojo:
+            self._datos.clear()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Números para dimensionar 'capacidad': tamaño, aciertos/fallos y tasa (total y por campo)."""
+        with self._cerrojo:
+            pedidos = self.aciertos + self.fallos
+            return {
+                "capacidad": self.capacidad,
+                "entradas": len(self._datos),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / pedidos, 4) if pedidos else 0.0,
+                "invalidaciones": self.invalidaciones,
+                "por_campo": {c: {"aciertos": a, "fallos": f} for c, (a, f) in sorted(self.por_campo.items())},
+            }
+
+
+# ============================ CAPA DE DATOS ====================================
+def _escala_ordinal(attr: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Opciones de una pregunta ORDINAL en su orden (vacío si no es ordinal)."""
+    if attr["key"] not in ORDINALES:
+        return ()
+    return tuple(ORDINALES[attr["key"]] or attr.get("opciones", ()))
+
+
+def _k_mejores(ids: Any, scores: Any, k: int) -> List[Tuple[int, int]]:
+    """Top-k de (ids, puntajes) con NumPy, de mayor a menor; en empate gana el id menor."""
+    m = len(ids)
+    k = min(k, m)
+    if k <= 0:
+        return []
+    umbral = np.partition(scores, m - k)[m - k]
+    arriba = np.flatnonzero(scores > umbral)
+    empates = np.flatnonzero(scores == umbral)[:k - len(arriba)]
+    elegidos = np.concatenate([arriba, empates])
+    orden = elegidos[np.lexsort((elegidos, -scores[elegidos]))]
+    return [(int(ids[i]), int(scores[i])) for i in orden]
+
+
+class CarDB:
+    """
+    Clase de base de datos MUY simple (archivo JSON).
+    - attributes: lista de preguntas con sus opciones (o tipo bool).
+    - cars: lista de autos conocidos, cada uno con sus campos.
+    """
+
+    def __init__(self, ruta: str = DB_PATH):
+        self.ruta = ruta
+        self.ruta_journal = os.path.splitext(ruta)[0] + ".journal.jsonl"
+        # Al compactar, el journal actual pasa a este nombre hasta que el JSON nuevo quede escrito
+        self.ruta_journal_viejo = os.path.splitext(ruta)[0] + ".journal.compactando.jsonl"
+        # Y al terminar queda con este (hasta la próxima), para otro proceso que lo venía leyendo
+        self.ruta_journal_anterior = os.path.splitext(ruta)[0] + ".journal.anterior.jsonl"
+        self._journal = None          # archivo abierto en modo append (perezoso)
+        self._sin_fsync = 0           # líneas escritas desde el último fsync
+        self._entradas_journal = 0    # líneas en el journal desde la última compactación
+        self.attributes: List[Dict[str, Any]] = []
+        self.cars: List[Dict[str, Any]] = []
+
+        # aprender() (hilo de la UI) y el EscritorFondo se turnan con este cerrojo
+        self._cerrojo = threading.RLock()
+        self._escritor: Optional["EscritorFondo"] = None
+
+        # Varios procesos se turnan con el cerrojo del archivo (ver catalogo.py); siempre
+        # _bloqueo ANTES que _cerrojo. Con os.devnull es todo en memoria: no escribo nada.
+        self._en_memoria = ruta == os.devnull
+        self._bloqueo = threading.RLock() if self._en_memoria else CerrojoArchivo.de(ruta)
+        self._revision = 0            # "revision" del JSON que tengo en memoria
+        self._leido = 0               # hasta qué byte del journal tengo aplicado
+        self._visto: Optional[Tuple[int, int, int]] = None   # stat del JSON que leí
+        self._sin_journal = False     # cambié autos sin pasar por el journal (importar, fusionar)
+
+        # Árbol de decisión precompilado (modo "ganancia"); None = todavía sin armar (ver nueva_sesion)
+        self.ruta_arbol = os.path.splitext(ruta)[0] + ".arbol.json"
+        self.arbol: Optional["ArbolPreguntas"] = None
+
+        # Sube con cada cambio del catálogo (la cache descarta lo viejo)
+        self.generacion = 0
+        self.cache = CacheRespuestas()
+        self.puntaje = MODO_PUNTAJE
+        self._tablas_puntos: Dict[Tuple[str, Any], List[int]] = {}
+
+        # Índice invertido: (clave, valor) -> bitset de posiciones; _con_clave: quién SÍ trae el campo.
+        # Solo las claves del esquema (name/marca se resuelven recorriendo).
+        self._indice: Dict[Tuple[str, Any], int] = {}
+        self._con_clave: Dict[str, int] = {}
+        self._claves_indice: set = set()
+        self._todos = 0
+
+        # Nombre normalizado -> posición (None = todavía no armado)
+        self._por_nombre: Optional[Dict[str, int]] = None
+        # hash(vector de códigos) -> posición (o lista, si se repite): para los gemelos
+        self._por_vector: Optional[Dict[int, Any]] = None
+
+        # Matriz codificada: fila por coche, columna por clave (0 = no trae el campo)
+        self._columnas: List[str] = []
+        self._codigos: Dict[str, Dict[Any, int]] = {}
+        self._mat: Any = []
+        # Con NumPy, _mat es una vista de este buffer con filas libres al final
+        self._mat_buffer: Any = None
+
+    # Esquema oficial (SIN "marca" como pregunta, CON "segmento")
+    def _schema_attributes(self) -> List[Dict[str, Any]]:
+        return [
+            {"key": "tipo",        "pregunta": "Tipo de carrocería", "opciones": [
+                "sedan","hatchback","suv","pickup","coupe","convertible","crossover","van"
+            ]},
+            {"key": "electrico",   "pregunta": "¿Es eléctrico?", "tipo": "bool"},
+            {"key": "hibrido",     "pregunta": "¿Es híbrido?", "tipo": "bool"},
+            {"key": "combustible", "pregunta": "Combustible", "opciones": [
+                "gasolina","diesel","electrico","hibrido"
+            ]},
+            {"key": "origen",      "pregunta": "Origen de la marca", "opciones": [
+                "japonesa","americana","europea","china","coreana"
+            ]},
+            {"key": "lujo",        "pregunta": "¿Es de lujo/premium?", "tipo": "bool"},
+            {"key": "puertas",     "pregunta": "Número de puertas", "opciones": ["2","3","4","5"]},
+            {"key": "traccion",    "pregunta": "Tracción", "opciones": ["delantera","trasera","AWD","4x4"]},
+            {"key": "transmision", "pregunta": "Transmisión", "opciones": ["manual","automatica","cvt","dct"]},
+            {"key": "anio",        "pregunta": "Año (rango)", "opciones": ["≤2010","2011-2015","2016-2020","2021+"]},
+            {"key": "precio",      "pregunta": "Rango de precio", "opciones": ["economico","medio","premium","lujo"]},
+            {"key": "segmento",    "pregunta": "Segmento", "opciones": [
+                "subcompacto","compacto","mediano","grande","SUV/Crossover","Pickup","Deportivo"
+            ]},
+        ]
+
+    def cargar(self) -> None:
+        """
+        Carga el JSON. Si no existe, genero una semilla (varios autos).
+        Si su esquema es viejo lo migro en disco una vez, y encima repito el journal.
+        """
+        with self._bloqueo:
+            if not os.path.exists(self.ruta):
+                self._semilla()
+                self.guardar()
+                self._visto = _stat_archivo(self.ruta)
+                self._reindexar()
+            else:
+                # Al día = cero trabajo por auto; si no, migro en flujo y recién después cargo
+                if _version_catalogo(self.ruta) < SCHEMA_VERSION:
+                    self.migrar_archivo()
+                self._leer_catalogo()
+                # Una compactación quedó a medias (o el journal ya es largo): la termino ahora
+                if self._entradas_journal >= JOURNAL_COMPACTAR_CADA or os.path.exists(self.ruta_journal_viejo):
+                    self.compactar()
+        self.arbol = None   # el árbol del modo "ganancia" se arma con la primera partida que lo use
+
+    def _leer_catalogo(self) -> None:
+        """JSON + journal desde cero (con el cerrojo del archivo tomado)."""
+        self._cerrar_journal()
+        self._visto = _stat_archivo(self.ruta)
+        # Cargo coches existentes (de a uno, a Auto) y fuerzo esquema actual de preguntas
+        self.cars = []
+        self._revision = 0
+        for clave, v in _recorrer_catalogo(self.ruta):
+            if clave == "car":
+                self.cars.append(Auto.de(v))
+            elif clave == "revision":
+                self._revision = int(v)
+        self.attributes = self._schema_attributes()
+        self._repetir_journal()
+        self._reindexar()
+
+    def guardar(self, cars: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Persisto en JSON, un auto por línea ('cars' = una foto ya tomada)."""
+        if self._en_memoria:
+            return
+        _escribir_catalogo(self.ruta, self.attributes, self.cars if cars is None else cars,
+                           self._revision)
+
+    # --- Journal (append-only, JSON lines) ---
+    def _repetir_journal(self) -> None:
+        """
+        Aplico sobre self.cars cada auto del journal (upsert por nombre, sin mayúsculas).
+        Si quedó uno de una compactación cortada, va primero (es más viejo).
+        """
+        self._entradas_journal = 0
+        self._leido = 0
+        rutas = [r for r in (self.ruta_journal_viejo, self.ruta_journal) if os.path.exists(r)]
+        if not rutas:
+            return
+        pos_por_nombre: Dict[str, int] = {}
+        for i, c in enumerate(self.cars):
+            pos_por_nombre.setdefault(_normalizar_nombre(c.get("name", "")), i)
+        for ruta in rutas:
+            autos, leido, _ = _leer_journal(ruta)
+            if ruta == self.ruta_journal:
+                self._leido = leido
+            self._entradas_journal += len(autos)
+            for car in autos:
+                car = Auto.de(car)
+                clave = _normalizar_nombre(car.get("name", ""))
+                if clave in pos_por_nombre:
+                    self.cars[pos_por_nombre[clave]] = car
+                else:
+                    pos_por_nombre[clave] = len(self.cars)
+                    self.cars.append(car)
+
+    def _registrar(self, car: Dict[str, Any]) -> None:
+        """Agrego el auto al final del journal (fsync por lotes); un journal nuevo empieza con su 'base'."""
+        if self._en_memoria:
+            return
+        if self._journal is None:
+            self._journal = open(self.ruta_journal, "ab")
+            if self._journal.tell() > 0:
+                self._journal.write(b"\n")   # por si la última línea quedó cortada
+            else:
+                self._journal.write(json.dumps({"op": "base", "revision": self._revision}).encode() + b"\n")
+        self._journal.write(json.dumps({"op": "upsert", "v": SCHEMA_VERSION, "car": car}, ensure_ascii=False,
+                                       default=_a_json).encode("utf-8") + b"\n")
+        self._journal.flush()
+        self._leido = self._journal.tell()
+        self._sin_fsync += 1
+        self._entradas_journal += 1
+        if self._escritor is not None:
+            self._escritor.pedir()   # el fsync y la compactación los hace el hilo de fondo
+            return
+        if self._sin_fsync >= JOURNAL_FSYNC_CADA:
+            self.sincronizar_journal()
+        if self._entradas_journal >= JOURNAL_COMPACTAR_CADA:
+            self.compactar()
+
+    def sincronizar_journal(self) -> None:
+        """Fuerzo a disco lo que haya escrito en el journal."""
+        if self._journal is not None and self._sin_fsync:
+            os.fsync(self._journal.fileno())
+        self._sin_fsync = 0
+
+    def _cerrar_journal(self) -> None:
+        if self._journal is not None:
+            self.sincronizar_journal()
+            self._journal.close()
+            self._journal = None
+
+    def compactar(self) -> None:
+        """
+        JSON nuevo con todo (revisión + 1) y journal vacío. Con el cerrojo solo saco la foto;
+        el JSON lo escribo fuera, así aprender() no espera.
+        """
+        if self._en_memoria:
+            return
+        with self._bloqueo:
+            with self._cerrojo:
+                self._refrescar()   # lo que escribió otro proceso también va al JSON nuevo
+                foto = self._apartar_journal()
+                completo = not self._sin_journal
+                self._sin_journal = False
+            self.guardar(foto)
+            if os.path.exists(self.ruta_journal_viejo):
+                if completo:
+                    os.replace(self.ruta_journal_viejo, self.ruta_journal_anterior)
+                else:   # hubo cambios fuera del journal: no sirve para ponerse al día
+                    os.remove(self.ruta_journal_viejo)
+            elif not completo and os.path.exists(self.ruta_journal_anterior):
+                os.remove(self.ruta_journal_anterior)
+            with self._cerrojo:
+                self._visto = _stat_archivo(self.ruta)
+
+    def _apartar_journal(self) -> List[Dict[str, Any]]:
+        """Cierro el journal, lo renombro a ruta_journal_viejo y devuelvo la foto de los autos."""
+        self._cerrar_journal()
+        if os.path.exists(self.ruta_journal):
+            if os.path.exists(self.ruta_journal_viejo):
+                # sobra de una compactación cortada: junto ambos (el viejo va primero)
+                with open(self.ruta_journal_viejo, "a", encoding="utf-8") as dst, \
+                        open(self.ruta_journal, "r", encoding="utf-8") as src:
+                    dst.write("\n")
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.ruta_journal)
+            else:
+                os.replace(self.ruta_journal, self.ruta_journal_viejo)
+        self._sin_fsync = 0
+        self._entradas_journal = 0
+        self._revision += 1   # lo que aprenda desde ahora va encima del JSON nuevo
+        self._leido = 0
+        return list(self.cars)   # los Auto no se cambian en sitio (ver _cambiar): basta copiar la lista
+
+    # --- Varios procesos sobre el mismo catálogo ---
+    def _hay_cambios(self) -> bool:
+        """Barato (dos stat): ¿otro proceso compactó o escribió en el journal desde que miré?"""
+        if self._visto is None:
+            return False   # nunca leí un catálogo de disco (en memoria, o todavía sin cargar)
+        if _stat_archivo(self.ruta) != self._visto:
+            return True
+        st = _stat_archivo(self.ruta_journal)
+        return (st[1] if st else 0) != self._leido
+
+    def refrescar(self) -> int:
+        """Me pongo al día con lo que escribieron otros procesos; devuelvo cuántos autos cambiaron."""
+        if not self._hay_cambios():
+            return 0
+        with self._bloqueo, self._cerrojo:
+            return self._refrescar()
+
+    def _refrescar(self) -> int:
+        """refrescar() con ambos cerrojos ya tomados."""
+        if not self._hay_cambios():
+            return 0
+        visto = _stat_archivo(self.ruta)
+        revision = self._revision if visto == self._visto else _revision_catalogo(self.ruta)
+        st = _stat_archivo(self.ruta_journal)
+        tamano = st[1] if st else 0
+        if revision != self._revision:
+            self._cerrar_journal()   # apunta al journal que ya renombraron
+        if revision == self._revision and tamano >= self._leido:
+            autos, self._leido, _ = _leer_journal(self.ruta_journal, self._leido) if st else ([], 0, None)
+            self._entradas_journal += len(autos)
+        elif (revision == self._revision + 1
+              and _base_journal(self.ruta_journal_anterior) == self._revision):
+            autos, _, _ = _leer_journal(self.ruta_journal_anterior, self._leido)
+            nuevos, self._leido, _ = _leer_journal(self.ruta_journal) if st else ([], 0, None)
+            autos += nuevos
+            self._entradas_journal = len(nuevos)
+            self._revision = revision
+        else:
+            self._recargar()
+            return max(len(self.cars), 1)
+        self._visto = visto
+        for car in autos:
+            self._aplicar(car)
+        return len(autos)
+
+    def _recargar(self) -> None:
+        """Todo desde cero: JSON + journal, índices y árbol (si ya lo tenía)."""
+        self._leer_catalogo()
+        self._rehacer_arbol()
+
+    def _aplicar(self, car: Dict[str, Any]) -> None:
+        """Upsert de un auto que escribió otro proceso (ya completo: reemplaza al mío)."""
+        clave = _normalizar_nombre(car.get("name", ""))
+        pos = self._indice_nombres().get(clave)
+        if pos is None:
+            self._agregar(car, clave)
+        else:
+            self._cambiar(pos, car, reemplazar=True)
+
+    def _al_dia(self) -> None:
+        """Marco como leído lo que hay en disco (tras compilar/abrir el .bin con el cerrojo tomado)."""
+        self._revision = _revision_catalogo(self.ruta) if os.path.exists(self.ruta) else 0
+        self._visto = _stat_archivo(self.ruta)
+        st = _stat_archivo(self.ruta_journal)
+        self._leido = st[1] if st else 0
+
+    def _persistir(self) -> None:
+        """Lo que hace el EscritorFondo en cada tanda: fsync del journal y, si toca, compactar."""
+        with self._cerrojo:
+            self.sincronizar_journal()
+            toca = self._entradas_journal >= JOURNAL_COMPACTAR_CADA
+        if toca:
+            self.compactar()
+
+    def lectura(self) -> Any:
+        """Cerrojo para leer mientras otro hilo aprende (servidor, ventana): with db.lectura(): ..."""
+        return self._cerrojo
+
+    def iniciar_escritor(self, espera: float = 0.5) -> "EscritorFondo":
+        """Desde ahora aprender() no toca el disco en este hilo: lo persiste un EscritorFondo."""
+        if self._escritor is None:
+            self._escritor = EscritorFondo(self, espera)
+        return self._escritor
+
+    def cerrar(self) -> None:
+        """Al salir: vacío el escritor, fsync, cierro el journal y guardo el árbol si cambió."""
+        if self._escritor is not None:
+            listo = self._escritor.cerrar()
+            self._escritor = None
+            if not listo:
+                return   # lo soltaron a mitad de una tanda: el journal sigue siendo suyo
+        self._cerrar_journal()
+        if self.arbol is not None and self.arbol.cambiado:
+            self._guardar_arbol()
+
+    # --- Árbol de decisión ---
+    def _firma(self) -> List[Any]:
+        """Tamaño y mtime del catálogo y del journal: si no cambiaron, el árbol guardado sirve."""
+        firma: List[Any] = []
+        for r in (self.ruta, self.ruta_journal):
+            try:
+                st = os.stat(r)
+                firma += [st.st_size, st.st_mtime_ns]
+            except OSError:
+                firma += [None, None]
+        return firma
+
+    def _cargar_arbol(self) -> None:
+        """Leo el árbol guardado; si falta o es de otro catálogo, lo compilo y lo guardo."""
+        self.arbol = ArbolPreguntas(self)
+        if not self.arbol.leer(self.ruta_arbol, self._firma()):
+            self.compilar_arbol()
+
+    def _rehacer_arbol(self) -> None:
+        """Tras recargar el catálogo: si ya había árbol lo vuelvo a leer (o compilar); si no, sigue perezoso."""
+        if self.arbol is not None:
+            self._cargar_arbol()
+
+    def usa_arbol(self) -> bool:
+        """¿El modo "ganancia" de este backend juega sobre el árbol? (sqlite cuenta con GROUP BY.)"""
+        return True
+
+    def compilar_arbol(self, max_nodos: int = ARBOL_MAX_NODOS) -> None:
+        self.arbol = ArbolPreguntas(self)
+        self.arbol.compilar(max_nodos)
+        self._guardar_arbol()
+
+    def _guardar_arbol(self) -> None:
+        """Guardo el árbol con la firma de los archivos, solo si lo que tengo es lo que hay en disco."""
+        if self._en_memoria:
+            return
+        with self._bloqueo:
+            if not self._hay_cambios():
+                self.arbol.guardar(self.ruta_arbol, self._firma())
+
+    def _semilla(self) -> None:
+        """Base inicial (40+ autos). Suficiente para que el juego sea útil."""
+        self.attributes = self._schema_attributes()
+
+        # Nota: guardo 'marca' en cada coche SOLO para mostrar/ayudar,
+        # ya no la pregunto explícitamente (reemplazada por 'segmento').
+        def car(name, marca, tipo, electrico, hibrido, combustible, origen, lujo,
+                puertas, traccion, transmision, anio, precio, segmento):
+            return {
+                "name": name, "marca": marca, "tipo": tipo, "electrico": electrico,
+                "hibrido": hibrido, "combustible": combustible, "origen": origen,
+                "lujo": lujo, "puertas": puertas, "traccion": traccion,
+                "transmision": transmision, "anio": anio, "precio": precio,
+                "segmento": segmento
+            }
+
+        self.cars = [
+            car("Toyota Corolla","Toyota","sedan",False,False,"gasolina","japonesa",False,"4","delantera","automatica","2021+","medio","compacto"),
+            car("Toyota Camry","Toyota","sedan",False,False,"gasolina","japonesa",False,"4","delantera","automatica","2021+","medio","mediano"),
+            car("Toyota Prius","Toyota","hatchback",False,True,"hibrido","japonesa",False,"5","delantera","cvt","2021+","medio","compacto"),
+            car("Toyota RAV4","Toyota","suv",False,False,"gasolina","japonesa",False,"5","AWD","automatica","2021+","medio","SUV/Crossover"),
+            car("Honda Civic","Honda","sedan",False,False,"gasolina","japonesa",False,"4","delantera","automatica","2021+","medio","compacto"),
+            car("Honda CR-V","Honda","suv",False,False,"gasolina","japonesa",False,"5","AWD","automatica","2021+","medio","SUV/Crossover"),
+            car("Ford F-150","Ford","pickup",False,False,"gasolina","americana",False,"4","4x4","automatica","2021+","medio","Pickup"),
+            car("Ford Mustang","Ford","coupe",False,False,"gasolina","americana",False,"2","trasera","manual","2021+","premium","Deportivo"),
+            car("Tesla Model 3","Tesla","sedan",True,False,"electrico","americana",True,"4","AWD","automatica","2021+","premium","mediano"),
+            car("Tesla Model Y","Tesla","crossover",True,False,"electrico","americana",True,"5","AWD","automatica","2021+","premium","SUV/Crossover"),
+            car("BMW Serie 3","BMW","sedan",False,False,"gasolina","europea",True,"4","trasera","automatica","2021+","premium","mediano"),
+            car("BMW X5","BMW","suv",False,False,"gasolina","europea",True,"5","AWD","automatica","2016-2020","lujo","SUV/Crossover"),
+            car("Audi A4","Audi","sedan",False,False,"gasolina","europea",True,"4","AWD","automatica","2021+","premium","mediano"),
+            car("Audi Q5","Audi","suv",False,False,"gasolina","europea",True,"5","AWD","automatica","2021+","premium","SUV/Crossover"),
+            car("Mercedes Clase C","Mercedes","sedan",False,False,"gasolina","europea",True,"4","trasera","automatica","2021+","lujo","mediano"),
+            car("Volkswagen Golf","Volkswagen","hatchback",False,False,"gasolina","europea",False,"5","delantera","manual","2016-2020","medio","compacto"),
+            car("Volkswagen Jetta","Volkswagen","sedan",False,False,"gasolina","europea",False,"4","delantera","automatica","2021+","medio","compacto"),
+            car("Volkswagen Tiguan","Volkswagen","suv",False,False,"gasolina","europea",False,"5","AWD","automatica","2021+","medio","SUV/Crossover"),
+            car("Nissan Leaf","Nissan","hatchback",True,False,"electrico","japonesa",False,"5","delantera","automatica","2016-2020","medio","compacto"),
+            car("Nissan Sentra","Nissan","sedan",False,False,"gasolina","japonesa",False,"4","delantera","cvt","2021+","medio","compacto"),
+            car("Mazda 3 Hatch","Mazda","hatchback",False,False,"gasolina","japonesa",False,"5","delantera","automatica","2021+","medio","compacto"),
+            car("Mazda MX-5 Miata","Mazda","convertible",False,False,"gasolina","japonesa",False,"2","trasera","manual","2016-2020","premium","Deportivo"),
+            car("Kia Sportage","Kia","suv",False,False,"gasolina","coreana",False,"5","delantera","automatica","2021+","medio","SUV/Crossover"),
+            car("Kia Rio","Kia","sedan",False,False,"gasolina","coreana",False,"4","delantera","manual","2016-2020","economico","subcompacto"),
+            car("Hyundai Tucson","Hyundai","suv",False,False,"gasolina","coreana",False,"5","delantera","automatica","2021+","medio","SUV/Crossover"),
+            car("Hyundai Elantra","Hyundai","sedan",False,False,"gasolina","coreana",False,"4","delantera","cvt","2021+","medio","compacto"),
+            car("Chevrolet Suburban","Chevrolet","suv",False,False,"gasolina","americana",False,"5","4x4","automatica","2016-2020","premium","grande"),
+            car("Chevrolet Onix","Chevrolet","sedan",False,False,"gasolina","americana",False,"4","delantera","manual","2016-2020","economico","subcompacto"),
+            car("Jeep Wrangler","Jeep","suv",False,False,"gasolina","americana",False,"4","4x4","automatica","2021+","medio","SUV/Crossover"),
+            car("Porsche 911","Porsche","coupe",False,False,"gasolina","europea",True,"2","trasera","dct","2021+","lujo","Deportivo"),
+            car("BYD Atto 3","BYD","suv",True,False,"electrico","china",False,"5","delantera","automatica","2021+","medio","SUV/Crossover"),
+            car("Subaru Outback","Subaru","crossover",False,False,"gasolina","japonesa",False,"5","AWD","automatica","2016-2020","medio","SUV/Crossover"),
+            car("Renault Duster","Renault","suv",False,False,"gasolina","europea",False,"5","delantera","manual","2016-2020","economico","SUV/Crossover"),
+            car("Peugeot 208","Peugeot","hatchback",False,False,"gasolina","europea",False,"5","delantera","manual","2016-2020","economico","subcompacto"),
+            car("Dodge Charger","Dodge","sedan",False,False,"gasolina","americana",False,"4","trasera","automatica","2016-2020","premium","grande"),
+            car("Mercedes G-Class","Mercedes","suv",False,False,"gasolina","europea",True,"5","4x4","automatica","2016-2020","lujo","SUV/Crossover"),
+            car("Toyota Hilux","Toyota","pickup",False,False,"diesel","japonesa",False,"4","4x4","manual","2016-2020","medio","Pickup"),
+            car("Ford Ranger","Ford","pickup",False,False,"diesel","americana",False,"4","4x4","manual","2016-2020","medio","Pickup"),
+            car("BMW i3","BMW","hatchback",True,False,"electrico","europea",True,"4","trasera","automatica","2011-2015","premium","compacto"),
+            car("Toyota Land Cruiser","Toyota","suv",False,False,"gasolina","japonesa",True,"5","4x4","automatica","2011-2015","lujo","SUV/Crossover"),
+        ]
+
+    def migrar_archivo(self) -> int:
+        """Llevo el archivo a SCHEMA_VERSION auto por auto (en flujo, a un .tmp); devuelvo cuántos migré."""
+        cabecera = _cabecera_catalogo(self.ruta)
+        desde = int(cabecera.get("schema_version", 0))
+
+        def migrados() -> Iterator[Dict[str, Any]]:
+            for clave, v in _recorrer_catalogo(self.ruta):
+                if clave == "car":
+                    yield _migrar_auto(v, desde)
+
+        return _escribir_catalogo(self.ruta, self._schema_attributes(), migrados(),
+                                  int(cabecera.get("revision", 0)))
+
+    # --- Índice invertido (bitsets por clave/valor) ---
+    def _reindexar(self, por_nombre: Optional[Dict[str, int]] = None) -> None:
+        """
+        Reconstruyo el índice completo desde self.cars (al cargar), cada bitset de una vez.
+        'por_nombre': índice de nombres ya al día (importar lo mantiene), así no lo rehago.
+        """
+        n = len(self.cars)
+        for pos, car in enumerate(self.cars):
+            if type(car) is not Auto:   # semilla, db_sintetica, importar, ...
+                self.cars[pos] = Auto.de(car)
+        self._claves_indice = {a["key"] for a in self.attributes}
+        # Columna por columna: con Auto, leer una clave en todos los autos es un attrgetter en C
+        columnas = {a["key"]: _columna(self.cars, a["key"]) for a in self.attributes}
+        self._indice = {}
+        for k, col in columnas.items():
+            distintos = dict.fromkeys(col)
+            distintos.pop(_FALTA, None)
+            if len(distintos) <= INDICE_PASADAS_MAX:
+                for v in distintos:
+                    self._indice[(k, v)] = _bitset_iguales(col, v)
+                continue
+            posiciones: Dict[Any, List[int]] = {}
+            for pos, v in enumerate(col):
+                if v is not _FALTA:
+                    posiciones.setdefault(v, []).append(pos)
+            for v, lista in posiciones.items():
+                self._indice[(k, v)] = _bitset(lista, n)
+        self._con_clave = {}
+        for (k, _), bits in self._indice.items():
+            self._con_clave[k] = self._con_clave.get(k, 0) | bits
+        self._todos = (1 << n) - 1
+        self._codificar(columnas)
+        self._por_nombre = por_nombre
+        self._por_vector = None
+        self._indice_nombres()
+        self.generacion += 1
+
+    def _indice_nombres(self) -> Dict[str, int]:
+        """Armo (una vez) el índice nombre normalizado -> posición; ante duplicados gana el primero."""
+        if self._por_nombre is None:
+            por_nombre: Dict[str, int] = {}
+            self._sumar_nombres(por_nombre, range(len(self.cars)))
+            self._por_nombre = por_nombre
+        return self._por_nombre
+
+    def _sumar_nombres(self, por_nombre: Dict[str, int], posiciones: Iterable[int]) -> None:
+        """
+        Sumo al índice los nombres de esas posiciones y después sus alias (los autos
+        que fusionar_duplicados quitó apuntan al que quedó); un nombre real gana a un alias.
+        """
+        posiciones = list(posiciones)
+        for pos in posiciones:
+            por_nombre.setdefault(_normalizar_nombre(self._nombre_en(pos)), pos)
+        for pos in posiciones:
+            for alias in self._alias_en(pos):
+                por_nombre.setdefault(_normalizar_nombre(alias), pos)
+
+    def _nombre_en(self, pos: int) -> str:
+        return self.cars[pos].get("name", "")
+
+    def _alias_en(self, pos: int) -> List[str]:
+        return self.cars[pos].get("alias") or []
+
+    # --- Autos indistinguibles (mismo vector de respuestas) ---
+    def _vector(self, pos: int) -> Tuple[int, ...]:
+        """La fila de códigos del auto (0 = no trae el campo): su vector de respuestas."""
+        fila = self._mat[pos]
+        return tuple(fila.tolist() if hasattr(fila, "tolist") else fila)
+
+    def _indice_vectores(self) -> Dict[int, Any]:
+        """Armo (una vez, en una pasada) hash(vector) -> posición(es)."""
+        if self._por_vector is None:
+            filas = self._mat.tolist() if hasattr(self._mat, "tolist") else self._mat
+            por_vector: Dict[int, Any] = {}
+            for pos, fila in enumerate(filas):
+                h = hash(tuple(fila))
+                previo = por_vector.get(h)
+                if previo is None:
+                    por_vector[h] = pos
+                elif isinstance(previo, list):
+                    previo.append(pos)
+                else:
+                    por_vector[h] = [previo, pos]
+            self._por_vector = por_vector
+        return self._por_vector
+
+    def _mover_vector(self, pos: int, antes: Optional[Tuple[int, ...]]) -> None:
+        """Tras cambiar la fila de 'pos': lo saco del grupo viejo y lo pongo en el nuevo."""
+        idx = self._por_vector
+        if idx is None:
+            return
+        if antes is not None:
+            h = hash(antes)
+            previo = idx.get(h)
+            if isinstance(previo, list):
+                previo.remove(pos)
+                if len(previo) == 1:
+                    idx[h] = previo[0]
+            elif previo == pos:
+                del idx[h]
+        h = hash(self._vector(pos))
+        previo = idx.get(h)
+        if previo is None:
+            idx[h] = pos
+        elif isinstance(previo, list):
+            previo.append(pos)
+        else:
+            idx[h] = sorted([previo, pos])
+
+    def gemelos(self, pos: int) -> List[int]:
+        """Posiciones de los OTROS autos con el mismo vector que 'pos' (comparo el vector, no solo el hash)."""
+        vector = self._vector(pos)
+        previo = self._indice_vectores().get(hash(vector))
+        candidatos = previo if isinstance(previo, list) else [previo]
+        return [p for p in candidatos if p is not None and p != pos and self._vector(p) == vector]
+
+    def grupos_indistinguibles(self) -> List[List[Dict[str, Any]]]:
+        """
+        Grupos de 2+ autos con las mismas respuestas (ninguna pregunta los separa).
+        Los más grandes primero.
+        """
+        return [[self.cars[p] for p in g] for g in self._grupos_posiciones()]
+
+    def _grupos_posiciones(self) -> List[List[int]]:
+        """Los grupos de grupos_indistinguibles, como posiciones en orden del catálogo."""
+        grupos = []
+        for previo in self._indice_vectores().values():
+            if not isinstance(previo, list):
+                continue
+            por_vector: Dict[Tuple[int, ...], List[int]] = {}
+            for pos in previo:   # separo choques de hash (vectores distintos)
+                por_vector.setdefault(self._vector(pos), []).append(pos)
+            grupos += [sorted(g) for g in por_vector.values() if len(g) > 1]
+        grupos.sort(key=lambda g: (-len(g), g[0]))
+        return grupos
+
+    def fusionar_duplicados(self, misma_marca: bool = True) -> int:
+        """
+        En cada grupo indistinguible dejo el primero y los demás pasan a ser sus "alias".
+        Con misma_marca=True solo junto los de la misma marca. Devuelvo cuántos autos quité.
+        """
+        with self._bloqueo, self._cerrojo:
+            self._refrescar()
+            fuera: set = set()
+            for grupo in self._grupos_posiciones():
+                por_marca: Dict[str, List[int]] = {}
+                for pos in grupo:
+                    marca = _normalizar_nombre(self.cars[pos].get("marca") or "") if misma_marca else ""
+                    por_marca.setdefault(marca, []).append(pos)
+                for queda, *sobran in por_marca.values():
+                    if not sobran:
+                        continue
+                    alias = list(self._alias_en(queda))
+                    for pos in sobran:
+                        alias += [self._nombre_en(pos)] + list(self._alias_en(pos))
+                    fuera.update(sobran)
+                    self._cambiar(queda, {"alias": alias})   # copia al escribir, como aprender
+            if not fuera:
+                return 0
+            self.cars = [c for pos, c in enumerate(self.cars) if pos not in fuera]
+            self._reindexar()
+            self._sin_journal = True
+            self.compactar()
+            if self.arbol is not None:
+                self.compilar_arbol()
+            return len(fuera)
+
+    def _indexar_auto(self, pos: int, car: Dict[str, Any]) -> None:
+        """Enciendo el bit 'pos' en cada (clave, valor) del coche."""
+        bit = 1 << pos
+        for k, v in car.items():
+            if k not in self._claves_indice:
+                continue
+            self._indice[(k, v)] = self._indice.get((k, v), 0) | bit
+            self._con_clave[k] = self._con_clave.get(k, 0) | bit
+
+    def _desindexar_auto(self, pos: int, car: Dict[str, Any]) -> None:
+        """Apago el bit 'pos' (antes de actualizar los campos de un coche)."""
+        bit = ~(1 << pos)
+        for k, v in car.items():
+            if k not in self._claves_indice:   # alias (lista) y demás: no los indexo
+                continue
+            if (k, v) in self._indice:
+                self._indice[(k, v)] &= bit
+            if k in self._con_clave:
+                self._con_clave[k] &= bit
+
+    def _bits_recorriendo(self, cumple) -> int:
+        """Bitset armado recorriendo el catálogo (para claves que no indexo)."""
+        return _bitset([pos for pos, car in enumerate(self.cars) if cumple(car)], len(self.cars))
+
+    def _bits(self, key: str, value: Any) -> int:
+        """Bitset de autos con car[key] == value."""
+        if key in self._claves_indice:
+            return self._indice.get((key, value), 0)
+        return self._bits_recorriendo(lambda c: key in c and c[key] == value)
+
+    def _bits_con_clave(self, key: str) -> int:
+        """Bitset de autos que traen el campo 'key'."""
+        if key in self._claves_indice:
+            return self._con_clave.get(key, 0)
+        return self._bits_recorriendo(lambda c: key in c)
+
+    def _valores(self, key: str) -> List[Any]:
+        """Valores conocidos de una columna del esquema (opciones + extras vistos)."""
+        return list(self._codigos.get(key, {}))
+
+    def _mascara(self, key: str, value: Any) -> int:
+        """
+        Autos compatibles con UNA respuesta: los que tienen ese valor
+        más los que ni traen el campo (misma regla que antes: se ignoran).
+        """
+        sin_clave = self._todos & ~self._bits_con_clave(key)
+        return self._bits(key, value) | sin_clave
+
+    # --- Catálogo codificado (matriz de enteros para puntuar en bloque) ---
+    def _codificar(self, columnas: Dict[str, List[Any]]) -> None:
+        """Armo las tablas de códigos por columna y la matriz coches x columnas."""
+        self._columnas = [a["key"] for a in self.attributes]
+        self._codigos = {}
+        self._tablas_puntos = {}
+        codigos = []
+        for a in self.attributes:
+            valores = [False, True] if a.get("tipo") == "bool" else a.get("opciones", [])
+            tabla = self._codigos[a["key"]] = {v: i + 1 for i, v in enumerate(valores)}
+            col = columnas[a["key"]]
+            for v in dict.fromkeys(col):
+                if v is not _FALTA and v not in tabla:
+                    tabla[v] = len(tabla) + 1
+            tabla_fila = dict(tabla)
+            tabla_fila[_FALTA] = 0
+            codigos.append(list(map(tabla_fila.__getitem__, col)))
+        filas = list(map(list, zip(*codigos))) if codigos else [[] for _ in self.cars]
+        if np is not None:
+            self._mat = np.array(filas, dtype=np.int16).reshape(len(filas), len(self._columnas))
+        else:
+            self._mat = filas
+
+    def _codigo(self, key: str, value: Any, crear: bool = False) -> int:
+        """Código de un valor en su columna. Si no existe y crear=False devuelvo -1 (nadie coincide)."""
+        tabla = self._codigos[key]
+        cod = tabla.get(value)
+        if cod is None:
+            if not crear:
+                return -1
+            cod = tabla[value] = len(tabla) + 1
+        return cod
+
+    def _fila_codigos(self, car: Dict[str, Any]) -> List[int]:
+        return [0 if v is _FALTA else self._codigo(k, v, crear=True)
+                for k, v in zip(self._columnas, _valores(car, tuple(self._columnas)))]
+
+    def _poner_fila(self, pos: int, car: Dict[str, Any]) -> None:
+        """Actualizo (o agrego al final) la fila de un coche en la matriz; sin lugar, duplico el buffer."""
+        fila = self._fila_codigos(car)
+        if np is None:
+            if pos == len(self._mat):
+                self._mat.append(fila)
+            else:
+                self._mat[pos] = fila
+            return
+        n = len(self._mat)
+        if pos < n:
+            self._mat[pos] = fila
+            return
+        buf = self._mat_buffer
+        if buf is None or self._mat.base is not buf or n >= len(buf):
+            # primera vez, o alguien rehízo _mat (_codificar, el .bin): buffer nuevo
+            buf = np.zeros((max(2 * n, 64), len(self._columnas)), dtype=self._mat.dtype)
+            buf[:n] = self._mat
+            self._mat_buffer = buf
+        buf[n] = fila
+        self._mat = buf[:n + 1]
+
+    def _autos_de(self, mask: int) -> List[Dict[str, Any]]:
+        """Convierto un bitset de posiciones en la lista de coches (orden del catálogo)."""
+        return [self.cars[i] for i in _posiciones(mask)]
+
+    # --- Búsquedas (coincidencia exacta o por puntaje) ---
+    def candidatos_exactos(self, respuestas: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Devuelve autos que coinciden EXACTO con todas las respuestas no vacías.
+        Es un AND de bitsets del índice (y queda en la cache).
+        """
+        return [self.cars[i] for i in self.ids_exactos(respuestas)]
+
+    def ids_exactos(self, respuestas: Dict[str, Any]) -> array:
+        """Posiciones (en orden) de los candidatos exactos, sin armar los dicts."""
+        return self.cache.obtener(respuestas, self.generacion, ("ids",),
+                                  lambda: array("I", _posiciones(self._mascara_exacta(respuestas))))
+
+    def nombres_de(self, ids: Iterable[int]) -> List[str]:
+        """Nombres de esas posiciones (el binario no decodifica el auto entero)."""
+        return [self._nombre_en(i) for i in ids]
+
+    def _mascara_exacta(self, respuestas: Dict[str, Any]) -> int:
+        mask = self._todos
+        for k, v in respuestas.items():
+            if v in ("", None):   # si no respondí esa, la ignoro
+                continue
+            mask &= self._mascara(k, v)
+            if not mask:          # ya no queda nadie, no sigo
+                break
+        return mask
+
+    def _puntajes(self, respuestas: Dict[str, Any]) -> Any:
+        """
+        Puntos de TODOS los coches (cuántas respuestas coinciden).
+        Con NumPy es una comparación + suma sobre la matriz; si no, lo mismo fila por fila.
+        """
+        cols, cods, extras = [], [], {}
+        for k, v in respuestas.items():
+            if v in ("", None):
+                continue
+            if k in self._codigos:
+                cols.append(self._columnas.index(k))
+                cods.append(self._codigo(k, v))
+            else:
+                extras[k] = v     # clave fuera del esquema: la comparo a mano
+
+        n = len(self.cars)
+        if np is not None:
+            if cols:
+                scores = (self._mat[:, cols] == np.array(cods, dtype=np.int16)).sum(axis=1)
+            else:
+                scores = np.zeros(n, dtype=np.int64)
+        else:
+            q = list(zip(cols, cods))
+            scores = [sum(1 for j, c in q if fila[j] == c) for fila in self._mat]
+
+        if extras:
+            for i, car in enumerate(self.cars):
+                scores[i] += sum(1 for k, v in extras.items() if k in car and car[k] == v)
+        return scores
+
+    def mejores_coincidencias(self, respuestas: Dict[str, Any], k: int = 3) -> List[Tuple[Dict[str, Any], int]]:
+        """
+        Top-k de coches por puntaje: [(coche, puntos), ...] de mayor a menor.
+        En empate gana el que aparece antes en el catálogo (como antes).
+        """
+        return [(self.cars[i], pts) for i, pts in self.ids_top(respuestas, k)]
+
+    def ids_top(self, respuestas: Dict[str, Any], k: int = 3) -> List[Tuple[int, int]]:
+        """El top-k como [(posición, puntos), ...], por la cache."""
+        if k <= 0:
+            return []
+        return self.cache.obtener(respuestas, self.generacion, ("top", k, self.puntaje),
+                                  lambda: self._top(respuestas, k))
+
+    def _top(self, respuestas: Dict[str, Any], k: int) -> List[Tuple[int, int]]:
+        """El top-k como [(posición, puntos), ...] (lo que guarda la cache)."""
+        n = len(self.cars)
+        if n == 0:
+            return []
+        k = min(k, n)
+        if self.puntaje == "difuso":
+            return self._top_difuso(respuestas, k)
+        scores = self._puntajes(respuestas)
+
+        if np is not None:
+            return _k_mejores(np.arange(n), scores, k)
+
+        orden = heapq.nsmallest(k, range(n), key=lambda i: (-scores[i], i))
+        return [(i, scores[i]) for i in orden]
+
+    # --- Puntaje difuso (pesos y cercanía en las opciones ordenadas) ---
+    def _puntos(self, key: str, respuesta: Any, valor: Any) -> int:
+        """Puntos que suma un auto con 'valor' en 'key' cuando contesté 'respuesta'."""
+        peso = PESOS_PUNTAJE.get(key, PESO_PUNTAJE)
+        if valor == respuesta:
+            return peso
+        attr = next((a for a in self.attributes if a["key"] == key), None)
+        escala = _escala_ordinal(attr) if attr is not None else ()
+        if respuesta in escala and valor in escala:
+            d = abs(escala.index(respuesta) - escala.index(valor))
+            if d < len(CERCANIA_ORDINAL):
+                return int(peso * CERCANIA_ORDINAL[d] + 0.5)
+        return 0
+
+    def _tabla_puntos(self, key: str, respuesta: Any) -> List[int]:
+        """Puntos por código de la columna para esa respuesta (0 = no trae el campo)."""
+        codigos = self._codigos[key]
+        tabla = self._tablas_puntos.get((key, respuesta))
+        if tabla is None or len(tabla) <= len(codigos):
+            tabla = [0] * (len(codigos) + 1)
+            for valor, cod in codigos.items():
+                tabla[cod] = self._puntos(key, respuesta, valor)
+            self._tablas_puntos[(key, respuesta)] = tabla
+        return tabla
+
+    def _grupos_puntaje(self, respuestas: Dict[str, Any]) -> Tuple[List[List[str]], Dict[str, Any]]:
+        """Claves contestadas agrupadas (las REDUNDANTES juntas valen el máximo) y aparte las fuera del esquema."""
+        activas = {k: v for k, v in respuestas.items() if v not in ("", None)}
+        grupos, usadas = [], set()
+        for (k1, v1), (k2, v2) in REDUNDANTES:
+            if (k1 in activas and k2 in activas and k1 in self._columnas and k2 in self._columnas
+                    and activas[k1] == v1 and activas[k2] == v2):
+                grupos.append([k1, k2])
+                usadas |= {k1, k2}
+        grupos += [[k] for k in activas if k in self._columnas and k not in usadas]
+        extras = {k: v for k, v in activas.items() if k not in self._columnas}
+        return grupos, extras
+
+    def _top_difuso(self, respuestas: Dict[str, Any], k: int) -> List[Tuple[int, int]]:
+        """
+        Top-k con el puntaje difuso: con NumPy en bloque; sin NumPy auto por auto,
+        cortando en cuanto ya no alcanza al k-ésimo.
+        """
+        grupos, extras = self._grupos_puntaje(respuestas)
+        terminos = []    # (máximo, [(columna, tabla), ...])
+        for grupo in grupos:
+            partes = [(self._columnas.index(key), self._tabla_puntos(key, respuestas[key])) for key in grupo]
+            terminos.append((max(max(t) for _, t in partes), partes))
+        terminos.sort(key=lambda t: -t[0])
+        resto = sum(m for m, _ in terminos) + sum(PESOS_PUNTAJE.get(key, PESO_PUNTAJE) for key in extras)
+        n = len(self.cars)
+
+        if np is not None:
+            # De una vez (con NumPy el corte temprano no rinde)
+            ids = np.arange(n)
+            scores = self._sumar_terminos(terminos)
+            if extras:
+                scores += np.array([self._puntos_extras(int(i), extras) for i in ids], dtype=np.float32)
+            return _k_mejores(ids, scores, k)
+
+        # Sin NumPy: auto por auto, contra el peor del top-k que llevo (heap)
+        restos, acumulado = [], resto
+        for maximo, _ in terminos:
+            acumulado -= maximo
+            restos.append(acumulado)
+        pasos = [(partes[0][0], partes[0][1], partes[1:], r) for (_, partes), r in zip(terminos, restos)]
+        peor: List[Tuple[int, int]] = []     # (puntos, -posición): arriba el que sale primero
+        for pos, fila in enumerate(self._mat):
+            umbral = peor[0][0] if len(peor) == k else -1
+            s = 0
+            for j, tabla, otras, r in pasos:
+                pts = tabla[fila[j]]
+                for j2, tabla2 in otras:
+                    pts = max(pts, tabla2[fila[j2]])
+                s += pts
+                if s + r <= umbral:     # empatar tampoco alcanza: gana la posición menor
+                    break
+            else:
+                if extras:
+                    s += self._puntos_extras(pos, extras)
+                if len(peor) < k:
+                    heapq.heappush(peor, (s, -pos))
+                elif s > umbral:
+                    heapq.heapreplace(peor, (s, -pos))
+        return [(-p, s) for s, p in sorted(peor, reverse=True)]
+
+    def _sumar_terminos(self, terminos: List[Tuple[int, List[Tuple[int, List[int]]]]]) -> Any:
+        """Puntos de esos términos para todos los autos, en bloque con NumPy."""
+        filas = self._mat
+        cols, cods, pts, aparte = [], [], [], []
+        for _, partes in terminos:
+            j, tabla = partes[0]
+            suman = [(cod, p) for cod, p in enumerate(tabla) if p]
+            if len(partes) > 1 or len(suman) > 1:
+                aparte.append(partes)
+            elif suman:
+                cols.append(j)
+                cods.append(suman[0][0])
+                pts.append(suman[0][1])
+        if cols:
+            iguales = filas[:, cols] == np.array(cods, dtype=filas.dtype)
+            total = iguales.astype(np.float32) @ np.array(pts, dtype=np.float32)
+        else:
+            total = np.zeros(len(filas), dtype=np.float32)
+        for partes in aparte:
+            total += np.maximum.reduce([np.take(np.asarray(t, dtype=np.float32), filas[:, j]) for j, t in partes])
+        return total
+
+    def _puntos_extras(self, pos: int, extras: Dict[str, Any]) -> int:
+        """Puntos por las claves fuera del esquema (no están en la matriz: miro el auto)."""
+        car = self.cars[pos]
+        return sum(self._puntos(k, v, car[k]) for k, v in extras.items() if k in car)
+
+    def mejor_coincidencia(self, respuestas: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Si no hay exactos, me quedo con el que MÁS coincide (score mayor).
+        Devuelvo (coche, puntos_coincidencia).
+        """
+        top = self.mejores_coincidencias(respuestas, k=1)
+        if not top:
+            return None, -1
+        return top[0]
+
+    def nueva_sesion(self, modo: Optional[str] = None) -> "SesionJuego":
+        """Sesión de juego que sabe estrechar candidatos sobre ESTE backend."""
+        if (modo or MODO_PREGUNTAS) == "ganancia":
+            if self.arbol is None:
+                self._cargar_arbol()
+            return SesionArbol(self, modo)
+        return SesionJuego(self, modo)
+
+    def aprender(self, nombre: str, respuestas: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Si no acerté, uso esto para guardar/actualizar un auto nuevo.
+        - Si ya existía por nombre, actualizo campos.
+        - Si no, lo creo con los valores actuales.
+        Devuelvo los autos que quedan indistinguibles de él (mismo vector) para avisar.
+        """
+        nombre = " ".join(nombre.split())
+        if not nombre:
+            return []
+        with self._bloqueo, self._cerrojo:
+            # Primero lo que aprendieron otros procesos: si no, pisaría su versión del auto
+            self._refrescar()
+
+            # Actualizo si ya existe (sin mayúsculas/acentos, por el índice de nombres)
+            clave = _normalizar_nombre(nombre)
+            pos = self._indice_nombres().get(clave)
+            if pos is not None:
+                cambios = {k: v for k, v in respuestas.items() if v not in ("", None)}
+                if not (self.cars[pos].get("marca") or cambios.get("marca")):
+                    cambios["marca"] = nombre.split()[0]  # infiero marca del nombre
+                car = self._cambiar(pos, cambios)
+                self._registrar(car)
+                return [self.cars[p] for p in self.gemelos(pos)]
+
+            # Nuevo coche
+            # Lo que no contestó queda vacío: no le invento valores por defecto
+            nuevo = Auto(name=nombre, marca=nombre.split()[0])
+            for a in self.attributes:
+                k = a["key"]
+                nuevo[k] = respuestas.get(k, "")
+            pos = self._agregar(nuevo, clave)
+            self._registrar(nuevo)
+            return [self.cars[p] for p in self.gemelos(pos)]
+
+    def _cambiar(self, pos: int, cambios: Dict[str, Any], reemplazar: bool = False) -> Dict[str, Any]:
+        """Actualizo el auto 'pos' (o lo reemplazo entero) con índices, matriz y árbol al día."""
+        antes = self.cars[pos]
+        vector_antes = self._vector(pos)
+        # Copia al escribir: la foto de compactar nunca ve un auto a medio cambiar
+        car = Auto() if reemplazar else Auto.de(antes) if type(antes) is not Auto else antes.copy()
+        car.update(cambios)
+        self._poner_fila(pos, car)   # primero lo que puede fallar (un valor que no se codifica)
+        self._desindexar_auto(pos, antes)
+        self.cars[pos] = car
+        self._indexar_auto(pos, car)
+        self._mover_vector(pos, vector_antes)
+        if self.arbol is not None:
+            self.arbol.actualizar([antes, car])
+        self.generacion += 1      # después de cambiar: la cache descarta lo viejo
+        return car
+
+    def _agregar(self, nuevo: Dict[str, Any], clave: str) -> int:
+        """Agrego un auto al final (índices, matriz y árbol) y devuelvo su posición."""
+        nuevo = Auto.de(nuevo)
+        pos = len(self.cars)
+        self._poner_fila(pos, nuevo)   # si falla, el catálogo queda como estaba
+        self.cars.append(nuevo)
+        self._indice_nombres()[clave] = pos
+        self._todos = (1 << len(self.cars)) - 1
+        self._indexar_auto(pos, nuevo)
+        self._mover_vector(pos, None)
+        if self.arbol is not None:
+            self.arbol.actualizar([nuevo])
+        self.generacion += 1
+        return pos
+
+    def buscar_por_nombre(self, nombre: str) -> Optional[Dict[str, Any]]:
+        """El auto con ese nombre (da igual mayúsculas, acentos o espacios de más), o None."""
+        pos = self._indice_nombres().get(_normalizar_nombre(nombre))
+        return None if pos is None else self.cars[pos]
+
+    # --- Carga masiva (ver importar / exportar) ---
+    def importar_autos(self, autos: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Upsert en bloque por nombre: un reindexado y una escritura (compactar) al final.
+        'autos' puede ser perezoso y ya viene validado. Devuelvo (nuevos, actualizados).
+        """
+        nuevos = actualizados = 0
+        with self._bloqueo, self._cerrojo:
+            self._refrescar()
+            por_nombre = self._indice_nombres()
+            for car in autos:
+                car = Auto.de(car)
+                clave = _normalizar_nombre(car["name"])
+                pos = por_nombre.get(clave)
+                if pos is None:
+                    por_nombre[clave] = len(self.cars)
+                    self.cars.append(car)
+                    nuevos += 1
+                else:
+                    if _normalizar_nombre(self._nombre_en(pos)) != clave:
+                        car["name"] = self._nombre_en(pos)   # era un alias: actualizo al que quedó
+                    if "alias" not in car and self._alias_en(pos):
+                        car["alias"] = list(self._alias_en(pos))   # los alias de la fusión se quedan
+                    self.cars[pos] = car
+                    actualizados += 1
+            if not (nuevos or actualizados):
+                return 0, 0
+            self._reindexar(por_nombre)
+            self._sin_journal = True
+            self.compactar()
+        if self.arbol is not None:
+            self.compilar_arbol()
+        return nuevos, actualizados
+
+    def __len__(self) -> int:
+        """Cuántos autos hay en el catálogo (sqlite y particionado lo saben sin armar self.cars)."""
+        return len(self.cars)
+
+    def ruta_binaria(self) -> Optional[str]:
+        """Un .bin al día de este catálogo que otros procesos pueden mapear (evaluar --procesos), si lo hay."""
+        return None
+
+    def iterar_autos(self) -> Iterator[Dict[str, Any]]:
+        """Los autos uno por uno, en orden (para exportar sin armar otra lista)."""
+        return iter(self.cars)
+
+
+class EscritorFondo:
+    """
+    Hilo que guarda lo aprendido sin trabar la ventana.
+    - encargar(trabajo): lo corro aquí, en orden, y devuelvo un Future.
+    - pedir(): junto pedidos por 'espera' segundos y hago una tanda (fsync y, si toca, compactar).
+    - vaciar()/cerrar(): espero a que todo quede en disco; soltar() deja de esperar.
+    """
+
+    def __init__(self, db: CarDB, espera: float = 0.5):
+        self.db = db
+        self.espera = espera
+        self.avisos: "queue.Queue[Tuple[bool, Optional[BaseException]]]" = queue.Queue()
+        self._cond = threading.Condition()
+        self._trabajos: deque = deque()   # (trabajo, Future) de encargar(), en orden
+        self._ocupado = False    # estoy corriendo un trabajo
+        self._pedidos = 0        # cuántos pedir() van
+        self._hechos = 0         # hasta qué pedido quedó persistido
+        self._ultimo = 0.0       # hora del último pedido (para el debounce)
+        self._urgente = False
+        self._parar = False
+        self._soltado = False
+        self._hilo = threading.Thread(target=self._correr, name="escritor-coches", daemon=True)
+        self._hilo.start()
+
+    def encargar(self, trabajo: Callable[[], Any]) -> "concurrent.futures.Future":
+        fut: concurrent.futures.Future = concurrent.futures.Future()
+        with self._cond:
+            if self._parar:
+                raise RuntimeError("el escritor ya está cerrado")
+            self._trabajos.append((trabajo, fut))
+            self._cond.notify_all()
+        return fut
+
+    def pedir(self) -> None:
+        with self._cond:
+            self._pedidos += 1
+            self._ultimo = time.monotonic()
+            self._cond.notify_all()
+
+    def pendiente(self) -> bool:
+        """¿Queda algún trabajo o pedido sin persistir?"""
+        with self._cond:
+            return self._ocupado or bool(self._trabajos) or self._hechos < self._pedidos
+
+    def vaciar(self, limite: Optional[float] = None) -> bool:
+        """
+        Bloqueo hasta que los trabajos encargados terminen y lo pedido esté persistido
+        (salto el debounce), o a lo sumo 'limite' segundos. True si quedó todo en disco.
+        """
+        fin = None if limite is None else time.monotonic() + limite
+        with self._cond:
+            def falta_algo() -> bool:
+                return self._ocupado or bool(self._trabajos) or self._hechos < self._pedidos
+            while falta_algo() and self._hilo.is_alive() and not self._soltado:
+                if self._hechos < self._pedidos and not self._urgente:
+                    self._urgente = True
+                    self._cond.notify_all()
+                falta = 0.1 if fin is None else min(0.1, fin - time.monotonic())
+                if falta <= 0:
+                    break
+                self._cond.wait(falta)
+            return not falta_algo()
+
+    def soltar(self) -> None:
+        """No espero más al hilo: vaciar() y cerrar() vuelven enseguida (los trabajos sin empezar se cancelan)."""
+        with self._cond:
+            self._soltado = self._parar = True
+            while self._trabajos:
+                self._trabajos.popleft()[1].cancel()
+            self._cond.notify_all()
+
+    def cerrar(self) -> bool:
+        """Vacío y termino el hilo; False si lo solté antes de que terminara."""
+        if not self.vaciar():
+            return False
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        self._hilo.join()
+        return True
+
+    def _correr(self) -> None:
+        while True:
+            with self._cond:
+                while not self._trabajos and self._hechos == self._pedidos and not self._parar:
+                    self._cond.wait()
+                if self._trabajos:
+                    trabajo, fut = self._trabajos.popleft()
+                    self._ocupado = True
+                elif self._hechos == self._pedidos:
+                    return
+                else:
+                    trabajo = None
+                    # debounce: espero a que pasen 'espera' segundos sin pedidos nuevos
+                    while not (self._urgente or self._parar or self._trabajos):
+                        falta = self._ultimo + self.espera - time.monotonic()
+                        if falta <= 0:
+                            break
+                        self._cond.wait(falta)
+                    if self._trabajos:
+                        continue   # un trabajo nuevo va antes que la tanda
+                    tanda = self._pedidos
+                    self._urgente = False
+            if trabajo is not None:
+                if fut.set_running_or_notify_cancel():
+                    try:
+                        fut.set_result(trabajo())
+                    except BaseException as e:   # le llega a quien lo encargó
+                        fut.set_exception(e)
+                with self._cond:
+                    self._ocupado = False
+                    self._cond.notify_all()
+                continue
+            try:
+                self.db._persistir()
+                self.avisos.put((True, None))
+            except Exception as e:     # lo aprendido sigue en el journal; aviso y sigo
+                self.avisos.put((False, e))
+            with self._cond:
+                self._hechos = tanda
+                self._cond.notify_all()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Importar y exportar el catálogo en CSV o JSON lines, por tandas, con validación y archivo de rechazos."""
+
+import csv
+import itertools
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .catalogo import _migrar_auto
+from .db import CarDB
+from .nucleo import IMPORTAR_BLOQUE, _a_json
+
+
+# ============================ IMPORTAR / EXPORTAR (CSV, JSONL) =================
+# Columnas: name, marca, una por clave del esquema y "extra" (JSON con lo demás,
+# igual que en SQLite). En CSV los bools van como true/false; al leer también
+# acepto sí/no/1/0. En JSON lines va un auto (objeto) por línea.
+_COLUMNA_EXTRA = "extra"
+
+
+def _formato_de(ruta: str, formato: Optional[str] = None) -> str:
+    """'csv' o 'jsonl' (explícito, o por la extensión del archivo)."""
+    if formato:
+        return formato
+    ext = os.path.splitext(ruta)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"{ruta}: no sé si es CSV o JSON lines (usa --formato)")
+
+
+def _leer_tandas(ruta: str, formato: str, bloque: int) -> Iterator[List[Tuple[int, Any]]]:
+    """
+    Doy las filas crudas de a 'bloque': [(número de línea, fila), ...]. Nunca tengo
+    más de una tanda en memoria. En JSONL una línea que no es JSON va tal cual
+    (texto) y la rechaza la validación.
+    """
+    # utf-8-sig: los CSV que exporta Excel traen BOM
+    with open(ruta, "r", encoding="utf-8-sig", newline="" if formato == "csv" else None) as f:
+        if formato == "csv":
+            lector = csv.DictReader(f)
+            filas: Iterator[Tuple[int, Any]] = ((lector.line_num, fila) for fila in lector)
+        else:
+            filas = ((n, linea.rstrip("\r\n")) for n, linea in enumerate(f, 1) if linea.strip())
+        while True:
+            tanda = list(itertools.islice(filas, bloque))
+            if not tanda:
+                return
+            yield tanda
+
+
+def _tablas_validacion(attributes: List[Dict[str, Any]]) -> List[Tuple[str, Dict[Any, Any], str]]:
+    """
+    Por clave del esquema: valor tal cual o normalizado (casefold) -> valor canónico,
+    y qué se esperaba (para el mensaje de error).
+    """
+    tablas = []
+    for a in attributes:
+        if a.get("tipo") == "bool":
+            tabla: Dict[Any, Any] = {True: True, False: False}
+            tabla.update(dict.fromkeys(("true", "1", "si", "sí", "s", "yes", "y", "verdadero"), True))
+            tabla.update(dict.fromkeys(("false", "0", "no", "n", "falso"), False))
+            tablas.append((a["key"], tabla, "sí/no"))
+        else:
+            opciones = a.get("opciones", [])
+            tabla = {o.casefold(): o for o in opciones}
+            tabla.update({o: o for o in opciones})
+            tablas.append((a["key"], tabla, "/".join(opciones)))
+    return tablas
+
+
+def _validar_fila(fila: Any, tablas: List[Tuple[str, Dict[Any, Any], str]], conocidas: set) -> Dict[str, Any]:
+    """
+    Fila cruda (CSV o JSONL) -> auto listo para el catálogo; vacío = no lo trae.
+    Si algo no vale, ValueError con TODOS los problemas de la fila.
+    """
+    if isinstance(fila, str):
+        try:
+            fila = json.loads(fila)
+        except ValueError as e:
+            raise ValueError(f"JSON inválido: {e}") from None
+    if not isinstance(fila, dict):
+        raise ValueError("la fila no es un objeto")
+    if None in fila:   # csv.DictReader junta ahí las celdas que sobran
+        raise ValueError("más columnas que el encabezado")
+
+    errores = []
+    nombre = " ".join(str(fila.get("name") or "").split())
+    if not nombre:
+        errores.append("falta 'name'")
+    car: Dict[str, Any] = {"name": nombre}
+    marca = " ".join(str(fila.get("marca") or "").split())
+    if marca:
+        car["marca"] = marca
+
+    for k, tabla, esperado in tablas:
+        v = fila.get(k)
+        if v is None or v == "":
+            continue
+        try:
+            car[k] = tabla[v]       # lo común: ya viene exacto ("suv", "true")
+            continue
+        except (KeyError, TypeError):
+            pass
+        if isinstance(v, str):
+            t: Any = v.strip().casefold()
+            if not t:
+                continue
+        else:
+            t = str(v)              # número en JSONL: "puertas": 4
+        if t in tabla:
+            car[k] = tabla[t]
+        else:
+            errores.append(f"{k}: {v!r} no es {esperado}")
+
+    for k, v in fila.items():
+        if k not in conocidas and v not in ("", None):
+            car[k] = v
+    extra = fila.get(_COLUMNA_EXTRA)
+    if isinstance(extra, str) and extra.strip():
+        try:
+            extra = json.loads(extra)
+        except ValueError:
+            extra = None
+        if not isinstance(extra, dict):
+            errores.append(f"{_COLUMNA_EXTRA}: no es un objeto JSON")
+    if isinstance(extra, dict):
+        car.update({k: v for k, v in extra.items() if k not in conocidas})
+
+    if errores:
+        raise ValueError("; ".join(errores))
+    return _migrar_auto(car)
+
+
+def importar(db: CarDB, ruta: str, formato: Optional[str] = None, rechazos: Optional[str] = None,
+             bloque: int = IMPORTAR_BLOQUE) -> Dict[str, Any]:
+    """
+    Importo un CSV o JSON lines de a 'bloque' filas, validando cada una; las buenas van a
+    db.importar_autos y las malas a 'rechazos' (<archivo>.rechazos.jsonl, solo si hay).
+    """
+    formato = _formato_de(ruta, formato)
+    rechazos = rechazos or os.path.splitext(ruta)[0] + ".rechazos.jsonl"
+    tablas = _tablas_validacion(db.attributes)
+    conocidas = {"name", "marca", _COLUMNA_EXTRA, *(a["key"] for a in db.attributes)}
+    cuenta = {"leidas": 0, "rechazadas": 0}
+    archivo_rechazos = None
+
+    def validados() -> Iterator[Dict[str, Any]]:
+        nonlocal archivo_rechazos
+        for tanda in _leer_tandas(ruta, formato, bloque):
+            cuenta["leidas"] += len(tanda)
+            for linea, fila in tanda:
+                try:
+                    car = _validar_fila(fila, tablas, conocidas)
+                except ValueError as e:
+                    if archivo_rechazos is None:
+                        archivo_rechazos = open(rechazos, "w", encoding="utf-8")
+                    archivo_rechazos.write(json.dumps({"linea": linea, "error": str(e), "fila": fila},
+                                                      ensure_ascii=False) + "\n")
+                    cuenta["rechazadas"] += 1
+                    continue
+                yield car
+
+    t0 = time.perf_counter()
+    try:
+        nuevos, actualizados = db.importar_autos(validados())
+    finally:
+        if archivo_rechazos is not None:
+            archivo_rechazos.close()
+    return {
+        "leidas": cuenta["leidas"],
+        "nuevos": nuevos,
+        "actualizados": actualizados,
+        "rechazadas": cuenta["rechazadas"],
+        "rechazos": rechazos if cuenta["rechazadas"] else None,
+        "segundos": round(time.perf_counter() - t0, 3),
+    }
+
+
+def exportar(db: CarDB, ruta: str, formato: Optional[str] = None) -> int:
+    """Escribo el catálogo en CSV o JSON lines auto por auto (.tmp + rename). Devuelvo cuántos."""
+    formato = _formato_de(ruta, formato)
+    claves = [a["key"] for a in db.attributes]
+    conocidas = {"name", "marca", *claves}
+    tmp = ruta + ".tmp"
+    n = 0
+    with open(tmp, "w", encoding="utf-8", newline="" if formato == "csv" else None) as f:
+        escritor = csv.writer(f) if formato == "csv" else None
+        if escritor is not None:
+            escritor.writerow(["name", "marca", *claves, _COLUMNA_EXTRA])
+        for car in db.iterar_autos():
+            if escritor is None:
+                f.write(json.dumps(car, ensure_ascii=False, default=_a_json) + "\n")
+            else:
+                extra = {k: v for k, v in car.items() if k not in conocidas}
+                celdas = [car.get(k, "") for k in ["name", "marca", *claves]]
+                escritor.writerow([("true" if v else "false") if isinstance(v, bool) else v for v in celdas]
+                                  + [json.dumps(extra, ensure_ascii=False) if extra else ""])
+            n += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, ruta)
+    return n
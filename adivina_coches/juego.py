@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+Una partida sobre un CarDB: qué pregunta sigue (SelectorPreguntas), los
+candidatos vivos con deshacer O(1) (SesionJuego) y el árbol de decisión
+precompilado del modo "ganancia" (ArbolPreguntas, SesionArbol).
+"""
+
+import json
+import math
+import os
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .nucleo import ARBOL_MAX_NODOS, MODO_PREGUNTAS, SELECTOR_COSTO_FILA, _contar, _posiciones
+
+if TYPE_CHECKING:   # solo para las anotaciones: db.py importa este módulo
+    from .db import CarDB
+
+
+# ============================ SELECCIÓN DE PREGUNTAS ===========================
+class SelectorPreguntas:
+    """
+    Elige la siguiente pregunta por GANANCIA DE INFORMACIÓN sobre los autos vivos.
+    Guardo conteos por (clave, valor) y tras cada respuesta solo resto los descartados.
+    """
+
+    def __init__(self, db: "CarDB", vivos: int):
+        self.db = db
+        self.total = _contar(vivos)
+        claves = {a["key"] for a in db.attributes}
+        self.conteos: Dict[str, Dict[Any, int]] = {k: {} for k in claves}
+        for k in claves:
+            for v in db._valores(k):
+                c = _contar(db._bits(k, v) & vivos)
+                if c:
+                    self.conteos[k][v] = c
+        self.sin_clave = {k: self.total - sum(self.conteos[k].values()) for k in claves}
+
+    @classmethod
+    def desde_conteos(cls, total: int, conteos: Dict[str, Dict[Any, int]],
+                      sin_clave: Dict[str, int]) -> "SelectorPreguntas":
+        """Selector armado con conteos ya calculados (p. ej. por un GROUP BY en SQLite)."""
+        sel = cls.__new__(cls)
+        sel.db = None
+        sel.total, sel.conteos, sel.sin_clave = total, conteos, sin_clave
+        return sel
+
+    def estado(self) -> Tuple[int, Dict[str, Dict[Any, int]], Dict[str, int]]:
+        """Foto del estado (nunca modifico los dicts en sitio, así que no copio)."""
+        return self.total, self.conteos, self.sin_clave
+
+    def restaurar(self, estado: Tuple[int, Dict[str, Dict[Any, int]], Dict[str, int]]) -> None:
+        self.total, self.conteos, self.sin_clave = estado
+
+    def descartar(self, fuera: int) -> None:
+        """
+        Resto de los conteos lo que aportaban los autos de 'fuera': si son pocos, por sus
+        filas de la matriz; si son muchos, un AND + popcount por (clave, valor).
+        """
+        if not fuera:
+            return
+        db = self.db
+        n_fuera = _contar(fuera)
+        pares = sum(len(tabla) for tabla in self.conteos.values())
+        if n_fuera * len(db._columnas) * SELECTOR_COSTO_FILA <= pares * (db._todos.bit_length() // 64 + 1):
+            self._restar_filas(_posiciones(fuera))
+        else:
+            conteos = {}
+            for k, tabla in self.conteos.items():
+                conteos[k] = {v: c - _contar(db._bits(k, v) & fuera) for v, c in tabla.items() if c}
+            self.sin_clave = {k: c - _contar(fuera & ~db._bits_con_clave(k))
+                              for k, c in self.sin_clave.items()}
+            self.conteos = conteos
+        self.total -= n_fuera
+
+    def _restar_filas(self, posiciones: List[int]) -> None:
+        """Resto el valor de cada auto descartado, leído de su fila de códigos (0 = no trae el campo)."""
+        db = self.db
+        valores = [(k, list(db._codigos[k])) for k in db._columnas]   # código c -> valores[c - 1]
+        filas = db._mat[posiciones].tolist() if hasattr(db._mat, "tolist") else [db._mat[p] for p in posiciones]
+        conteos = {k: dict(tabla) for k, tabla in self.conteos.items()}   # la pila guarda los viejos
+        sin_clave = dict(self.sin_clave)
+        for j, (k, vals) in enumerate(valores):
+            tabla = conteos[k]
+            for cod in [fila[j] for fila in filas]:
+                if cod:
+                    tabla[vals[cod - 1]] -= 1
+                else:
+                    sin_clave[k] -= 1
+        self.conteos, self.sin_clave = conteos, sin_clave
+
+    def ganancia(self, key: str) -> float:
+        """
+        Bits esperados que gano preguntando 'key': log2(N) - E[log2(vivos tras responder)].
+        Los autos sin ese campo sobreviven cualquier respuesta, así que suman en todas las ramas.
+        """
+        n = self.total
+        s = self.sin_clave.get(key, 0)
+        con_valor = n - s
+        if n <= 1 or con_valor <= 0:
+            return 0.0
+        esperado = sum((c / con_valor) * math.log2(c + s)
+                       for c in self.conteos[key].values() if c > 0)
+        return math.log2(n) - esperado
+
+    def elegir(self, pendientes: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        La pregunta pendiente con más ganancia, o None si ya queda uno o ninguna separa.
+        Si no queda NINGÚN auto exacto sigo en orden fijo.
+        """
+        if not pendientes:
+            return None
+        if self.total == 0:
+            return pendientes[0]
+        if self.total == 1:
+            return None
+        mejor, mejor_g = None, 0.0
+        for a in pendientes:
+            g = self.ganancia(a["key"])
+            if g > mejor_g + 1e-12:
+                mejor, mejor_g = a, g
+        return mejor
+
+
+# ============================ SESIÓN DE JUEGO ==================================
+class SesionJuego:
+    """
+    Estado vivo de UNA partida: respuestas y el bitset de autos vivos.
+    Cada respuesta es un AND; antes guardo una foto en la pila, así deshacer es un pop.
+    """
+
+    def __init__(self, db: "CarDB", modo: Optional[str] = None):
+        self.db = db
+        self.modo = modo or MODO_PREGUNTAS
+        self.respuestas: Dict[str, Any] = {}
+        self.vivos = db._todos
+        self.n_vivos = _contar(self.vivos)
+        self.selector = SelectorPreguntas(db, self.vivos) if self.modo == "ganancia" else None
+        self._pila: List[Tuple[str, int, int, Any]] = []
+
+    def responder(self, key: str, value: Any) -> None:
+        """Guardo la respuesta y estrecho los candidatos (vacía = no descarta a nadie)."""
+        mascara = None if value in ("", None) else self.db._mascara(key, value)   # antes de tocar nada
+        estado_sel = self.selector.estado() if self.selector is not None else None
+        self._pila.append((key, self.vivos, self.n_vivos, estado_sel))
+        self.respuestas[key] = value
+        if mascara is None:
+            return
+        nuevos = self.vivos & mascara
+        fuera = self.vivos & ~nuevos
+        if fuera:
+            self.vivos = nuevos
+            self.n_vivos -= _contar(fuera)
+            if self.selector is not None:
+                self.selector.descartar(fuera)
+
+    def deshacer(self) -> Optional[str]:
+        """Quito la última respuesta en O(1). Devuelvo su clave (o None si no había)."""
+        if not self._pila:
+            return None
+        key, self.vivos, self.n_vivos, estado_sel = self._pila.pop()
+        if self.selector is not None:
+            self.selector.restaurar(estado_sel)
+        self.respuestas.pop(key, None)
+        return key
+
+    def siguiente(self, pendientes: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Próxima pregunta según el modo (o None si ya no tiene caso preguntar)."""
+        if self.selector is not None:
+            return self.selector.elegir(pendientes)
+        return pendientes[0] if pendientes else None
+
+    def candidatos(self) -> List[Dict[str, Any]]:
+        """Los autos exactos que siguen vivos (sin volver a filtrar el catálogo)."""
+        return self.db._autos_de(self.vivos)
+
+    def sincronizar(self) -> None:
+        """
+        Si el catálogo cambió a media partida (aprendí un auto), rehago el estado
+        repitiendo las respuestas en el mismo orden; la pila queda igual de útil.
+        """
+        pasos = [(key, self.respuestas.get(key, "")) for key, *_ in self._pila]
+        self.respuestas.clear()          # mismo dict: la UI lo tiene referenciado
+        self.vivos = self.db._todos
+        self.n_vivos = _contar(self.vivos)
+        if self.selector is not None:
+            self.selector = SelectorPreguntas(self.db, self.vivos)
+        self._pila = []
+        for key, value in pasos:
+            self.responder(key, value)
+
+
+# ============================ ÁRBOL DE DECISIÓN ================================
+class _Nodo:
+    """Un nodo del árbol: pregunta a hacer (None = hoja), autos vivos y un hijo por respuesta ("" = saltar)."""
+    __slots__ = ("pregunta", "n", "hijos")
+
+    def __init__(self, pregunta: Optional[str], n: int):
+        self.pregunta = pregunta
+        self.n = n
+        self.hijos: Dict[Any, "_Nodo"] = {}
+
+
+class ArbolPreguntas:
+    """
+    El modo "ganancia" precalculado: cada camino de respuestas lleva a un nodo que ya sabe
+    qué preguntar. Lo que no compilé se arma al jugarlo; se guarda en coches_db.arbol.json.
+    """
+
+    def __init__(self, db: "CarDB"):
+        self.db = db
+        self.claves = [a["key"] for a in db.attributes]
+        self._attr = {a["key"]: a for a in db.attributes}
+        self.raiz: Optional[_Nodo] = None
+        self.cambiado = False
+
+    # --- Armado ---
+    def nodo(self, vivos: int, pendientes: List[str]) -> _Nodo:
+        """Nodo para un conjunto de autos vivos y las claves que faltan preguntar."""
+        n = _contar(vivos)
+        if n == 0:            # misma regla que SelectorPreguntas.elegir
+            return _Nodo(pendientes[0] if pendientes else None, 0)
+        if n == 1 or not pendientes:
+            return _Nodo(None, n)
+        attr = SelectorPreguntas(self.db, vivos).elegir([self._attr[k] for k in pendientes])
+        return _Nodo(attr["key"] if attr else None, n)
+
+    def _vivos(self, camino: List[Tuple[str, Any]]) -> int:
+        vivos = self.db._todos
+        for k, v in camino:
+            if v not in ("", None):
+                vivos &= self.db._mascara(k, v)
+        return vivos
+
+    def _respuestas(self, key: str) -> List[Any]:
+        return [v for v in self.db._valores(key) if v not in ("", None)] + [""]
+
+    def compilar(self, max_nodos: int = ARBOL_MAX_NODOS) -> None:
+        """Armo el árbol por niveles (los nodos más usados primero) hasta max_nodos."""
+        self.raiz = self.nodo(self.db._todos, self.claves)
+        cola = deque([(self.raiz, [])])
+        hechos = 1
+        while cola and hechos < max_nodos:
+            nodo, camino = cola.popleft()
+            if nodo.pregunta is None or nodo.n == 0:
+                continue
+            k = nodo.pregunta
+            vivos = self._vivos(camino)
+            resto = [c for c in self.claves if c != k and c not in dict(camino)]
+            for v in self._respuestas(k):
+                hijo = self.nodo(vivos if v == "" else vivos & self.db._mascara(k, v), resto)
+                nodo.hijos[v] = hijo
+                cola.append((hijo, camino + [(k, v)]))
+                hechos += 1
+        self.cambiado = True
+
+    # --- aprender ---
+    def actualizar(self, autos: List[Dict[str, Any]]) -> None:
+        """
+        Un auto se agregó/cambió ('autos' = cómo era antes y cómo quedó).
+        Bajo solo por los nodos donde ese auto está vivo: recalculo su pregunta y,
+        si cambió, tiro sus hijos (se rearman al jugarlos). El resto del árbol no se toca.
+        """
+        if self.raiz is None:
+            return
+        self._revisar(self.raiz, self.db._todos, list(self.claves), autos)
+        self.cambiado = True
+
+    def _revisar(self, nodo: _Nodo, vivos: int, pendientes: List[str],
+                 autos: List[Dict[str, Any]]) -> None:
+        nuevo = self.nodo(vivos, pendientes)
+        nodo.n = nuevo.n
+        if nuevo.pregunta != nodo.pregunta:
+            nodo.pregunta, nodo.hijos = nuevo.pregunta, {}
+            return
+        k = nodo.pregunta
+        if k is None:
+            return
+        resto = [c for c in pendientes if c != k]
+        for v, hijo in nodo.hijos.items():
+            # el auto pasa por esta rama si no trae el campo o lo trae con ese valor
+            if v == "" or any(k not in a or a[k] == v for a in autos):
+                self._revisar(hijo, vivos if v == "" else vivos & self.db._mascara(k, v), resto, autos)
+
+    # --- Disco ---
+    def _a_json(self, nodo: _Nodo) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"p": nodo.pregunta, "n": nodo.n}
+        if nodo.hijos:
+            d["h"] = {json.dumps(v, ensure_ascii=False): self._a_json(h) for v, h in nodo.hijos.items()}
+        return d
+
+    def _de_json(self, d: Dict[str, Any]) -> _Nodo:
+        nodo = _Nodo(d["p"], d["n"])
+        for v, h in d.get("h", {}).items():
+            nodo.hijos[json.loads(v)] = self._de_json(h)
+        return nodo
+
+    def guardar(self, ruta: str, firma: List[Any]) -> None:
+        tmp = ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"firma": firma, "claves": self.claves, "raiz": self._a_json(self.raiz)},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, ruta)
+        self.cambiado = False
+
+    def leer(self, ruta: str, firma: List[Any]) -> bool:
+        """Cargo el árbol guardado si es de ESTE catálogo (firma y esquema); si no, False."""
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("firma") != firma or data.get("claves") != self.claves:
+            return False
+        self.raiz = self._de_json(data["raiz"])
+        self.cambiado = False
+        return True
+
+
+class SesionArbol(SesionJuego):
+    """
+    SesionJuego del modo "ganancia" que camina el ArbolPreguntas (un hijo por paso).
+    El bitset de vivos solo lo armo si alguien lo pide.
+    """
+
+    def __init__(self, db: "CarDB", modo: Optional[str] = None):
+        self.db = db
+        self.modo = "ganancia"
+        self.arbol = db.arbol
+        self.respuestas: Dict[str, Any] = {}
+        self._camino: List[_Nodo] = [self.arbol.raiz]
+        self._pila: List[str] = []
+        self._vivos: Optional[int] = db._todos
+
+    @property
+    def n_vivos(self) -> int:
+        return self._camino[-1].n
+
+    @property
+    def vivos(self) -> int:
+        if self._vivos is None:
+            self._vivos = self.arbol._vivos(list(self.respuestas.items()))
+        return self._vivos
+
+    def responder(self, key: str, value: Any) -> None:
+        # Primero busco (o armo) el hijo; recién después toco la sesión
+        nodo = self._camino[-1]
+        v = "" if value in ("", None) else value
+        vivos = self._vivos if v == "" else None
+        hijo = nodo.hijos.get(v) if key == nodo.pregunta else None
+        if hijo is None:
+            vivos = self.vivos if v == "" else self.vivos & self.db._mascara(key, v)
+            pendientes = [k for k in self.arbol.claves if k not in self.respuestas and k != key]
+            hijo = self.arbol.nodo(vivos, pendientes)
+            if key == nodo.pregunta:
+                nodo.hijos[v] = hijo
+                self.arbol.cambiado = True
+        self.respuestas[key] = value
+        self._pila.append(key)
+        self._vivos = vivos
+        self._camino.append(hijo)
+
+    def deshacer(self) -> Optional[str]:
+        if not self._pila:
+            return None
+        key = self._pila.pop()
+        self._camino.pop()
+        if self.respuestas.pop(key, "") not in ("", None):
+            self._vivos = None
+        return key
+
+    def siguiente(self, pendientes: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        claves = [a["key"] for a in pendientes]
+        if claves == [k for k in self.arbol.claves if k not in self.respuestas]:
+            k = self._camino[-1].pregunta
+            return self.arbol._attr[k] if k is not None else None
+        # me piden elegir entre otras preguntas: lo calculo como SesionJuego
+        return SelectorPreguntas(self.db, self.vivos).elegir(pendientes)
+
+    def sincronizar(self) -> None:
+        """El árbol ya se actualizó (aprender): vuelvo a bajar desde la raíz con las mismas respuestas."""
+        pasos = [(key, self.respuestas.get(key, "")) for key in self._pila]
+        self.respuestas.clear()
+        self.arbol = self.db.arbol
+        self._camino = [self.arbol.raiz]
+        self._pila = []
+        self._vivos = self.db._todos
+        for key, value in pasos:
+            self.responder(key, value)
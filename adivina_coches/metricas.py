@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""Métricas opcionales de los métodos calientes, con volcado JSON/Prometheus y resumen."""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .backends import CarDBBinario, CarDBParticionado, CarDBSQLite
+from .db import CarDB
+from .motor import MotorJuego
+
+
+# ============================ MÉTRICAS (OPCIONALES) ============================
+# Apagadas no cuestan nada: activar_metricas() recién envuelve los métodos de _PUNTOS_MEDIDOS.
+# Se activan con --metricas RUTA o ADIVINA_METRICAS; al salir vuelco a RUTA (.json o .prom).
+_METRICAS_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _n_respuestas(args, resultado) -> int:
+    # mejor_coincidencia(respuestas, ...) y aprender(nombre, respuestas): el primer dict
+    respuestas = next((a for a in args[1:] if isinstance(a, dict)), {})
+    return sum(1 for v in respuestas.values() if v not in ("", None))
+
+
+def _n_autos_db(args, resultado) -> int:
+    return len(args[0])
+
+
+def _bytes_archivo(args, resultado) -> Optional[int]:
+    ruta = args[0].ruta
+    return os.path.getsize(ruta) if os.path.exists(ruta) else None
+
+
+# (nombre de clase, método, unidad del tamaño, cómo medirlo)
+_PUNTOS_MEDIDOS: List[Tuple[str, str, Optional[str], Optional[Callable]]] = [
+    ("CarDB", "cargar", "autos", _n_autos_db),
+    ("CarDB", "guardar", "bytes", _bytes_archivo),
+    ("CarDB", "migrar_archivo", "autos", lambda args, r: r),
+    ("CarDB", "candidatos_exactos", "resultados", lambda args, r: len(r)),
+    ("CarDB", "mejor_coincidencia", "respuestas", _n_respuestas),
+    ("CarDB", "aprender", "respuestas", _n_respuestas),
+    ("MotorJuego", "responder", None, None),
+    ("MotorJuego", "adivinar", "opciones", lambda args, r: len(r[1])),
+    ("App", "_show_current_question", None, None),
+]
+
+
+class Metricas:
+    """Acumulador de métricas por método (seguro entre hilos: el EscritorFondo también guarda)."""
+
+    def __init__(self):
+        self._cerrojo = threading.Lock()
+        self._hilos = threading.local()
+        self.datos: Dict[str, Dict[str, Any]] = {}
+
+    def _pila(self) -> List[float]:
+        pila = getattr(self._hilos, "pila", None)
+        if pila is None:
+            pila = self._hilos.pila = []
+        return pila
+
+    def registrar(self, nombre: str, segundos: float, propio: float,
+                  unidad: Optional[str], tamano: Optional[int]) -> None:
+        with self._cerrojo:
+            d = self.datos.get(nombre)
+            if d is None:
+                d = self.datos[nombre] = {"llamadas": 0, "segundos": 0.0, "propio": 0.0, "max": 0.0,
+                                          "buckets": [0] * (len(_METRICAS_BUCKETS) + 1),
+                                          "unidad": unidad, "tamano_total": 0, "tamano_max": 0}
+            d["llamadas"] += 1
+            d["segundos"] += segundos
+            d["propio"] += propio
+            d["max"] = max(d["max"], segundos)
+            i = 0
+            while i < len(_METRICAS_BUCKETS) and segundos > _METRICAS_BUCKETS[i]:
+                i += 1
+            d["buckets"][i] += 1
+            if tamano is not None:
+                d["tamano_total"] += tamano
+                d["tamano_max"] = max(d["tamano_max"], tamano)
+
+    def envolver(self, nombre: str, fn: Callable, unidad: Optional[str],
+                 medir: Optional[Callable]) -> Callable:
+        @functools.wraps(fn)
+        def medido(*args, **kwargs):
+            pila = self._pila()
+            pila.append(0.0)          # aquí suman los métodos medidos que llame fn
+            t0 = time.perf_counter()
+            try:
+                resultado = fn(*args, **kwargs)
+            except BaseException:
+                dt = time.perf_counter() - t0
+                hijos = pila.pop()
+                if pila:
+                    pila[-1] += dt
+                self.registrar(nombre, dt, dt - hijos, unidad, None)
+                raise
+            dt = time.perf_counter() - t0
+            hijos = pila.pop()
+            if pila:
+                pila[-1] += dt
+            self.registrar(nombre, dt, dt - hijos, unidad, medir(args, resultado) if medir else None)
+            return resultado
+        medido._sin_medir = fn
+        return medido
+
+    # --- Salidas ---
+    def a_dict(self) -> Dict[str, Any]:
+        with self._cerrojo:
+            return {"buckets": list(_METRICAS_BUCKETS),
+                    "metodos": {k: dict(v, buckets=list(v["buckets"])) for k, v in self.datos.items()}}
+
+    def a_prometheus(self) -> str:
+        lineas = ["# TYPE adivina_llamadas_total counter",
+                  "# TYPE adivina_latencia_segundos histogram",
+                  "# TYPE adivina_tiempo_propio_segundos_total counter",
+                  "# TYPE adivina_tamano_total counter",
+                  "# TYPE adivina_tamano_max gauge"]
+        for nombre, d in sorted(self.a_dict()["metodos"].items()):
+            et = f'metodo="{nombre}"'
+            lineas.append(f"adivina_llamadas_total{{{et}}} {d['llamadas']}")
+            acum = 0
+            for le, c in zip(list(_METRICAS_BUCKETS) + ["+Inf"], d["buckets"]):
+                acum += c
+                lineas.append(f'adivina_latencia_segundos_bucket{{{et},le="{le}"}} {acum}')
+            lineas.append(f"adivina_latencia_segundos_sum{{{et}}} {d['segundos']:.9f}")
+            lineas.append(f"adivina_latencia_segundos_count{{{et}}} {d['llamadas']}")
+            lineas.append(f"adivina_tiempo_propio_segundos_total{{{et}}} {d['propio']:.9f}")
+            if d["unidad"]:
+                eu = f'{et},unidad="{d["unidad"]}"'
+                lineas.append(f"adivina_tamano_total{{{eu}}} {d['tamano_total']}")
+                lineas.append(f"adivina_tamano_max{{{eu}}} {d['tamano_max']}")
+        return "\n".join(lineas) + "\n"
+
+    def volcar(self, ruta: str) -> None:
+        tmp = ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            if ruta.endswith(".prom"):
+                f.write(self.a_prometheus())
+            else:
+                json.dump(self.a_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, ruta)
+
+
+def resumen_metricas(datos: Dict[str, Any]) -> str:
+    """
+    Tabla ordenada por tiempo PROPIO: qué paso se come la partida.
+    (El total de un método incluye lo que llama; el propio no, así los % suman 100.)
+    """
+    metodos = datos["metodos"]
+    total = sum(d["propio"] for d in metodos.values()) or 1.0
+    lineas = [f"{'método':<40}{'llamadas':>9}{'propio ms':>11}{'%':>6}{'media ms':>10}{'máx ms':>9}  tamaño medio"]
+    for nombre, d in sorted(metodos.items(), key=lambda kv: -kv[1]["propio"]):
+        media = d["segundos"] / d["llamadas"] * 1000 if d["llamadas"] else 0.0
+        tam = (f"{d['tamano_total'] / d['llamadas']:.1f} {d['unidad']}"
+               if d["unidad"] and d["llamadas"] else "")
+        lineas.append(f"{nombre:<40}{d['llamadas']:>9}{d['propio'] * 1000:>11.2f}"
+                      f"{100 * d['propio'] / total:>6.1f}{media:>10.3f}{d['max'] * 1000:>9.2f}  {tam}")
+    return "\n".join(lineas)
+
+
+_METRICAS: Optional[Metricas] = None
+_ENVUELTOS: List[Tuple[type, str]] = []      # (clase, método) que envolví, para desactivar_metricas
+_AL_SALIR: Optional[Callable[[], None]] = None
+
+
+def activar_metricas(ruta: Optional[str] = None) -> Metricas:
+    """
+    Envuelvo los métodos medidos (en CarDB y en cada backend que los redefine)
+    y, si hay ruta, dejo registrado el volcado + resumen al salir. Idempotente.
+    """
+    global _METRICAS, _AL_SALIR
+    if _METRICAS is not None:
+        return _METRICAS
+    _METRICAS = met = Metricas()
+    medir_clases(CarDB, CarDBSQLite, CarDBBinario, CarDBParticionado, MotorJuego)
+    if ruta:
+        def al_salir():
+            met.volcar(ruta)
+            if met.datos:
+                print(resumen_metricas(met.a_dict()), file=sys.stderr)
+        atexit.register(al_salir)
+        _AL_SALIR = al_salir
+    return met
+
+
+def desactivar_metricas() -> None:
+    """Deshago activar_metricas: cada método vuelve a ser el original y no vuelco nada al salir."""
+    global _METRICAS, _AL_SALIR
+    for cls, metodo in reversed(_ENVUELTOS):
+        setattr(cls, metodo, cls.__dict__[metodo]._sin_medir)
+    _ENVUELTOS.clear()
+    if _AL_SALIR is not None:
+        atexit.unregister(_AL_SALIR)
+    _METRICAS = _AL_SALIR = None
+
+
+def medir_clases(*clases: type) -> None:
+    """
+    Envuelvo los métodos medidos que defina cada clase, si las métricas están
+    activas. Aparte para App: la ventana (y tkinter) se importa recién al abrirla.
+    """
+    met = _METRICAS
+    if met is None:
+        return
+    for base, metodo, unidad, medir in _PUNTOS_MEDIDOS:
+        for cls in clases:
+            if cls.__name__ == base or (issubclass(cls, CarDB) and base == "CarDB"):
+                fn = cls.__dict__.get(metodo)
+                if fn is not None and not hasattr(fn, "_sin_medir"):   # una sola vez por clase
+                    setattr(cls, metodo, met.envolver(f"{cls.__name__}.{metodo}", fn, unidad, medir))
+                    _ENVUELTOS.append((cls, metodo))
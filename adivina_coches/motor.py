@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""MotorJuego: el flujo de preguntas de una partida, sin UI (lo usan la ventana, la consola y el servidor)."""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import CarDB
+
+
+# ============================ MOTOR DEL JUEGO (SIN UI) =========================
+class MotorJuego:
+    """
+    El flujo de preguntas en Python puro (sin Tk): lo usan la ventana, la CLI y el servidor.
+    Cada paso va con db.lectura() tomado y, si el catálogo cambió, antes pongo la sesión al día.
+    """
+
+    def __init__(self, db: CarDB, modo: Optional[str] = None):
+        self.db = db
+        self.modo = modo
+        self.attr_index = 0
+        self.orden: List[Dict[str, Any]] = []
+        self.sesion: Any = None
+        self._generacion = db.generacion   # del catálogo, en mi último paso
+        self.reiniciar()
+
+    @property
+    def respuestas(self) -> Dict[str, Any]:
+        return self.sesion.respuestas
+
+    @property
+    def n_vivos(self) -> int:
+        return self.sesion.n_vivos
+
+    def reiniciar(self) -> None:
+        """Dejo el estado listo para empezar y elijo la primera pregunta."""
+        with self.db.lectura():
+            self.attr_index = 0
+            self.orden = []
+            self.sesion = self.db.nueva_sesion(self.modo)
+            self._elegir_siguiente()
+            self._generacion = self.db.generacion
+
+    def _al_dia(self) -> None:
+        """Con db.lectura() tomado: si alguien aprendió desde mi último paso, rehago los candidatos."""
+        if self._generacion != self.db.generacion:
+            self.sesion.sincronizar()
+
+    def _elegir_siguiente(self) -> None:
+        """Agrego a 'orden' la próxima pregunta (si todavía tiene caso preguntar)."""
+        preguntadas = {a["key"] for a in self.orden}
+        pendientes = [a for a in self.db.attributes if a["key"] not in preguntadas]
+        attr = self.sesion.siguiente(pendientes)
+        if attr is not None:
+            self.orden.append(attr)
+
+    def pregunta_actual(self) -> Optional[Dict[str, Any]]:
+        """Devuelvo el dict de la pregunta actual (o None si ya acabé)."""
+        if 0 <= self.attr_index < len(self.orden):
+            return self.orden[self.attr_index]
+        return None
+
+    def progreso(self) -> Tuple[int, int]:
+        """
+        (paso, total) para el "Paso X/12".
+        Mientras estoy en pregunta i (0-based) es i+1; al terminar, total/total
+        (si terminé antes de tiempo, total = las que sí pregunté).
+        """
+        if self.pregunta_actual() is not None:
+            return self.attr_index + 1, len(self.db.attributes)
+        total = self.attr_index or len(self.db.attributes)
+        return total, total
+
+    def responder(self, key: str, value: Any) -> None:
+        """Guardo la respuesta y avanzo a la siguiente pregunta."""
+        with self.db.lectura():
+            self._al_dia()
+            self.sesion.responder(key, value)
+            self.attr_index += 1
+            self._elegir_siguiente()
+            self._generacion = self.db.generacion
+
+    def saltar(self) -> None:
+        """Dejo la pregunta actual sin responder y avanzo."""
+        attr = self.pregunta_actual()
+        if attr:
+            self.responder(attr["key"], "")
+
+    def atras(self) -> bool:
+        """Retrocedo una pregunta (borro su respuesta). False si ya estaba en la primera."""
+        if self.attr_index == 0:
+            return False
+        with self.db.lectura():
+            self._al_dia()
+            self.attr_index -= 1
+            del self.orden[self.attr_index + 1:]   # vuelvo a hacer la misma pregunta
+            self.sesion.deshacer()
+            self._generacion = self.db.generacion
+        return True
+
+    def adivinar(self) -> Tuple[str, List[Tuple[Dict[str, Any], int]]]:
+        """
+        Devuelvo (tipo, opciones):
+        - "exacto": un solo auto coincide con todo.
+        - "varios": hay varias coincidencias exactas (hay que refinar o aprender).
+        - "aproximado": ninguna exacta; top 3 por puntaje (con al menos un punto).
+        - "ninguno": no tengo ni idea.
+        """
+        with self.db.lectura():
+            self._al_dia()
+            exactos = self.sesion.candidatos()   # ya filtrados paso a paso
+            self._generacion = self.db.generacion
+            puntos = sum(1 for v in self.respuestas.values() if v not in ("", None))
+            if len(exactos) == 1:
+                return "exacto", [(exactos[0], puntos)]
+            if len(exactos) > 1:
+                return "varios", [(c, puntos) for c in exactos]
+            top = [(c, p) for c, p in self.db.mejores_coincidencias(self.respuestas, k=3) if p > 0]
+        if top:
+            return "aproximado", top
+        return "ninguno", []
+
+    def aprender(self, nombre: str) -> List[Dict[str, Any]]:
+        """
+        Guardo el auto con las respuestas actuales y pongo la sesión al día.
+        Devuelvo los autos que no se pueden distinguir de él (para avisar).
+        """
+        gemelos = self.db.aprender(nombre, self.respuestas)
+        self.tras_aprender()
+        return gemelos
+
+    def tras_aprender(self) -> None:
+        """El catálogo pudo cambiar: rehago los candidatos vivos."""
+        with self.db.lectura():
+            self.sesion.sincronizar()
+            self._generacion = self.db.generacion
+
+    def resumen(self) -> str:
+        """Armo un texto legible con cada pregunta y mi respuesta."""
+        lines = []
+        for a in self.db.attributes:
+            k = a["key"]
+            label = a["pregunta"]
+            v = self.respuestas.get(k, "")
+            if a.get("tipo") == "bool":
+                if v is True:
+                    vtxt = "Sí"
+                elif v is False:
+                    vtxt = "No"
+                else:
+                    vtxt = "—"
+            else:
+                vtxt = v if v else "—"
+            lines.append(f"• {label}: {vtxt}")
+        return "\n".join(lines)
+
+
+def _aviso_gemelos(nombre: str, gemelos: List[Dict[str, Any]]) -> str:
+    nombres = ", ".join(c.get("name", "—") for c in gemelos[:5]) + ("…" if len(gemelos) > 5 else "")
+    return (f"Ojo: con estas respuestas no puedo distinguir {nombre} de: {nombres}.\n"
+            "Siempre saldrán juntos como «varias coincidencias».")
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Lo que comparte todo el paquete: constantes (rutas, modos, pesos...), la
+normalización de nombres, los bitsets y Auto, el registro compacto de un auto.
+"""
+
+import itertools
+import operator
+import sys
+import unicodedata
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# NumPy es opcional: si está, el puntaje se calcula sobre una matriz en bloque;
+# si no, uso el mismo algoritmo en Python puro (más lento, mismo resultado).
+# Los demás módulos lo toman de aquí (np o None).
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# OJO: si quiero usar otro nombre/ubicación del JSON, cambio esta constante:
+DB_PATH = "coches_db.json"
+
+# Backend de almacenamiento: "json" (archivo + journal, todo en memoria)
+# o "sqlite" (una tabla con índices; no carga el catálogo entero).
+BACKEND = "json"
+SQLITE_PATH = "coches_db.sqlite3"
+# Backend "binario": catálogo compilado (se abre con mmap y se decodifica perezoso).
+BIN_PATH = "coches_db.bin"
+# Backend "particionado": una carpeta con un JSON (+ journal) por valor de PARTICION_POR
+# y un manifiesto con los valores de cada parte; solo cargo las partes que hagan falta.
+PARTICIONES_PATH = "coches_db.particiones"
+PARTICION_POR = "origen"
+
+# Orden de preguntas: "fijo" (las 12 en el orden del esquema) o "ganancia"
+# (la siguiente pregunta es la de mayor ganancia de información).
+MODO_PREGUNTAS = "fijo"
+# SelectorPreguntas.descartar: cuánto más cara es restar un auto por su fila
+# (Python, por columna) que una palabra de 64 bits de un AND + popcount (en C).
+SELECTOR_COSTO_FILA = 24
+# CarDB._reindexar: hasta cuántos valores distintos por columna armo cada bitset
+# con una pasada en C (_bitset_iguales); con más, una sola pasada en Python agrupando.
+INDICE_PASADAS_MAX = 8
+
+# Árbol de decisión precompilado (modo "ganancia"): cuántos nodos compilo por
+# adelantado (por niveles, desde la raíz); el resto se arma al jugarlo.
+ARBOL_MAX_NODOS = 2000
+
+# Cache LRU de resultados por conjunto de respuestas (ver CacheRespuestas):
+# cuántos prefijos distintos recuerdo. 0 = sin cache.
+CACHE_RESPUESTAS = 1024
+
+# Puntaje de mejor_coincidencia: "exacto" (un punto por acierto) o "difuso": cada pregunta
+# con su peso y, en las ordenadas, errar por una opción suma un cuarto. Los pesos los
+# saqué con 'evaluar --puntaje difuso --semilla 1' (sí/no 3, resto 4 fue lo que mejor dio).
+MODO_PUNTAJE = "exacto"
+PESOS_PUNTAJE = {"tipo": 4, "segmento": 4, "origen": 4, "combustible": 4, "anio": 4, "precio": 4,
+                 "puertas": 4, "traccion": 4, "transmision": 4, "lujo": 3, "electrico": 3, "hibrido": 3}
+PESO_PUNTAJE = 4          # claves sin peso propio (campos fuera del esquema)
+CERCANIA_ORDINAL = (1.0, 0.25)   # fracción del peso por distancia (0, 1, ...); más lejos = 0
+# Preguntas ordinales; None = todas sus opciones en orden. En segmento solo los
+# tamaños tienen orden (SUV/Pickup/Deportivo no están "entre" nada).
+ORDINALES = {"anio": None, "precio": None, "puertas": None,
+             "segmento": ("subcompacto", "compacto", "mediano", "grande")}
+# Respuestas que dicen lo mismo: si contesté ambas, cuentan UNA vez (la mejor).
+REDUNDANTES = [(("combustible", "hibrido"), ("hibrido", True)),
+               (("combustible", "electrico"), ("electrico", True))]
+
+# Diario (journal) de cambios: aprender() solo agrega una línea JSON al final.
+# Hago fsync cada N líneas y compacto (reescribo el JSON completo) cada M líneas.
+JOURNAL_FSYNC_CADA = 16
+JOURNAL_COMPACTAR_CADA = 500
+# Al cerrar la ventana espero a lo sumo N segundos a que el escritor de fondo termine;
+# si no llega, aviso y cierro igual (lo aprendido ya está en el journal).
+CIERRE_ESPERA = 5.0
+
+# Importar CSV / JSON lines: filas crudas que leo (y valido) por tanda.
+IMPORTAR_BLOQUE = 10000
+
+try:
+    _contar = int.bit_count          # Python 3.10+: popcount nativo
+except AttributeError:
+    def _contar(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+def _normalizar_nombre(nombre: str) -> str:
+    """Clave de búsqueda por nombre: sin acentos, casefold y espacios colapsados."""
+    if nombre.isascii():      # lo común: no hay acentos que quitar (NFKD es lo caro)
+        return " ".join(nombre.casefold().split())
+    sin_acentos = "".join(c for c in unicodedata.normalize("NFKD", nombre)
+                          if not unicodedata.combining(c))
+    return " ".join(sin_acentos.casefold().split())
+
+
+def _inferir_segmento(car: Dict[str, Any]) -> str:
+    """Segmento a partir de tipo/precio (para coches viejos o generados)."""
+    t = (car.get("tipo") or "").lower()
+    if t in {"suv","crossover"}: return "SUV/Crossover"
+    if t == "pickup": return "Pickup"
+    if t in {"coupe","convertible"}: return "Deportivo"
+    p = car.get("precio","medio")
+    return {"economico":"subcompacto","medio":"compacto","premium":"mediano","lujo":"grande"}.get(p,"compacto")
+
+
+def _bitset(posiciones: List[int], n: int) -> int:
+    """Armo el bitset de una lista de posiciones (vía bytearray, sin enteros intermedios)."""
+    buf = bytearray((n + 7) // 8)
+    for p in posiciones:
+        buf[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(buf, "little")
+
+
+_A_BINARIO = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def _bitset_iguales(columna: List[Any], valor: Any) -> int:
+    """
+    Bitset de las posiciones con columna[i] == valor, todo en C: un byte 0/1 por
+    posición, pasado a texto binario al revés (bit 0 al final) y de ahí a int.
+    """
+    if not columna:
+        return 0
+    marcas = bytes(map(operator.eq, columna, itertools.repeat(valor)))
+    return int(marcas.translate(_A_BINARIO)[::-1], 2)
+
+
+def _posiciones(mask: int) -> List[int]:
+    """
+    Paso un bitset (int de Python) a la lista de posiciones encendidas, en orden.
+    Uso el texto binario al revés (bit 0 primero) porque find() corre en C
+    y así no hago una operación de enteros grandes por cada bit.
+    """
+    bits = bin(mask)[:1:-1]
+    outs = []
+    i = bits.find("1")
+    while i != -1:
+        outs.append(i)
+        i = bits.find("1", i + 1)
+    return outs
+
+
+# ============================ AUTO (REGISTRO COMPACTO) =========================
+# Campos de un auto en el orden de _schema_attributes (name y marca primero).
+# Lo que venga fuera de esta lista (columnas de más de un CSV, ...) va a un dict aparte.
+_CAMPOS_AUTO = ("name", "marca", "tipo", "electrico", "hibrido", "combustible", "origen", "lujo",
+                "puertas", "traccion", "transmision", "anio", "precio", "segmento")
+_CAMPO = frozenset(_CAMPOS_AUTO)
+_CLAVES_ESQUEMA = _CAMPOS_AUTO[2:]   # las preguntas, sin name/marca (p. ej. para --particion-por)
+_FALTA = object()   # "no trae el campo" (None sí puede ser un valor)
+
+
+class Auto(MutableMapping):
+    """
+    Un auto del catálogo con __slots__ y textos internados, en vez de un dict por auto.
+    Por fuera es un dict (get, [], in, items...); slot sin asignar = clave ausente.
+    """
+
+    __slots__ = _CAMPOS_AUTO + ("_extra",)
+
+    def __init__(self, datos: Iterable = (), **mas: Any):
+        self._extra: Optional[Dict[str, Any]] = None
+        self.update(datos, **mas)
+
+    @classmethod
+    def de(cls, datos: Dict[str, Any]) -> "Auto":
+        """El auto compacto de un dict (si ya es un Auto, lo devuelvo tal cual)."""
+        if type(datos) is cls:
+            return datos
+        auto = cls.__new__(cls)
+        auto._extra = None
+        for k, v in datos.items():
+            if k in _CAMPO:   # lo mismo que __setitem__, sin una llamada por campo (se carga todo así)
+                setattr(auto, k, sys.intern(v) if type(v) is str and k != "name" else v)
+            else:
+                auto[k] = v
+        return auto
+
+    def __getitem__(self, k: str) -> Any:
+        if k in _CAMPO:
+            v = getattr(self, k, _FALTA)
+            if v is not _FALTA:
+                return v
+        elif self._extra is not None and k in self._extra:
+            return self._extra[k]
+        raise KeyError(k)
+
+    def get(self, k: str, defecto: Any = None) -> Any:
+        if k in _CAMPO:
+            return getattr(self, k, defecto)
+        return defecto if self._extra is None else self._extra.get(k, defecto)
+
+    def __contains__(self, k: Any) -> bool:
+        if k in _CAMPO:
+            return hasattr(self, k)
+        return self._extra is not None and k in self._extra
+
+    def __setitem__(self, k: str, v: Any) -> None:
+        if k in _CAMPO:
+            # el nombre es único por auto: internarlo solo llenaría la tabla de intern
+            setattr(self, k, sys.intern(v) if type(v) is str and k != "name" else v)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[k] = v
+
+    def __delitem__(self, k: str) -> None:
+        if k in _CAMPO:
+            try:
+                delattr(self, k)
+            except AttributeError:
+                raise KeyError(k) from None
+        elif self._extra is not None and k in self._extra:
+            del self._extra[k]
+        else:
+            raise KeyError(k)
+
+    def __iter__(self) -> Iterator[str]:
+        for k in _CAMPOS_AUTO:
+            if hasattr(self, k):
+                yield k
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(hasattr(self, k) for k in _CAMPOS_AUTO) + len(self._extra or ())
+
+    def clear(self) -> None:
+        for k in _CAMPOS_AUTO:
+            if hasattr(self, k):
+                delattr(self, k)
+        self._extra = None
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Dict común (para json y para quien necesite uno de verdad)."""
+        d = {}
+        for k in _CAMPOS_AUTO:
+            v = getattr(self, k, _FALTA)
+            if v is not _FALTA:
+                d[k] = v
+        if self._extra:
+            d.update(self._extra)
+        return d
+
+    def copy(self) -> "Auto":
+        otro = Auto.__new__(Auto)
+        for k in _CAMPOS_AUTO:
+            v = getattr(self, k, _FALTA)
+            if v is not _FALTA:
+                setattr(otro, k, v)
+        otro._extra = dict(self._extra) if self._extra else None
+        return otro
+
+    def __repr__(self) -> str:
+        return f"Auto({self.a_dict()!r})"
+
+
+def _valores(car: Dict[str, Any], claves: Tuple[str, ...]) -> Tuple[Any, ...]:
+    """Los valores de 'claves' en ese orden (_FALTA si no está), de un Auto o de un dict común."""
+    return tuple(car.get(k, _FALTA) for k in claves)
+
+
+def _columna(autos: List[Dict[str, Any]], clave: str) -> List[Any]:
+    """
+    Los valores de UNA clave en todos los autos (_FALTA si no la trae). Con Auto es
+    un attrgetter sobre el slot, en C; si a alguno le falta (o son dicts), auto por auto.
+    """
+    if clave in _CAMPO:
+        try:
+            return list(map(operator.attrgetter(clave), autos))
+        except AttributeError:
+            pass
+    return [car.get(clave, _FALTA) for car in autos]
+
+
+def _a_json(o: Any) -> Any:
+    """'default' de json.dumps: un Auto se escribe como su dict."""
+    if isinstance(o, Auto):
+        return o.a_dict()
+    raise TypeError(f"{type(o).__name__} no es serializable a JSON")
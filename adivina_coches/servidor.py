@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""ServidorJuego: muchas partidas por TCP o socket Unix, una línea JSON por pedido."""
+
+import asyncio
+import functools
+import itertools
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .db import CarDB
+from .motor import MotorJuego
+
+
+# ============================ SERVIDOR (ASYNCIO, JSON LINES) ===================
+class ServidorJuego:
+    """
+    Muchas partidas a la vez sobre UN solo CarDB, una línea JSON por pedido:
+      {"op": "start"}                                -> crea sesión
+      {"op": "answer", "sesion": id, "valor": v}     -> responde la pregunta actual
+      {"op": "skip" | "back" | "guess" | "end", "sesion": id}
+      {"op": "learn", "sesion": id, "nombre": "..."}    -> estado + "gemelos" (indistinguibles)
+      {"op": "stats"}                                -> estadísticas de la cache de respuestas
+    Una conexión solo toca sus sesiones. Aprender y refrescar van en orden a un hilo aparte.
+    """
+
+    def __init__(self, db: CarDB, modo: Optional[str] = None, refresco: float = 1.0):
+        self.db = db
+        self.modo = modo
+        self.refresco = refresco
+        self.sesiones: Dict[str, MotorJuego] = {}
+        self._ids = itertools.count(1)
+        self._cola: Optional[asyncio.Queue] = None
+
+    # --- Escritor único ---
+    async def _escritor(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            trabajo, fut = await self._cola.get()
+            try:
+                fut.set_result(await loop.run_in_executor(None, trabajo))
+            except Exception as e:   # que el error le llegue a quien lo pidió
+                fut.set_exception(e)
+            finally:
+                self._cola.task_done()
+
+    async def _encargar(self, trabajo: Callable[[], Any]) -> Any:
+        fut = asyncio.get_running_loop().create_future()
+        await self._cola.put((trabajo, fut))
+        return await fut
+
+    async def aprender(self, nombre: str, respuestas: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await self._encargar(functools.partial(self.db.aprender, nombre, dict(respuestas)))
+
+    async def _vigilar(self) -> None:
+        """Cada 'refresco' segundos: si otro proceso escribió el catálogo, me pongo al día (en el escritor)."""
+        while True:
+            await asyncio.sleep(self.refresco)
+            try:
+                await self._encargar(self.db.refrescar)
+            except OSError:
+                pass   # el archivo justo se está renombrando: lo veo la próxima vez
+
+    # --- Pedidos ---
+    def _estado(self, sid: str) -> Dict[str, Any]:
+        motor = self.sesiones[sid]
+        paso, total = motor.progreso()
+        return {"ok": True, "sesion": sid, "pregunta": motor.pregunta_actual(),
+                "paso": paso, "total": total, "vivos": motor.n_vivos}
+
+    def _motor(self, pedido: Dict[str, Any], mias: set) -> Tuple[str, MotorJuego]:
+        sid = pedido.get("sesion")
+        if not isinstance(sid, str) or sid not in mias:   # solo las que abrió esta conexión
+            raise ValueError(f"sesión desconocida: {sid!r}")
+        return sid, self.sesiones[sid]
+
+    @staticmethod
+    def _valor(attr: Dict[str, Any], valor: Any) -> Any:
+        """El valor tal cual si es una respuesta válida para 'attr' (vacío = saltar); si no, ValueError."""
+        if valor in ("", None):
+            return ""
+        if attr.get("tipo") == "bool":
+            if isinstance(valor, bool):
+                return valor
+        elif isinstance(valor, str) and valor in attr.get("opciones", ()):
+            return valor
+        raise ValueError(f"valor inválido para {attr['key']!r}: {valor!r}")
+
+    async def atender(self, pedido: Dict[str, Any], mias: set) -> Dict[str, Any]:
+        op = pedido.get("op")
+        if op == "start":
+            sid = f"s{next(self._ids)}"
+            self.sesiones[sid] = MotorJuego(self.db, self.modo)
+            mias.add(sid)
+            return self._estado(sid)
+        if op == "stats":
+            return {"ok": True, "sesiones": len(self.sesiones), "cache": self.db.cache.estadisticas()}
+
+        sid, motor = self._motor(pedido, mias)
+        if op == "answer":
+            attr = motor.pregunta_actual()
+            if attr is None:
+                raise ValueError("ya no hay preguntas; usa guess")
+            motor.responder(attr["key"], self._valor(attr, pedido.get("valor", "")))
+        elif op == "skip":
+            motor.saltar()
+        elif op == "back":
+            motor.atras()
+        elif op == "guess":
+            tipo, opciones = motor.adivinar()
+            return {"ok": True, "sesion": sid, "tipo": tipo,
+                    "opciones": [{"name": c.get("name"), "puntos": int(p)} for c, p in opciones[:10]]}
+        elif op == "learn":
+            nombre = pedido.get("nombre")
+            if not isinstance(nombre, str) or not nombre.strip():
+                raise ValueError("falta 'nombre'")
+            gemelos = await self.aprender(nombre.strip(), motor.respuestas)
+            motor.tras_aprender()
+            return dict(self._estado(sid), gemelos=[c.get("name") for c in gemelos])
+        elif op == "end":
+            self._cerrar_sesion(sid)
+            mias.discard(sid)
+            return {"ok": True, "sesion": sid}
+        else:
+            raise ValueError(f"op desconocida: {op!r}")
+        return self._estado(sid)
+
+    def _cerrar_sesion(self, sid: str) -> None:
+        self.sesiones.pop(sid, None)
+
+    async def _conexion(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        mias: set = set()
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                if not linea.strip():
+                    continue
+                try:
+                    resp = await self.atender(json.loads(linea), mias)
+                except Exception as e:
+                    resp = {"ok": False, "error": str(e)}
+                writer.write((json.dumps(resp, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for sid in mias:
+                self._cerrar_sesion(sid)
+            writer.close()
+
+    async def correr(self, host: str = "127.0.0.1", puerto: int = 8765,
+                     unix: Optional[str] = None) -> None:
+        """Escucho en TCP local o en un socket Unix hasta que me cancelen."""
+        self._cola = asyncio.Queue()
+        escritor = asyncio.create_task(self._escritor())
+        vigia = asyncio.create_task(self._vigilar())
+        # backlog grande: con miles de clientes conectando a la vez, el de 100 se llena
+        if unix:
+            server = await asyncio.start_unix_server(self._conexion, path=unix, backlog=4096)
+        else:
+            server = await asyncio.start_server(self._conexion, host, puerto, backlog=4096)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            vigia.cancel()
+            await self._cola.join()      # termino de escribir lo que esté en cola
+            escritor.cancel()
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Juego solo contra el catálogo: simulación con ruido, catálogos sintéticos,
+evaluación en paralelo sobre el .bin y el benchmark por tamaño.
+"""
+
+import concurrent.futures
+import math
+import os
+import random
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .backends import CarDBBinario, CatalogoBinario, compilar_binario
+from .catalogo import _escribir_catalogo
+from .db import CarDB, _escala_ordinal
+from .motor import MotorJuego
+from .nucleo import MODO_PUNTAJE, _inferir_segmento
+
+
+# ============================ SIMULACIÓN Y BENCHMARK ===========================
+# Marcas de ejemplo por origen (solo para que el catálogo sintético se vea creíble)
+_MARCAS_SINTETICAS = {
+    "japonesa": ["Toyota", "Honda", "Nissan", "Mazda", "Subaru"],
+    "americana": ["Ford", "Chevrolet", "Tesla", "Jeep", "Dodge"],
+    "europea": ["BMW", "Audi", "Mercedes", "Volkswagen", "Peugeot", "Renault"],
+    "china": ["BYD", "Geely", "Chery"],
+    "coreana": ["Kia", "Hyundai"],
+}
+
+
+def autos_sinteticos(n: int, semilla: int = 0):
+    """
+    Genero n autos que siguen _schema_attributes y son coherentes entre sí
+    (eléctrico => combustible eléctrico y automático, coupé => 2 puertas, etc.).
+    Es un generador: sirve para escribir catálogos de 10^6 sin tenerlos en memoria.
+    """
+    rnd = random.Random(semilla)
+    op = {a["key"]: a.get("opciones", []) for a in CarDB()._schema_attributes()}
+    for i in range(n):
+        tipo = rnd.choice(op["tipo"])
+        electrico = rnd.random() < 0.12
+        hibrido = not electrico and rnd.random() < 0.12
+        if electrico:
+            combustible = "electrico"
+        elif hibrido:
+            combustible = "hibrido"
+        else:
+            combustible = "diesel" if rnd.random() < 0.2 else "gasolina"
+        origen = rnd.choice(op["origen"])
+        marca = rnd.choice(_MARCAS_SINTETICAS[origen])
+        lujo = rnd.random() < 0.2
+        car = {
+            "name": f"{marca} Sintético {i:07d}", "marca": marca, "tipo": tipo,
+            "electrico": electrico, "hibrido": hibrido, "combustible": combustible,
+            "origen": origen, "lujo": lujo,
+            "puertas": "2" if tipo in ("coupe", "convertible") else rnd.choice(["3", "4", "5"]),
+            "traccion": "4x4" if tipo == "pickup" else rnd.choice(op["traccion"]),
+            "transmision": "automatica" if electrico else rnd.choice(op["transmision"]),
+            "anio": rnd.choice(op["anio"]),
+            "precio": rnd.choice(["premium", "lujo"]) if lujo else rnd.choice(["economico", "medio"]),
+        }
+        car["segmento"] = _inferir_segmento(car)
+        yield car
+
+
+def escribir_catalogo_sintetico(ruta: str, n: int, semilla: int = 0) -> None:
+    """Escribo un coches_db.json sintético auto por auto (write-then-rename)."""
+    _escribir_catalogo(ruta, CarDB()._schema_attributes(), autos_sinteticos(n, semilla))
+
+
+def db_sintetica(n: int, semilla: int = 0) -> CarDB:
+    """CarDB en memoria con n autos sintéticos (no toca disco)."""
+    db = CarDB(os.devnull)
+    db.attributes = db._schema_attributes()
+    db.cars = list(autos_sinteticos(n, semilla))
+    db._reindexar()
+    return db
+
+
+def _percentiles(muestras: List[float], ps=(50, 90, 99)) -> Dict[str, float]:
+    """Percentiles por rango más cercano, en milisegundos."""
+    if not muestras:
+        return {f"p{p}": 0.0 for p in ps}
+    orden = sorted(muestras)
+    return {f"p{p}": round(orden[min(len(orden) - 1, max(0, math.ceil(p / 100 * len(orden)) - 1))] * 1000, 4)
+            for p in ps}
+
+
+def _respuesta_simulada(attr: Dict[str, Any], car: Dict[str, Any], rnd: random.Random,
+                        ruido: float, saltos: float) -> Any:
+    """
+    Lo que contestaría un jugador: a veces salta, a veces se equivoca. En las
+    preguntas ordinales el error es por una opción (nadie confunde ≤2010 con 2021+).
+    """
+    if rnd.random() < saltos:
+        return ""
+    verdad = car.get(attr["key"], "")
+    if rnd.random() < ruido:
+        escala = _escala_ordinal(attr)
+        if verdad in escala:
+            i = escala.index(verdad)
+            return escala[i + 1] if i == 0 or (i + 1 < len(escala) and rnd.random() < 0.5) else escala[i - 1]
+        valores = [True, False] if attr.get("tipo") == "bool" else attr.get("opciones", [])
+        otros = [v for v in valores if v != verdad]
+        if otros:
+            return rnd.choice(otros)
+    return verdad
+
+
+def _simular_crudo(db: CarDB, autos: Iterable[Tuple[int, Dict[str, Any]]], modo: Optional[str], ruido: float,
+                   saltos: float, semilla: int) -> Dict[str, Any]:
+    """
+    Juega cada (índice, auto) de 'autos' (el escondido) y devuelve conteos + muestras de tiempo sin resumir.
+    El ruido sale de la semilla Y el índice del auto: da igual en qué trozo o proceso le tocó jugar.
+    """
+    motor = MotorJuego(db, modo)
+    crudo: Dict[str, Any] = {"juegos": 0, "aciertos": 0, "en_top3": 0, "empates": 0, "preguntas": 0,
+                             "cache_aciertos": 0, "cache_fallos": 0,
+                             "juego": [], "candidatos_exactos": [], "mejor_coincidencia": []}
+    cache_antes = (db.cache.aciertos, db.cache.fallos)
+    for i, car in autos:
+        rnd = random.Random(f"{semilla}/{i}")
+        t0 = time.perf_counter()
+        motor.reiniciar()
+        while True:
+            attr = motor.pregunta_actual()
+            if attr is None:
+                break
+            motor.responder(attr["key"], _respuesta_simulada(attr, car, rnd, ruido, saltos))
+        tipo, opciones = motor.adivinar()
+        crudo["juego"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        db.candidatos_exactos(motor.respuestas)
+        crudo["candidatos_exactos"].append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        db.mejor_coincidencia(motor.respuestas)
+        crudo["mejor_coincidencia"].append(time.perf_counter() - t0)
+
+        crudo["juegos"] += 1
+        crudo["preguntas"] += motor.attr_index
+        nombres = [c.get("name") for c, _ in opciones]
+        if tipo == "varios":
+            crudo["empates"] += 1
+        elif nombres and nombres[0] == car.get("name"):
+            crudo["aciertos"] += 1
+        if car.get("name") in nombres[:3]:
+            crudo["en_top3"] += 1
+    # Solo lo de ESTA tanda (un hijo del pool juega varios trozos con la misma cache)
+    crudo["cache_aciertos"] = db.cache.aciertos - cache_antes[0]
+    crudo["cache_fallos"] = db.cache.fallos - cache_antes[1]
+    return crudo
+
+
+def _resumir(crudo: Dict[str, Any], n_autos: int) -> Dict[str, Any]:
+    jugados = crudo["juegos"]
+    pedidos = crudo["cache_aciertos"] + crudo["cache_fallos"]
+    return {
+        "autos": n_autos,
+        "juegos": jugados,
+        "aciertos": crudo["aciertos"],
+        "empates": crudo["empates"],
+        "precision": crudo["aciertos"] / jugados if jugados else 0.0,
+        "en_top3": crudo["en_top3"] / jugados if jugados else 0.0,
+        "preguntas_promedio": crudo["preguntas"] / jugados if jugados else 0.0,
+        "latencia_ms": {k: _percentiles(crudo[k]) for k in ("juego", "candidatos_exactos", "mejor_coincidencia")},
+        "cache": {"aciertos": crudo["cache_aciertos"], "fallos": crudo["cache_fallos"],
+                  "tasa_aciertos": round(crudo["cache_aciertos"] / pedidos, 4) if pedidos else 0.0},
+    }
+
+
+def _muestra(n: int, limite: Optional[int], semilla: int) -> List[int]:
+    """Todos los índices, o una muestra fija (misma semilla = misma muestra)."""
+    if limite is None or limite >= n:
+        return list(range(n))
+    return sorted(random.Random(semilla).sample(range(n), limite))
+
+
+def simular(db: CarDB, modo: Optional[str] = None, ruido: float = 0.0, saltos: float = 0.0,
+            limite: Optional[int] = None, semilla: int = 0) -> Dict[str, Any]:
+    """
+    Juego solo: cada auto (o una muestra de 'limite') es el escondido, y sigue en el catálogo.
+    ruido/saltos: probabilidad de contestar mal o saltar. Mido aciertos, top 3, preguntas y latencias.
+    """
+    n = len(db)
+    elegidos = set(_muestra(n, limite, semilla))
+    # Por iterar_autos: sqlite no tiene self.cars (y el binario no decodifica de más)
+    autos = [(i, car) for i, car in enumerate(db.iterar_autos()) if i in elegidos]
+    crudo = _simular_crudo(db, autos, modo, ruido, saltos, semilla)
+    return _resumir(crudo, n)
+
+
+# --- Evaluación en paralelo (pool de procesos sobre el catálogo binario) ---
+# Cada hijo abre el MISMO .bin con mmap: las páginas se comparten entre procesos
+# y no se pickea la lista de dicts. El hijo guarda su CarDB en esta global.
+_DB_HIJO: Optional[CarDB] = None
+
+
+def _iniciar_hijo(ruta_bin: str, puntaje: Optional[str] = None) -> None:
+    global _DB_HIJO
+    db = CarDBBinario(os.devnull, ruta_bin)
+    db.abrir_binario()
+    db.puntaje = puntaje or MODO_PUNTAJE
+    _DB_HIJO = db
+
+
+def _evaluar_trozo(indices: List[int], modo: Optional[str], ruido: float, saltos: float,
+                   semilla: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    crudo = _simular_crudo(_DB_HIJO, [(i, _DB_HIJO.cars[i]) for i in indices], modo, ruido, saltos, semilla)
+    crudo["pid"] = os.getpid()
+    crudo["segundos"] = time.perf_counter() - t0
+    return crudo
+
+
+def evaluar_paralelo(ruta_bin: str, procesos: Optional[int] = None, modo: Optional[str] = None,
+                     ruido: float = 0.0, saltos: float = 0.0, limite: Optional[int] = None,
+                     semilla: int = 0, puntaje: Optional[str] = None) -> Dict[str, Any]:
+    """
+    simular() repartido en un ProcessPoolExecutor sobre el mmap del .bin; da el mismo
+    reporte con cualquier -j, más los tiempos de cada proceso.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    cat = CatalogoBinario(ruta_bin)
+    n = len(cat)
+    cat.cerrar()
+    indices = _muestra(n, limite, semilla)
+    tam = max(1, math.ceil(len(indices) / (procesos * 4)))
+    trozos = [indices[i:i + tam] for i in range(0, len(indices), tam)]
+
+    t0 = time.perf_counter()
+    total: Dict[str, Any] = {"juegos": 0, "aciertos": 0, "en_top3": 0, "empates": 0, "preguntas": 0,
+                             "cache_aciertos": 0, "cache_fallos": 0,
+                             "juego": [], "candidatos_exactos": [], "mejor_coincidencia": []}
+    por_proceso: Dict[int, Dict[str, float]] = {}
+    with concurrent.futures.ProcessPoolExecutor(procesos, initializer=_iniciar_hijo,
+                                                initargs=(ruta_bin, puntaje)) as pool:
+        futuros = [pool.submit(_evaluar_trozo, t, modo, ruido, saltos, semilla) for t in trozos]
+        for fut in concurrent.futures.as_completed(futuros):
+            crudo = fut.result()
+            for k, v in crudo.items():
+                if k in total:
+                    total[k] += v
+            hijo = por_proceso.setdefault(crudo["pid"], {"juegos": 0, "segundos": 0.0})
+            hijo["juegos"] += crudo["juegos"]
+            hijo["segundos"] += crudo["segundos"]
+    pared = time.perf_counter() - t0
+
+    reporte = _resumir(total, n)
+    reporte["procesos"] = procesos
+    reporte["segundos"] = round(pared, 3)
+    reporte["juegos_por_segundo"] = round(total["juegos"] / pared, 1) if pared else 0.0
+    reporte["por_proceso"] = [{"pid": pid, "juegos": h["juegos"], "segundos": round(h["segundos"], 3)}
+                              for pid, h in sorted(por_proceso.items())]
+    return reporte
+
+
+def evaluar(db: CarDB, modo: Optional[str] = None, limite: Optional[int] = None) -> Dict[str, Any]:
+    """Juego solo contra cada auto respondiendo la verdad (simular sin ruido ni saltos)."""
+    return simular(db, modo, limite=limite)
+
+
+def benchmark(tamanos: List[int], juegos: int = 200, modo: Optional[str] = None,
+              ruido: float = 0.0, saltos: float = 0.0, semilla: int = 0,
+              procesos: int = 1, puntaje: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Corro simular() sobre catálogos sintéticos de cada tamaño; sale un reporte por tamaño.
+    Con procesos > 1 compilo cada catálogo a un .bin temporal y uso evaluar_paralelo.
+    """
+    reportes = []
+    for n in tamanos:
+        t0 = time.perf_counter()
+        db = db_sintetica(n, semilla)
+        db.puntaje = puntaje or MODO_PUNTAJE
+        armado = time.perf_counter() - t0
+        if procesos > 1:
+            with tempfile.TemporaryDirectory() as tmp:
+                ruta_bin = os.path.join(tmp, "sintetico.bin")
+                compilar_binario(db.cars, db.attributes, ruta_bin)
+                del db
+                rep = evaluar_paralelo(ruta_bin, procesos, modo, ruido, saltos, juegos, semilla, puntaje)
+        else:
+            rep = simular(db, modo, ruido, saltos, limite=juegos, semilla=semilla)
+        rep["armado_s"] = round(armado, 3)
+        reportes.append(rep)
+    return reportes
@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+"""
+La ventana (tkinter): App, el diálogo para aprender un auto y el panel de
+candidatos. Solo se importa para el comando "gui": la CLI, el evaluador o el
+servidor arrancan rápido y sin pantalla.
+"""
+
+import bisect
+import concurrent.futures
+import functools
+import queue
+import tkinter as tk
+from array import array
+from tkinter import messagebox, ttk
+from typing import Any, Callable, Dict, List, Optional
+
+from .db import CarDB
+from .motor import MotorJuego, _aviso_gemelos
+from .nucleo import CIERRE_ESPERA
+
+
+class LearnDialog(tk.Toplevel):
+    """
+    Ventana modal para pedir el auto correcto cuando el programa no acierta.
+    Solo junto el nombre (queda en self.nombre); guardarlo lo hace App en el escritor de fondo.
+    """
+
+    def __init__(self, parent, db: CarDB, respuestas: Dict[str, Any], guess: Optional[str] = None):
+        super().__init__(parent)
+        self.title("Aprender nuevo auto")
+        self.db = db
+        self.respuestas = respuestas
+        self.nombre: Optional[str] = None
+        self.resizable(False, False)
+
+        frm = ttk.Frame(self, padding=16)
+        frm.grid(row=0, column=0, sticky="nsew")
+
+        ttk.Label(frm, text="No acerté 😅 ¿Cuál es el auto correcto?",
+                  style="Title.TLabel").grid(row=0, column=0, columnspan=2, pady=(0,12))
+        ttk.Label(frm, text="Nombre (Marca y Modelo):").grid(row=1, column=0, sticky="w")
+        self.ent_nombre = ttk.Entry(frm, width=40)
+        self.ent_nombre.grid(row=1, column=1, sticky="ew", pady=6)
+        if guess:
+            self.ent_nombre.insert(0, guess)  # idea: prellenar con el más cercano
+
+        # Muestra rápida de lo que respondí (para revisar antes de guardar)
+        row = 2
+        for a in self.db.attributes:
+            k = a["key"]
+            ttk.Label(frm, text=a["pregunta"] + ":").grid(row=row, column=0, sticky="w")
+            val = self.respuestas.get(k, "")
+            if a.get("tipo") == "bool":
+                val = "Sí" if val is True else ("No" if val is False else "")
+            ttk.Label(frm, text=str(val)).grid(row=row, column=1, sticky="w")
+            row += 1
+
+        # Botones
+        btns = ttk.Frame(frm)
+        btns.grid(row=row, column=0, columnspan=2, pady=(12,0))
+        ttk.Button(btns, text="Guardar", command=self._guardar).grid(row=0, column=0, padx=6)
+        ttk.Button(btns, text="Cancelar", command=self.destroy).grid(row=0, column=1, padx=6)
+
+        self.grab_set()
+        self.ent_nombre.focus()
+
+    def _guardar(self):
+        nombre = self.ent_nombre.get().strip()
+        if not nombre:
+            messagebox.showwarning("Aprender", "Escribe el nombre del auto.")
+            return
+        self.nombre = nombre
+        self.destroy()
+
+
+class ListaCandidatos:
+    """
+    Panel lateral VIRTUAL: el Listbox solo tiene las filas visibles y el resto son ids.
+    Desplazar o refrescar reescribe solo las filas que cambiaron.
+    """
+
+    def __init__(self, parent, db: CarDB, filas: int = 20):
+        self.db = db
+        self.filas = filas
+        self.frame = ttk.Frame(parent, padding=(0, 20, 16, 10))
+        self.lbl = ttk.Label(self.frame, text="", style="Subtitle.TLabel")
+        self.lbl.grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 6))
+        self.lista = tk.Listbox(self.frame, height=filas, width=34, activestyle="none", exportselection=False)
+        self.barra = ttk.Scrollbar(self.frame, orient="vertical", command=self._desplazar)
+        self.lista.grid(row=1, column=0, sticky="ns")
+        self.barra.grid(row=1, column=1, sticky="ns")
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.lista.bind(evento, self._rueda)
+
+        self._ids: Any = array("q")          # todos los candidatos (solo ids)
+        self._puntos: Optional[Dict[int, int]] = None   # modo aproximado: id -> puntos
+        self._ordenados = True                # ids crecientes: puedo anclar con bisect
+        self._inicio = 0                      # primera fila visible
+        self._mostradas: List[str] = []       # lo que tiene HOY el Listbox
+        self._pintado = (None, 0)             # (ids, inicio) de lo que está pintado
+
+    def mostrar(self, ids, titulo: str, puntos: Optional[Dict[int, int]] = None) -> None:
+        """
+        Cambio la lista. Si los ids vienen en orden (exactos) anclo el scroll en el
+        primer auto que estaba visible: al estrechar, lo que veía no salta.
+        """
+        ancla = self._ids[self._inicio] if self._inicio < len(self._ids) else None
+        ordenados = puntos is None
+        if ancla is not None and ordenados and self._ordenados:
+            self._inicio = bisect.bisect_left(ids, ancla)
+        else:
+            self._inicio = 0
+        self._ids, self._puntos, self._ordenados = ids, puntos, ordenados
+        self.lbl.config(text=titulo)
+        self._pintar()
+
+    def _pintar(self) -> None:
+        n = len(self._ids)
+        self._inicio = max(0, min(self._inicio, n - self.filas))
+        fin = min(n, self._inicio + self.filas)
+        ventana = self._ids[self._inicio:fin]
+        with self.db.lectura():   # el escritor de fondo puede estar aprendiendo
+            textos = self.db.nombres_de(ventana)
+        if self._puntos is not None:
+            textos = [f"{t}  ({self._puntos[i]} pts)" for t, i in zip(textos, ventana)]
+
+        # Si solo me desplacé unas filas, corro lo que ya estaba (borro arriba o
+        # inserto arriba) en vez de reescribir toda la ventana
+        ids_antes, inicio_antes = self._pintado
+        d = self._inicio - inicio_antes
+        if ids_antes is self._ids and 0 < abs(d) < len(self._mostradas):
+            if d > 0:
+                self.lista.delete(0, d - 1)
+                self._mostradas = self._mostradas[d:]
+            else:
+                for i, texto in enumerate(textos[:-d]):
+                    self.lista.insert(i, texto)
+                self._mostradas = textos[:-d] + self._mostradas
+        self._pintado = (self._ids, self._inicio)
+
+        # Diff contra lo que ya está en el Listbox: solo toco las filas distintas
+        for i, texto in enumerate(textos):
+            if i >= len(self._mostradas):
+                self.lista.insert("end", texto)
+            elif self._mostradas[i] != texto:
+                self.lista.delete(i)
+                self.lista.insert(i, texto)
+        if len(self._mostradas) > len(textos):
+            self.lista.delete(len(textos), "end")
+        self._mostradas = textos
+        if n:
+            self.barra.set(self._inicio / n, fin / n)
+        else:
+            self.barra.set(0, 1)
+
+    def _desplazar(self, accion: str, cantidad: str, unidad: Optional[str] = None) -> None:
+        """Protocolo de la Scrollbar: ("moveto", fracción) o ("scroll", n, "units"|"pages")."""
+        if accion == "moveto":
+            self._inicio = int(float(cantidad) * len(self._ids))
+        else:
+            self._inicio += int(cantidad) * (self.filas if unidad == "pages" else 1)
+        self._pintar()
+
+    def _rueda(self, evento) -> str:
+        if getattr(evento, "num", None) in (4, 5):   # X11 manda botones 4/5
+            pasos = -3 if evento.num == 4 else 3
+        else:
+            pasos = -3 if evento.delta > 0 else 3
+        self._desplazar("scroll", str(pasos), "units")
+        return "break"
+
+
+class App(tk.Tk):
+    """Ventana principal: muestra el flujo de preguntas de MotorJuego y la lógica de adivinar."""
+
+    def __init__(self, db: CarDB, modo: Optional[str] = None):
+        super().__init__()
+        self.db = db
+        self.title("Adivina Quién — Carros 🚗")
+        self.geometry("1100x600")
+
+        # Todo el estado del cuestionario vive en el motor (sin Tk)
+        self.motor = MotorJuego(db, modo)
+        # Aprender, refrescar y escribir van en un hilo aparte (None en SQLite: ahí no hace falta);
+        # lo que termina llega a _listos y lo atiendo en el hilo de Tk (_revisar_guardado)
+        self.escritor = db.iniciar_escritor()
+        self._listos: "queue.Queue[Any]" = queue.Queue()
+        self._refrescando = False
+
+        self._create_styles()
+        self._build_ui()
+        self._show_current_question()
+        self.protocol("WM_DELETE_WINDOW", self._al_cerrar)
+        if self.escritor is not None:
+            self.after(250, self._revisar_guardado)
+        self.after(1000, self._revisar_catalogo)
+
+    @property
+    def respuestas(self) -> Dict[str, Any]:
+        return self.motor.respuestas
+
+    # Estilos mínimos (lo dejo simple y limpio)
+    def _create_styles(self):
+        style = ttk.Style(self)
+        try:
+            style.theme_use("clam")
+        except Exception:
+            pass
+        style.configure("Title.TLabel", font=("Segoe UI", 16, "bold"))
+        style.configure("Subtitle.TLabel", font=("Segoe UI", 10))
+        style.configure("Accent.TButton", padding=8)
+
+    # Construcción de la interfaz
+    def _build_ui(self):
+        # Header con título y contador Paso X/12
+        self.header = ttk.Frame(self, padding=(16,12))
+        self.header.pack(fill="x")
+        self.lbl_title = ttk.Label(self.header, text="Adivina Quién — Carros", style="Title.TLabel")
+        self.lbl_title.pack(side="left")
+        self.lbl_step = ttk.Label(self.header, text="Paso 1/12", style="Subtitle.TLabel")
+        self.lbl_step.pack(side="right")
+        self.lbl_vivos = ttk.Label(self.header, text="", style="Subtitle.TLabel")
+        self.lbl_vivos.pack(side="right", padx=12)
+
+        # Cuerpo: tarjeta con la pregunta a la izquierda y candidatos a la derecha
+        self.cuerpo = ttk.Frame(self)
+        self.cuerpo.pack(fill="both", expand=True)
+        self.panel = ListaCandidatos(self.cuerpo, self.db)
+        self.panel.frame.pack(side="right", fill="y")
+
+        # Tarjeta central
+        self.card = ttk.Frame(self.cuerpo, padding=20)
+        self.card.pack(side="left", fill="both", expand=True, padx=16, pady=10)
+
+        # Barra de progreso (de 0 a total)
+        self.progress = ttk.Progressbar(self.card, mode="determinate")
+        self.progress.grid(row=0, column=0, columnspan=3, sticky="ew", pady=(0,12))
+
+        # Título de la pregunta actual
+        self.lbl_q = ttk.Label(self.card, text="", style="Title.TLabel")
+        self.lbl_q.grid(row=1, column=0, columnspan=3, sticky="w", pady=(4,12))
+
+        # Controles: uno por tipo de pregunta, armados UNA vez. Por pregunta solo
+        # cambio valores y muestro el que toca (grid / grid_remove), nada se destruye.
+        self.frm_ctrls = ttk.Frame(self.card, padding=(0,6))
+        self.frm_ctrls.grid(row=2, column=0, columnspan=3, sticky="w")
+        self.frm_bool = ttk.Frame(self.frm_ctrls)
+        ttk.Button(self.frm_bool, text="Sí", style="Accent.TButton",
+                   command=lambda: self._answer_actual(True)).grid(row=0, column=0, padx=6, pady=6, sticky="w")
+        ttk.Button(self.frm_bool, text="No",
+                   command=lambda: self._answer_actual(False)).grid(row=0, column=1, padx=6, pady=6, sticky="w")
+        self.combo = ttk.Combobox(self.frm_ctrls, state="readonly", width=26)
+        # Entrada libre (no la uso casi, pero la dejo por si extiendo)
+        self.entry = ttk.Entry(self.frm_ctrls, width=28)
+        self.txt_resumen = tk.Text(self.frm_ctrls, width=70, height=12, state="disabled")
+        self._control = None          # el control que está a la vista
+
+        # Botones navegación
+        self.btn_back = ttk.Button(self.card, text="⬅ Atrás", command=self._back)
+        self.btn_skip = ttk.Button(self.card, text="Saltar", command=self._skip)
+        self.btn_next = ttk.Button(self.card, text="Siguiente ➡",
+                                   style="Accent.TButton", command=self._next_from_controls)
+        self.btn_back.grid(row=3, column=0, sticky="w", pady=10)
+        self.btn_skip.grid(row=3, column=1, sticky="w", pady=10)
+        self.btn_next.grid(row=3, column=2, sticky="e", pady=10)
+
+        # Barra inferior con acciones rápidas
+        self.bottom = ttk.Frame(self, padding=(16,8))
+        self.bottom.pack(fill="x")
+        ttk.Button(self.bottom, text="🎯 Adivinar ahora", style="Accent.TButton",
+                   command=self._adivinar).pack(side="left", padx=6)
+        ttk.Button(self.bottom, text="➕ Aprender este auto",
+                   command=self._aprender_directo).pack(side="left", padx=6)
+        ttk.Button(self.bottom, text="🔄 Reiniciar",
+                   command=self._reiniciar).pack(side="left", padx=6)
+        self.lbl_guardado = ttk.Label(self.bottom, text="", style="Subtitle.TLabel")
+        self.lbl_guardado.pack(side="right", padx=6)
+
+        # Layout flexible
+        for col in (0, 1, 2):
+            self.card.grid_columnconfigure(col, weight=1)
+        self.card.grid_rowconfigure(2, weight=1)
+
+    # Helpers de flujo
+    def _current_attr(self) -> Optional[Dict[str, Any]]:
+        """Devuelvo el dict de la pregunta actual (o None si ya acabé)."""
+        return self.motor.pregunta_actual()
+
+    def _update_progress(self):
+        """
+        Actualizo texto "Paso X/12", el contador de autos posibles
+        y el valor de la barra de progreso.
+        """
+        paso, total = self.motor.progreso()
+        on_attr = self._current_attr() is not None
+        self.lbl_step.config(text=f"Paso {paso}/{total}")
+        n = self.motor.n_vivos
+        self.lbl_vivos.config(text=f"{n} auto{'s' if n != 1 else ''} posible{'s' if n != 1 else ''}")
+        self.progress["maximum"] = total
+        # La barra refleja preguntas YA contestadas (0..total)
+        self.progress["value"] = self.motor.attr_index if on_attr else total
+
+    def _mostrar_control(self, control, **grid) -> None:
+        """Escondo el control anterior (grid_remove, no destroy) y pongo este."""
+        if control is self._control:
+            return
+        if self._control is not None:
+            self._control.grid_remove()
+        control.grid(**dict({"row": 0, "column": 0, "padx": 6, "pady": 6, "sticky": "w"}, **grid))
+        self._control = control
+
+    def _show_current_question(self):
+        """Muestro la pregunta actual (reconfigurando su control) o el resumen si ya no hay preguntas."""
+        attr = self._current_attr()
+        self._update_progress()
+        self._refrescar_candidatos()
+
+        if not attr:
+            # Ya contesté todo: enseño resumen para confirmar antes de adivinar
+            self._show_summary()
+            return
+
+        # Texto de la pregunta
+        self.lbl_q.config(text=attr["pregunta"])
+
+        # Dependiendo del tipo, muestro botones Sí/No o un combobox
+        if attr.get("tipo") == "bool":
+            self._mostrar_control(self.frm_bool)
+            self.btn_next.state(["disabled"])  # no hace falta "Siguiente" aquí
+        elif "opciones" in attr:
+            self.combo.config(values=[""] + attr["opciones"])
+            self.combo.current(0)
+            self._mostrar_control(self.combo)
+            self.btn_next.state(["!disabled"])
+        else:
+            self.entry.delete(0, "end")
+            self._mostrar_control(self.entry)
+            self.btn_next.state(["!disabled"])
+
+        # El botón Atrás solo se habilita si no estoy en la primera
+        if self.motor.attr_index == 0:
+            self.btn_back.state(["disabled"])
+        else:
+            self.btn_back.state(["!disabled"])
+
+        # El botón Saltar siempre disponible (deja la respuesta vacía)
+        self.btn_skip.state(["!disabled"])
+        # (el resumen le cambia el comando a "Adivinar", aquí lo regreso)
+        self.btn_next.config(text="Siguiente ➡", command=self._next_from_controls)
+
+    # Resumen previo a adivinar (para que pueda revisar)
+    def _show_summary(self):
+        self.lbl_q.config(text="Resumen de tus respuestas (confirma antes de adivinar)")
+
+        # Siempre el mismo Text: solo cambio su contenido
+        self.txt_resumen.config(state="normal")
+        self.txt_resumen.delete("1.0", "end")
+        self.txt_resumen.insert("end", self._build_summary_text())
+        self.txt_resumen.config(state="disabled")
+        self._mostrar_control(self.txt_resumen, columnspan=3, padx=0, pady=0, sticky="nsew")
+
+        # Aquí sí puedo regresar a corregir algo, o pasar a adivinar
+        self.btn_back.state(["!disabled"])
+        self.btn_skip.state(["disabled"])
+        self.btn_next.state(["!disabled"])
+        self.btn_next.config(text="Adivinar ➡", command=self._adivinar)
+
+    def _build_summary_text(self) -> str:
+        """Armo un texto legible con cada pregunta y mi respuesta."""
+        return self.motor.resumen()
+
+    # Guardado de respuesta y avanzar
+    def _answer(self, key: str, value: Any):
+        self.motor.responder(key, value)
+        self._show_current_question()
+
+    def _answer_actual(self, value: Any):
+        """Sí/No: los botones son fijos, así que la clave la tomo de la pregunta actual."""
+        attr = self._current_attr()
+        if attr:
+            self._answer(attr["key"], value)
+
+    # Leer control (combo/entry) y avanzar
+    def _next_from_controls(self):
+        attr = self._current_attr()
+        if not attr:
+            return
+        val = ""
+        if self._control is self.combo:
+            val = (self.combo.get() or "").strip()
+        elif self._control is self.entry:
+            val = (self.entry.get() or "").strip()
+        self._answer(attr["key"], val)
+
+    def _refrescar_candidatos(self):
+        """
+        Panel lateral: los exactos que siguen vivos; si ya no queda ninguno,
+        los más parecidos por puntaje. Los ids salen de la cache por prefijo.
+        """
+        with self.db.lectura():
+            if self.motor.n_vivos > 0:
+                ids = self.db.ids_exactos(self.respuestas)
+            else:
+                top = [(i, p) for i, p in self.db.ids_top(self.respuestas, k=100) if p > 0]
+        if self.motor.n_vivos > 0:
+            self.panel.mostrar(ids, f"Candidatos: {len(ids)}")
+        else:
+            self.panel.mostrar([i for i, _ in top], "Ninguno exacto; los más parecidos:", dict(top))
+
+    # Dejar pregunta sin responder y avanzar
+    def _skip(self):
+        if self._current_attr():
+            self.motor.saltar()
+            self._show_current_question()
+
+    # Retroceder una pregunta (borro la respuesta para re-contestar)
+    def _back(self):
+        if self.motor.atras():
+            self._show_current_question()
+
+    # ========= Lógica de adivinar / aprender =========
+    def _adivinar(self):
+        """
+        1) Intento coincidencia EXACTA: si solo hay una, pregunto si es esa.
+        2) Si hay varias exactas, aviso para refinar respuestas o aprender.
+        3) Si no hay exactas, propongo la MEJOR COINCIDENCIA (por puntaje).
+        4) Si falla, ofrezco aprender el auto.
+        """
+        tipo, opciones = self.motor.adivinar()
+        if tipo == "exacto":
+            name = opciones[0][0].get("name", "—")
+            if messagebox.askyesno("¿Es este?", f"Creo que es: {name}\n\n¿Acerté?"):
+                messagebox.showinfo("¡Adiviné!", "🎯 ¡Excelente!")
+                return
+            self._adivinar_fallido(nombre_propuesto=name)
+            return
+
+        if tipo == "varios":
+            messagebox.showinfo(
+                "Varias opciones",
+                "Hay varias coincidencias exactas. Puedes regresar y refinar tus respuestas "
+                "o pulsar «Aprender este auto» si quieres guardarlo ya."
+            )
+            return
+
+        if tipo == "aproximado":
+            name = opciones[0][0].get("name", "—")
+            if messagebox.askyesno("Tal vez sea…", f"No hay coincidencia perfecta, pero podría ser: {name}.\n\n¿Acerté?"):
+                messagebox.showinfo("¡Adiviné!", "🎯 ¡Bien por aproximación!")
+                return
+            # Si fallé con el primero, ofrezco los siguientes del ranking
+            for otro, _ in opciones[1:]:
+                otro_name = otro.get("name", "—")
+                if messagebox.askyesno("¿Entonces…?", f"¿Y si es: {otro_name}?"):
+                    messagebox.showinfo("¡Adiviné!", "🎯 ¡A la segunda!")
+                    return
+            self._adivinar_fallido(nombre_propuesto=name)
+        else:
+            self._adivinar_fallido()
+
+    def _adivinar_fallido(self, nombre_propuesto: Optional[str] = None):
+        """Modal para enseñar el auto correcto y que el programa lo aprenda."""
+        if messagebox.askyesno("Aprender", "No acerté 😅 ¿Quieres enseñarme ese auto para recordarlo la próxima?"):
+            dlg = LearnDialog(self, self.db, self.respuestas, guess=nombre_propuesto)
+            self.wait_window(dlg)
+            self._aprender(dlg.nombre)
+
+    def _aprender_directo(self):
+        """Atajo si quiero guardar el auto sin pasar por 'adivinar'."""
+        dlg = LearnDialog(self, self.db, self.respuestas)
+        self.wait_window(dlg)
+        self._aprender(dlg.nombre)
+
+    def _en_fondo(self, trabajo: Callable[[], Any], listo: Callable[[Any], None]) -> None:
+        """Corro trabajo() en el escritor de fondo y luego listo(futuro) en el hilo de Tk (sin escritor, aquí mismo)."""
+        if self.escritor is None:
+            fut: concurrent.futures.Future = concurrent.futures.Future()
+            try:
+                fut.set_result(trabajo())
+            except Exception as e:
+                fut.set_exception(e)
+            listo(fut)
+            return
+        self.escritor.encargar(trabajo).add_done_callback(lambda f: self._listos.put((listo, f)))
+
+    def _aprender(self, nombre: Optional[str]):
+        """Guardo el auto con las respuestas de ahora; el resultado lo muestra _aprendido."""
+        if not nombre:
+            return   # cancelaron el diálogo
+        if self.escritor is not None:
+            self.lbl_guardado.config(text="Guardando…")
+        self._en_fondo(functools.partial(self.db.aprender, nombre, dict(self.respuestas)),
+                       functools.partial(self._aprendido, nombre))
+
+    def _aprendido(self, nombre: str, fut):
+        try:
+            gemelos = fut.result()
+        except Exception as e:
+            self.lbl_guardado.config(text="Error al guardar")
+            messagebox.showerror("Aprender", f"No pude aprender {nombre}:\n{e}")
+            return
+        self._tras_aprender()
+        messagebox.showinfo("Aprender", f"¡Guardado!\nAprendí: {nombre}")
+        if gemelos:
+            messagebox.showwarning("Aprender", _aviso_gemelos(nombre, gemelos))
+
+    def _tras_aprender(self):
+        """El catálogo pudo cambiar: pongo la sesión al día y refresco el contador."""
+        self.motor.tras_aprender()
+        self._update_progress()
+        self._refrescar_candidatos()
+        if self.escritor is not None and self.escritor.pendiente():
+            self.lbl_guardado.config(text="Guardando…")
+
+    def _revisar_guardado(self):
+        """Cada 250 ms atiendo lo que terminó el escritor de fondo (desde el hilo de Tk)."""
+        while True:
+            try:
+                listo, fut = self._listos.get_nowait()
+            except queue.Empty:
+                break
+            listo(fut)
+        while True:
+            try:
+                ok, error = self.escritor.avisos.get_nowait()
+            except queue.Empty:
+                break
+            if ok:
+                # si llegó otro pedido mientras guardaba, todavía falta una tanda
+                self.lbl_guardado.config(text="Guardando…" if self.escritor.pendiente() else "Guardado ✓")
+            else:
+                self.lbl_guardado.config(text="Error al guardar")
+                messagebox.showerror("Guardar", f"No pude guardar el catálogo:\n{error}\n\n"
+                                                "Lo aprendido sigue en el journal; reintento en el próximo cambio.")
+        self.after(250, self._revisar_guardado)
+
+    def _revisar_catalogo(self):
+        """Cada segundo: si otro proceso (otra ventana, el servidor) aprendió algo, me pongo al día (en el escritor)."""
+        if not self._refrescando:
+            self._refrescando = True
+            self._en_fondo(self.db.refrescar, self._refrescado)
+        self.after(1000, self._revisar_catalogo)
+
+    def _refrescado(self, fut):
+        self._refrescando = False
+        try:
+            cambios = fut.result()
+        except OSError:
+            cambios = 0   # el archivo justo se está renombrando: lo veo la próxima vez
+        if cambios:
+            self.motor.tras_aprender()
+            self._update_progress()
+            self._refrescar_candidatos()
+
+    def _al_cerrar(self):
+        """Antes de cerrar la ventana espero (hasta CIERRE_ESPERA s) a que lo pendiente quede en disco."""
+        if self.escritor is not None:
+            self.lbl_guardado.config(text="Guardando…")
+            self.update_idletasks()
+            if not self.escritor.vaciar(CIERRE_ESPERA):
+                self.escritor.soltar()
+                self.lbl_guardado.config(text="Error al guardar")
+                messagebox.showerror("Guardar", f"No terminé de guardar en {CIERRE_ESPERA:g} s y cierro igual.\n\n"
+                                                "Lo aprendido ya está en el journal: se aplica al abrir de nuevo.")
+        self.destroy()
+
+    def _reiniciar(self):
+        """Reinicio el flujo de preguntas desde cero."""
+        self.motor.reiniciar()
+        self._show_current_question()
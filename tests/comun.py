@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Pongo la raíz del repo en sys.path una sola vez, para importar el paquete adivina_coches desde las pruebas."""
+
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
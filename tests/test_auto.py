@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Auto: se usa como un dict (slot sin asignar = clave ausente), con _extra para lo que no es del esquema."""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.db import CarDB
+from adivina_coches.nucleo import Auto, _a_json
+
+
+class ComoDict(unittest.TestCase):
+
+    def test_slot_vacio_es_clave_ausente(self):
+        a = Auto(name="Kia Rio", tipo="sedan")
+        self.assertNotIn("anio", a)
+        self.assertIsNone(a.get("anio"))
+        self.assertEqual(a.get("anio", "?"), "?")
+        with self.assertRaises(KeyError):
+            a["anio"]
+        with self.assertRaises(KeyError):
+            del a["anio"]
+        # "" y None son valores: la clave está
+        a["anio"], a["lujo"] = "", None
+        self.assertIn("anio", a)
+        self.assertIn("lujo", a)
+        self.assertEqual((a["anio"], a.get("lujo", "?")), ("", None))
+        self.assertEqual(len(a), 4)
+        del a["anio"]
+        self.assertNotIn("anio", a)
+        self.assertEqual(len(a), 3)
+
+    def test_extra(self):
+        a = Auto({"name": "Kia Rio", "color": "rojo"}, tipo="sedan")
+        self.assertEqual((a["color"], a.get("color")), ("rojo", "rojo"))
+        self.assertIn("color", a)
+        self.assertNotIn("llantas", a)
+        with self.assertRaises(KeyError):
+            a["llantas"]
+        # Primero los campos del esquema (en su orden), después los extra
+        self.assertEqual(list(a), ["name", "tipo", "color"])
+        self.assertEqual(a.a_dict(), {"name": "Kia Rio", "tipo": "sedan", "color": "rojo"})
+        del a["color"]
+        self.assertEqual(list(a), ["name", "tipo"])
+        with self.assertRaises(KeyError):
+            del a["color"]
+        a.clear()
+        self.assertEqual((len(a), list(a)), (0, []))
+
+    def test_igual_que_el_dict(self):
+        d = {"name": "Kia Rio", "tipo": "sedan", "lujo": False, "color": "rojo"}
+        a = Auto.de(d)
+        self.assertEqual(a, d)
+        self.assertEqual(dict(a), d)
+        self.assertEqual(json.loads(json.dumps(a, default=_a_json)), d)
+        self.assertIs(Auto.de(a), a)
+        # Lo que trae MutableMapping funciona sobre los slots
+        self.assertEqual(a.setdefault("origen", "coreana"), "coreana")
+        self.assertEqual(a.pop("origen"), "coreana")
+        a.update({"tipo": "hatchback"}, marca="Kia")
+        self.assertEqual((a["tipo"], a["marca"]), ("hatchback", "Kia"))
+
+    def test_textos_internados(self):
+        tipo = "".join(["s", "u", "v"])           # un str nuevo, no el literal
+        a, b = Auto.de({"name": "A", "tipo": tipo}), Auto(name="B", tipo="".join(["s", "u", "v"]))
+        self.assertIs(a["tipo"], sys.intern("suv"))
+        self.assertIs(a["tipo"], b["tipo"])
+
+    def test_copia_independiente(self):
+        a = Auto(name="Kia Rio", tipo="sedan", color="rojo")
+        b = a.copy()
+        b["tipo"], b["color"] = "hatchback", "azul"
+        del b["name"]
+        self.assertEqual(a.a_dict(), {"name": "Kia Rio", "tipo": "sedan", "color": "rojo"})
+        self.assertEqual(b.a_dict(), {"tipo": "hatchback", "color": "azul"})
+
+
+class CopiaAlEscribir(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = CarDB(os.path.join(self.dir, "c.json"))
+        self.db.cargar()
+        self.addCleanup(self.db.cerrar)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_aprender_no_toca_el_auto_en_sitio(self):
+        db = self.db
+        self.assertTrue(all(type(c) is Auto for c in db.cars))
+        foto = list(db.cars)                    # como la de compactar: los mismos objetos
+        viejo = db.cars[0]
+        antes = viejo.a_dict()
+        db.aprender(viejo["name"], {"precio": "lujo", "color": "gris"})
+        self.assertEqual(viejo.a_dict(), antes)
+        self.assertIs(foto[0], viejo)
+        nuevo = db.cars[0]
+        self.assertIsNot(nuevo, viejo)
+        self.assertEqual((nuevo["precio"], nuevo["color"]), ("lujo", "gris"))
+        self.assertEqual({k: v for k, v in nuevo.items() if k not in ("precio", "color")},
+                         {k: v for k, v in antes.items() if k not in ("precio", "color")})
+        self.assertIs(db.buscar_por_nombre(viejo["name"]), nuevo)
+        self.assertEqual(foto[1:], db.cars[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
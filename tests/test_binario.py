@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Catálogo binario: cuándo se recompila el .bin y que decodifique igual que el JSON."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBBinario, CatalogoBinario
+from adivina_coches.catalogo import _escribir_catalogo
+from adivina_coches.db import CarDB
+
+
+class Binario(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+        self.ruta_bin = os.path.join(self.dir, "c.bin")
+        db = CarDB(self.ruta)
+        db.cargar()        # sin archivo: escribe el catálogo semilla
+        db.aprender("Con Alias", {"tipo": "suv"})
+        db.cerrar()
+        # Un auto con alias (como los deja fusionar_duplicados): van con los extras del .bin
+        with open(self.ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        datos["cars"][0]["alias"] = ["Otro Nombre"]
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            json.dump(datos, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def abrir(self):
+        """Abro el binario y devuelvo (db, cuántas veces recompiló)."""
+        compilar = CarDBBinario.compilar
+        with mock.patch.object(CarDBBinario, "compilar", autospec=True, side_effect=compilar) as espia:
+            db = CarDBBinario(self.ruta, self.ruta_bin)
+            db.cargar()
+        self.addCleanup(db.cerrar)
+        return db, espia.call_count
+
+    def envejecer_bin(self, segundos=10):
+        """El .bin pasa a ser más viejo que el JSON y el journal (sin depender de la resolución del mtime)."""
+        st = os.stat(self.ruta_bin)
+        os.utime(self.ruta_bin, ns=(st.st_atime_ns, st.st_mtime_ns - segundos * 10 ** 9))
+
+    def test_compila_solo_si_hace_falta(self):
+        _, veces = self.abrir()
+        self.assertEqual(veces, 1)          # no había .bin
+        _, veces = self.abrir()
+        self.assertEqual(veces, 0)          # el .bin está al día
+
+    def test_json_mas_nuevo_recompila(self):
+        self.abrir()
+        db = CarDB(self.ruta)
+        db.cargar()
+        db.aprender("Del Json", {"tipo": "pickup"})
+        db.compactar()
+        db.cerrar()
+        self.envejecer_bin()
+        db, veces = self.abrir()
+        self.assertEqual(veces, 1)
+        self.assertEqual(db.buscar_por_nombre("Del Json")["tipo"], "pickup")
+
+    def test_journal_mas_nuevo_recompila(self):
+        db, _ = self.abrir()
+        db.aprender("Del Journal", {"tipo": "coupe"})   # va al journal del JSON, no al .bin
+        db.cerrar()
+        self.assertTrue(os.path.exists(db.ruta_journal))
+        self.envejecer_bin()
+        db, veces = self.abrir()
+        self.assertEqual(veces, 1)
+        self.assertEqual(db.buscar_por_nombre("Del Journal")["tipo"], "coupe")
+
+    def test_formato_viejo_recompila(self):
+        self.abrir()
+        with open(self.ruta_bin, "r+b") as f:
+            f.write(b"XXXX")                # magic que no es el mío
+        db, veces = self.abrir()
+        self.assertEqual(veces, 1)
+        with open(self.ruta, encoding="utf-8") as f:
+            self.assertEqual(len(db), len(json.load(f)["cars"]) + 1)   # + el del journal
+
+    def test_demasiados_valores_no_recompila_dos_veces(self):
+        db = CarDB(self.ruta)
+        db.cargar()
+        _escribir_catalogo(self.ruta, db.attributes, [{"name": f"Raro {i}", "tipo": f"forma {i}"} for i in range(300)])
+        db.cerrar()
+        compilar = CarDBBinario.compilar
+        with mock.patch.object(CarDBBinario, "compilar", autospec=True, side_effect=compilar) as espia:
+            with self.assertRaisesRegex(ValueError, "'tipo' tiene más de 255 valores"):
+                CarDBBinario(self.ruta, self.ruta_bin).cargar()
+        self.assertEqual(espia.call_count, 1)
+        self.assertFalse(os.path.exists(self.ruta_bin))
+
+    def test_compila_en_flujo_con_el_journal_encima(self):
+        db = CarDB(self.ruta)
+        db.cargar()
+        primero = db.cars[0]["name"]
+        db.aprender(primero.upper(), {"tipo": "van"})       # actualiza uno del JSON
+        db.aprender("Nuevo Del Journal", {"tipo": "coupe"})
+        db.cerrar()
+        # Lo que quedó de una compactación cortada va antes que el journal: gana el journal
+        with open(db.ruta_journal_viejo, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "base", "revision": 0}) + "\n")
+            f.write(json.dumps({"op": "upsert", "car": {"name": "Nuevo Del Journal", "tipo": "suv"}}) + "\n")
+            f.write(json.dumps({"op": "upsert", "car": {"name": "Solo En El Viejo", "tipo": "van"}}) + "\n")
+        with mock.patch.object(CarDB, "cargar", side_effect=AssertionError("compilar cargó el catálogo entero")):
+            CarDBBinario(self.ruta, self.ruta_bin).compilar()
+        esperado = CarDB(self.ruta)
+        esperado.cargar()           # JSON + los dos journals (y termina la compactación)
+        esperado.cerrar()
+        cat = CatalogoBinario(self.ruta_bin)
+        try:
+            def lleno(car):
+                return {k: v for k, v in car.items() if v != ""}
+            self.assertEqual([lleno(cat.auto(i)) for i in range(len(cat))], [lleno(c) for c in esperado.cars])
+            self.assertEqual((cat.auto(0)["name"], cat.auto(0)["tipo"]), (primero, "van"))
+            self.assertIn("Solo En El Viejo", [cat.nombre(i) for i in range(len(cat))])
+            self.assertEqual(lleno(esperado.buscar_por_nombre("nuevo del journal"))["tipo"], "coupe")
+        finally:
+            cat.cerrar()
+
+    def test_decodifica_igual_que_el_json(self):
+        self.abrir()
+        fuente = CarDB(self.ruta)
+        fuente.cargar()             # JSON + journal: lo mismo que compiló
+        cars = list(fuente.iterar_autos())
+        fuente.cerrar()
+        cat = CatalogoBinario(self.ruta_bin)
+        try:
+            self.assertEqual(len(cat), len(cars))
+            for i, car in enumerate(cars):
+                esperado = {k: v for k, v in car.items() if v not in ("", None)}
+                obtenido = {k: v for k, v in cat.auto(i).items() if v not in ("", None)}
+                self.assertEqual(obtenido, esperado, car["name"])
+                self.assertEqual(cat.nombre(i), car["name"])
+                self.assertEqual(cat.alias(i), car.get("alias", []))
+        finally:
+            cat.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""CacheRespuestas: clave por prefijo, LRU, y que lo cacheado nunca sobreviva a un cambio del catálogo."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBBinario, CarDBParticionado, CarDBSQLite
+from adivina_coches.db import CacheRespuestas, CarDB
+
+
+class Contador:
+    """calcular() que cuenta cuántas veces lo llamaron."""
+
+    def __init__(self, valor="v"):
+        self.valor, self.veces = valor, 0
+
+    def __call__(self):
+        self.veces += 1
+        return self.valor
+
+
+class Cache(unittest.TestCase):
+
+    def test_clave_sin_orden_ni_vacios(self):
+        cache, calc = CacheRespuestas(8), Contador()
+        cache.obtener({"tipo": "suv", "origen": "europea"}, 0, ("ids",), calc)
+        cache.obtener({"origen": "europea", "tipo": "suv", "anio": ""}, 0, ("ids",), calc)
+        cache.obtener({"origen": "europea", "tipo": "suv", "lujo": None}, 0, ("ids",), calc)
+        self.assertEqual(calc.veces, 1)
+        # Otro campo del mismo prefijo es otra cuenta, en la misma entrada
+        cache.obtener({"tipo": "suv", "origen": "europea"}, 0, ("n",), calc)
+        self.assertEqual(calc.veces, 2)
+        est = cache.estadisticas()
+        self.assertEqual((est["entradas"], est["aciertos"], est["fallos"]), (1, 2, 2))
+        self.assertEqual(est["por_campo"], {"ids": {"aciertos": 2, "fallos": 1}, "n": {"aciertos": 0, "fallos": 1}})
+
+    def test_lo_que_no_se_puede_hashear_no_se_guarda(self):
+        cache, calc = CacheRespuestas(8), Contador()
+        for _ in range(2):
+            cache.obtener({"alias": ["a", "b"]}, 0, ("ids",), calc)
+        self.assertEqual(calc.veces, 2)
+        self.assertEqual(cache.estadisticas()["entradas"], 0)
+
+    def test_lru(self):
+        cache, calc = CacheRespuestas(2), Contador()
+        a, b, c = {"tipo": "a"}, {"tipo": "b"}, {"tipo": "c"}
+        cache.obtener(a, 0, ("ids",), calc)
+        cache.obtener(b, 0, ("ids",), calc)
+        cache.obtener(a, 0, ("ids",), calc)     # 'a' pasa a ser la más nueva
+        cache.obtener(c, 0, ("ids",), calc)     # sale 'b'
+        self.assertEqual(calc.veces, 3)
+        cache.obtener(a, 0, ("ids",), calc)
+        self.assertEqual(calc.veces, 3)
+        cache.obtener(b, 0, ("ids",), calc)
+        self.assertEqual(calc.veces, 4)
+        self.assertEqual(cache.estadisticas()["entradas"], 2)
+
+    def test_capacidad_cero_no_guarda(self):
+        cache, calc = CacheRespuestas(0), Contador()
+        for _ in range(3):
+            cache.obtener({"tipo": "suv"}, 0, ("ids",), calc)
+        self.assertEqual(calc.veces, 3)
+
+    def test_otra_generacion_vacia_todo(self):
+        cache, calc = CacheRespuestas(8), Contador()
+        cache.obtener({"tipo": "suv"}, 0, ("ids",), calc)
+        cache.obtener({"tipo": "suv"}, 1, ("ids",), calc)
+        self.assertEqual(calc.veces, 2)
+        self.assertEqual(cache.estadisticas()["invalidaciones"], 1)
+        cache.obtener({"tipo": "suv"}, 1, ("ids",), calc)
+        self.assertEqual(calc.veces, 2)
+
+    def test_lo_calculado_mientras_cambiaba_no_se_guarda(self):
+        cache = CacheRespuestas(8)
+
+        def aprendieron_mientras_tanto():
+            cache.obtener({"tipo": "otro"}, 1, ("ids",), Contador())   # otro hilo ya vio la generación 1
+            return "viejo"
+        self.assertEqual(cache.obtener({"tipo": "suv"}, 0, ("ids",), aprendieron_mientras_tanto), "viejo")
+        calc = Contador("nuevo")
+        self.assertEqual(cache.obtener({"tipo": "suv"}, 1, ("ids",), calc), "nuevo")
+        self.assertEqual(calc.veces, 1)
+
+
+class CacheEnLosBackends(unittest.TestCase):
+    """Tras aprender (aquí o en otro proceso) lo cacheado ya no vale, en cada backend."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        db = CarDB(self.json)
+        db.cargar()        # sin archivo: escribe el catálogo semilla
+        db.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def backends(self):
+        d = self.dir
+        return {
+            "json": lambda: CarDB(self.json),
+            "sqlite": lambda: CarDBSQLite(os.path.join(d, "c.sqlite3"), self.json),
+            "binario": lambda: CarDBBinario(self.json, os.path.join(d, "c.bin")),
+            "particionado": lambda: CarDBParticionado(os.path.join(d, "partes"), "origen", self.json),
+        }
+
+    def abrir(self, nuevo):
+        db = nuevo()
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        return db
+
+    def test_aprender_invalida(self):
+        respuestas = {"tipo": "pickup", "origen": "europea"}
+        for i, (nombre, nuevo) in enumerate(self.backends().items()):
+            with self.subTest(backend=nombre):
+                db, otro = self.abrir(nuevo), self.abrir(nuevo)
+                antes = db.nombres_de(db.ids_exactos(respuestas))
+                db.ids_exactos(respuestas)
+                self.assertGreater(db.cache.aciertos, 0)       # la segunda vez salió de la cache
+
+                db.aprender(f"Propio {i}", respuestas)
+                self.assertEqual(db.nombres_de(db.ids_exactos(respuestas)), antes + [f"Propio {i}"])
+                # Un auto que ya estaba y ahora coincide (actualizar, no agregar)
+                cambiado = next(c["name"] for c in db.iterar_autos() if c["name"] not in antes)
+                db.aprender(cambiado, respuestas)
+                self.assertIn(cambiado, db.nombres_de(db.ids_exactos(respuestas)))
+
+                otro.aprender(f"Ajeno {i}", respuestas)    # otra instancia: lo veo al refrescar
+                self.assertGreater(db.refrescar(), 0)
+                self.assertIn(f"Ajeno {i}", db.nombres_de(db.ids_exactos(respuestas)))
+                top = [db.nombres_de([p])[0] for p, _ in db.ids_top(respuestas, k=50)]
+                self.assertIn(f"Ajeno {i}", top)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Autos indistinguibles: los grupos, los gemelos al aprender, fusionar_duplicados y buscar por alias."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBBinario, CarDBParticionado, CarDBSQLite
+from adivina_coches.db import CarDB
+from adivina_coches.simulacion import escribir_catalogo_sintetico
+
+
+def _nombres(grupos):
+    return [sorted(c["name"] for c in g) for g in grupos]
+
+
+class Duplicados(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        escribir_catalogo_sintetico(self.json, 200, 5)
+        db = CarDB(self.json)
+        db.cargar()
+        base = dict(db.cars[0])
+        otro = dict(db.cars[1], tipo="limusina")     # valor fuera de las opciones: nadie más lo tiene
+        # Mismo vector y misma marca; mismo vector y otra marca; y un trío
+        db.importar_autos([dict(base, name="Copia Uno"), dict(base, name="Copia Dos"),
+                           dict(otro, name="Limo A", marca="Marca1"), dict(otro, name="Limo B", marca="Marca2"),
+                           dict(otro, name="Limo C", marca="Marca1")])
+        self.base = base["name"]
+        self.esperados = _nombres(db.grupos_indistinguibles())
+        db.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def backends(self, d=None):
+        """Cómo abrir cada backend; con 'd', sobre una copia del catálogo en esa carpeta."""
+        if d is None:
+            d, ruta = self.dir, self.json
+        else:
+            os.makedirs(d)
+            ruta = shutil.copy(self.json, os.path.join(d, "c.json"))
+        return {
+            "json": lambda: CarDB(ruta),
+            "sqlite": lambda: CarDBSQLite(os.path.join(d, "c.sqlite3"), ruta),
+            "binario": lambda: CarDBBinario(ruta, os.path.join(d, "c.bin")),
+            "particionado": lambda: CarDBParticionado(os.path.join(d, "partes"), "origen", ruta),
+        }
+
+    def abrir(self, nuevo):
+        db = nuevo()
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        return db
+
+    def test_grupos(self):
+        self.assertEqual(self.esperados, [sorted([self.base, "Copia Uno", "Copia Dos"]), ["Limo A", "Limo B", "Limo C"]])
+        for nombre, nuevo in self.backends().items():
+            with self.subTest(backend=nombre):
+                db = self.abrir(nuevo)
+                self.assertEqual(sorted(_nombres(db.grupos_indistinguibles())), sorted(self.esperados))
+
+    def test_aprender_avisa_los_gemelos(self):
+        db = self.abrir(self.backends()["json"])
+        car = db.buscar_por_nombre("Copia Uno")
+        respuestas = {a["key"]: car[a["key"]] for a in db.attributes if a["key"] in car}
+        gemelos = db.aprender("Copia Tres", respuestas)
+        self.assertEqual(sorted(c["name"] for c in gemelos), sorted([self.base, "Copia Uno", "Copia Dos"]))
+        # Cambiarle una respuesta lo saca del grupo
+        self.assertEqual(db.aprender("Copia Tres", {"tipo": "limusina", "marca": "Otra"}), [])
+        self.assertIn(sorted([self.base, "Copia Uno", "Copia Dos"]), _nombres(db.grupos_indistinguibles()))
+
+    def test_fusionar_y_buscar_por_alias(self):
+        for nombre in self.backends():
+            with self.subTest(backend=nombre):
+                nuevo = self.backends(os.path.join(self.dir, nombre))[nombre]
+                db = self.abrir(nuevo)
+                n = len(db)
+                quitados = db.fusionar_duplicados(misma_marca=True)
+                # Queda uno por marca en cada grupo: las dos copias y Limo C (misma marca que A)
+                self.assertEqual(quitados, 3)
+                self.assertEqual(len(db), n - quitados)
+                self.assertEqual(db.buscar_por_nombre("Limo C")["name"], "Limo A")
+                self.assertEqual(db.buscar_por_nombre("Limo B")["name"], "Limo B")
+                self.assertEqual(_nombres(db.grupos_indistinguibles()), [["Limo A", "Limo B"]])
+                db.cerrar()
+
+                db = self.abrir(nuevo)      # los alias quedaron en disco
+                queda = db.buscar_por_nombre("copia dos")
+                self.assertEqual(queda["name"], self.base)
+                self.assertIn("Copia Dos", queda.get("alias", []))
+                # aprender con un alias actualiza al que quedó: no vuelve a crear el duplicado
+                db.aprender("Copia Dos", {"precio": "lujo"})
+                self.assertEqual(len(db), n - quitados)
+                self.assertEqual(db.buscar_por_nombre(self.base)["precio"], "lujo")
+
+
+if __name__ == "__main__":
+    unittest.main()
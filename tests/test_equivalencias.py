@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Pruebas de equivalencia: lo rápido (índice de bitsets, matriz codificada, NumPy,
+árbol de preguntas y cada backend) tiene que dar lo mismo que el recorrido simple
+de la versión original. Se corren con `python -m unittest discover tests` (o pytest).
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches import db as modulo_db
+from adivina_coches.backends import CarDBBinario, CarDBParticionado, CarDBSQLite
+from adivina_coches.db import CarDB
+from adivina_coches.juego import SesionArbol, SesionJuego
+from adivina_coches.simulacion import db_sintetica, escribir_catalogo_sintetico
+
+
+# --- Referencia: los dos recorridos de la versión original, tal cual ---
+def exactos_original(cars, respuestas):
+    outs = []
+    for c in cars:
+        ok = True
+        for k, v in respuestas.items():
+            if v in ("", None):   # si no respondí esa, la ignoro
+                continue
+            if k not in c:        # si el coche no trae ese campo, lo ignoro
+                continue
+            if c[k] != v:         # si no coincide, descarto
+                ok = False
+                break
+        if ok:
+            outs.append(c)
+    return outs
+
+
+def mejor_original(cars, respuestas):
+    best, score = None, -1
+    for c in cars:
+        s = 0
+        for k, v in respuestas.items():
+            if v in ("", None):
+                continue
+            if k in c and c[k] == v:
+                s += 1
+        if s > score:
+            best, score = c, s
+    return best, score
+
+
+def respuestas_al_azar(attributes, rnd):
+    """Como las de una partida: solo claves del esquema, algunas saltadas ("")."""
+    respuestas = {}
+    for a in attributes:
+        if rnd.random() < 0.4:
+            continue
+        opciones = [True, False] if a.get("tipo") == "bool" else a.get("opciones", [])
+        respuestas[a["key"]] = rnd.choice(opciones + [""])
+    return respuestas
+
+
+class BackendsContraOriginal(unittest.TestCase):
+    """candidatos_exactos / mejor_coincidencia de cada backend == el recorrido original."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        escribir_catalogo_sintetico(self.json, 1500, 7)
+        origen = CarDB(self.json)
+        origen.cargar()
+        # Autos a los que les faltan campos (la regla "si no lo trae, lo ignoro")
+        # y un aprendido con un valor fuera de las opciones
+        rnd = random.Random(3)
+        incompletos = []
+        for i in range(40):
+            car = dict(rnd.choice(origen.cars), name=f"Incompleto {i}")
+            for k in rnd.sample([a["key"] for a in origen.attributes], rnd.randint(1, 8)):
+                del car[k]
+            if i % 2:
+                car["color"] = rnd.choice(["rojo", "azul"])   # clave fuera del esquema
+            incompletos.append(car)
+        # Muchos valores fuera de las opciones en una columna (el índice los agrupa en otra pasada)
+        incompletos += [dict(rnd.choice(origen.cars), name=f"Del {1990 + i}", anio=str(1990 + i)) for i in range(12)]
+        origen.importar_autos(incompletos)
+        origen.aprender("Raro Uno", {"tipo": "limusina", "anio": "2021+"})
+        self.cars = [dict(c) for c in origen.cars]
+        origen.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def backends(self):
+        d = self.dir
+        return {
+            "json": CarDB(self.json),
+            "sqlite": CarDBSQLite(os.path.join(d, "c.sqlite3"), self.json),
+            "binario": CarDBBinario(self.json, os.path.join(d, "c.bin")),
+            "particionado": CarDBParticionado(os.path.join(d, "partes"), "origen", self.json),
+        }
+
+    def test_igual_que_el_recorrido_original(self):
+        self.comparar(respuestas_al_azar)
+
+    def test_claves_fuera_del_esquema(self):
+        """marca y una clave que solo traen algunos autos (en sqlite va en 'extra') también cuentan."""
+        marcas = sorted({c["marca"] for c in self.cars})
+
+        def respuestas(attributes, rnd):
+            resp = respuestas_al_azar(attributes, rnd)
+            resp["color"] = rnd.choice(["rojo", "azul", ""])
+            if rnd.random() < 0.5:
+                resp["marca"] = rnd.choice(marcas)
+            return resp
+        self.comparar(respuestas)
+
+    def comparar(self, respuestas):
+        for nombre, db in self.backends().items():
+            with self.subTest(backend=nombre):
+                db.cargar()
+                db.puntaje = "exacto"   # el puntaje de la versión original
+                rnd = random.Random(11)
+                try:
+                    for _ in range(200):
+                        resp = respuestas(db.attributes, rnd)
+                        esperado = [c["name"] for c in exactos_original(self.cars, resp)]
+                        obtenido = [c["name"] for c in db.candidatos_exactos(resp)]
+                        mejor, puntos = mejor_original(self.cars, resp)
+                        car, pts = db.mejor_coincidencia(resp)
+                        self.assertEqual(pts, puntos, resp)
+                        self.assertEqual(obtenido, esperado, resp)
+                        self.assertEqual(car["name"], mejor["name"], resp)
+                finally:
+                    db.cerrar()
+
+
+@unittest.skipIf(modulo_db.np is None, "sin NumPy no hay con qué comparar")
+class NumpyContraPython(unittest.TestCase):
+    """El top-k con NumPy (en bloque) == el de Python puro (fila por fila, con corte), exacto y difuso."""
+
+    def comparar(self, puntaje):
+        numpy = modulo_db.np
+        con_np = db_sintetica(3000, 3)
+        con_np.puntaje = puntaje
+        con_np.aprender("Raro Uno", {"tipo": "limusina", "anio": "2021+"})
+        for i in range(40):         # crece el buffer de la matriz mientras juego
+            con_np.aprender(f"Repetido {i}", {k: v for k, v in con_np.cars[i % 7].items() if k != "name"})
+        with mock.patch.object(modulo_db, "np", None):
+            puro = db_sintetica(3000, 3)
+            puro.puntaje = puntaje
+            puro.aprender("Raro Uno", {"tipo": "limusina", "anio": "2021+"})
+            for i in range(40):
+                puro.aprender(f"Repetido {i}", {k: v for k, v in puro.cars[i % 7].items() if k != "name"})
+            self.assertIsInstance(puro._mat, list)
+            rnd = random.Random(5)
+            for i in range(300):
+                resp = respuestas_al_azar(puro.attributes, rnd)
+                if i % 5 == 0:   # respuestas redundantes: cuentan una vez
+                    resp["combustible"], resp["hibrido"] = "hibrido", True
+                k = rnd.choice([1, 3, 10, 100])
+                esperado = [(c["name"], p) for c, p in puro.mejores_coincidencias(resp, k)]
+                with mock.patch.object(modulo_db, "np", numpy):
+                    obtenido = [(c["name"], p) for c, p in con_np.mejores_coincidencias(resp, k)]
+                self.assertEqual(obtenido, esperado, (resp, k))
+
+    def test_top_k_exacto(self):
+        self.comparar("exacto")
+
+    def test_top_k_difuso(self):
+        self.comparar("difuso")
+
+
+class ArbolContraSesion(unittest.TestCase):
+    """SesionArbol (árbol precompilado) == SesionJuego en partidas al azar, también tras aprender."""
+
+    def jugar(self, db, sesion, rnd):
+        traza, orden = [], []
+        while True:
+            preguntadas = {a["key"] for a in orden}
+            attr = sesion.siguiente([a for a in db.attributes if a["key"] not in preguntadas])
+            traza.append((attr and attr["key"], sesion.n_vivos))
+            if attr is None:
+                break
+            r = rnd.random()
+            if r < 0.15 and orden:
+                sesion.deshacer()
+                orden.pop()
+                continue
+            orden.append(attr)
+            valor = "" if r < 0.3 else rnd.choice(db.cars).get(attr["key"], "")
+            sesion.responder(attr["key"], valor)
+        traza.append(sorted(c["name"] for c in sesion.candidatos()))
+        return traza
+
+    def comparar(self, db, partidas, semilla):
+        rnd1, rnd2 = random.Random(semilla), random.Random(semilla)
+        for _ in range(partidas):
+            self.assertEqual(self.jugar(db, db.nueva_sesion("ganancia"), rnd2),
+                             self.jugar(db, SesionJuego(db, "ganancia"), rnd1))
+
+    def test_partidas_al_azar(self):
+        d = tempfile.mkdtemp()
+        try:
+            db = CarDB(os.path.join(d, "c.json"))
+            db.cargar()
+            self.assertIsInstance(db.nueva_sesion("ganancia"), SesionArbol)
+            self.comparar(db, 150, 0)
+            rnd = random.Random(1)
+            for i in range(20):   # aprender actualiza el árbol en sitio
+                nombre = f"Nuevo {i}" if i % 2 else rnd.choice(db.cars)["name"]
+                db.aprender(nombre, respuestas_al_azar(db.attributes, rnd))
+            self.comparar(db, 150, 1)
+            db.cerrar()
+        finally:
+            shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""EscritorFondo: junta los pedidos (debounce), vacía al cerrar y no traba si el disco no responde."""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.db import CarDB
+
+
+class Escritor(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+        self.db = CarDB(self.ruta)
+        self.db.cargar()        # sin archivo: escribe el catálogo semilla
+        self.tandas = 0
+        persistir = self.db._persistir
+
+        def contando():
+            self.tandas += 1
+            persistir()
+        self.db._persistir = contando
+
+    def tearDown(self):
+        self.db.cerrar()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def nombres_en_disco(self):
+        db = CarDB(self.ruta)
+        db.cargar()
+        db.cerrar()
+        return [c["name"] for c in db.cars]
+
+    def test_junta_los_pedidos_seguidos(self):
+        escritor = self.db.iniciar_escritor(espera=0.3)
+        for i in range(5):
+            self.db.aprender(f"Rafaga {i}", {})
+        self.assertTrue(escritor.pendiente())
+        self.assertEqual(escritor.avisos.get(timeout=10), (True, None))
+        self.assertFalse(escritor.pendiente())
+        self.assertEqual(self.tandas, 1)
+        self.assertTrue(escritor.avisos.empty())
+
+    def test_cerrar_no_espera_el_debounce_y_deja_todo_en_disco(self):
+        self.db.iniciar_escritor(espera=30)
+        self.db.aprender("Al Cerrar", {})
+        t0 = time.monotonic()
+        self.db.cerrar()
+        self.assertLess(time.monotonic() - t0, 10)
+        self.assertEqual(self.tandas, 1)
+        self.assertIn("Al Cerrar", self.nombres_en_disco())
+
+    def test_error_se_avisa_y_el_hilo_sigue(self):
+        escritor = self.db.iniciar_escritor(espera=0)
+        persistir, veces = self.db._persistir, [0]
+
+        def la_primera_falla():
+            veces[0] += 1
+            if veces[0] == 1:
+                raise OSError("disco lleno")
+            persistir()
+        self.db._persistir = la_primera_falla
+        self.db.aprender("Primero", {})
+        ok, error = escritor.avisos.get(timeout=10)
+        self.assertFalse(ok)
+        self.assertIsInstance(error, OSError)
+        self.db.aprender("Segundo", {})
+        self.assertTrue(escritor.vaciar())
+        self.assertEqual(escritor.avisos.get(timeout=10), (True, None))
+        self.assertEqual(self.nombres_en_disco()[-2:], ["Primero", "Segundo"])
+
+    def test_encargar_corre_en_el_hilo_y_en_orden(self):
+        escritor = self.db.iniciar_escritor(espera=30)
+        hilos = []
+
+        def aprender(nombre):
+            hilos.append(threading.current_thread())
+            return self.db.aprender(nombre, {"tipo": "van"})
+        futuros = [escritor.encargar(lambda i=i: aprender(f"Encargado {i}")) for i in range(3)]
+        # cada uno ve a los anteriores como gemelos (mismas respuestas): corrieron en orden
+        self.assertEqual([len(f.result(timeout=10)) for f in futuros], [0, 1, 2])
+        self.assertEqual(set(hilos), {escritor._hilo})
+        self.assertEqual([c["name"] for c in self.db.cars[-3:]], [f"Encargado {i}" for i in range(3)])
+
+        falla = escritor.encargar(lambda: self.db.aprender("Malo", {"tipo": ["van"]}))
+        self.assertIsInstance(falla.exception(timeout=10), TypeError)
+        # vaciar también espera la tanda de disco que dejaron los trabajos (sin el debounce de 30 s)
+        self.assertTrue(escritor.vaciar(10))
+        self.assertFalse(escritor.pendiente())
+        self.assertEqual(self.nombres_en_disco()[-3:], [f"Encargado {i}" for i in range(3)])
+
+    def test_soltar_cancela_los_trabajos_sin_empezar(self):
+        escritor = self.db.iniciar_escritor(espera=0)
+        trabado, adentro = threading.Event(), threading.Event()
+
+        def lento():
+            adentro.set()
+            trabado.wait(30)
+            return "listo"
+        primero = escritor.encargar(lento)
+        segundo = escritor.encargar(lambda: "nunca")
+        self.assertTrue(adentro.wait(10))
+        self.assertTrue(escritor.pendiente())
+        self.assertFalse(escritor.vaciar(0.2))
+        escritor.soltar()
+        self.assertTrue(segundo.cancelled())
+        trabado.set()
+        self.assertEqual(primero.result(timeout=10), "listo")
+
+    def test_vaciar_con_limite_y_soltar(self):
+        escritor = self.db.iniciar_escritor(espera=0)
+        trabado = threading.Event()
+        persistir = self.db._persistir
+
+        def lento():
+            trabado.wait(30)      # el disco no responde hasta que lo suelto
+            persistir()
+        self.db._persistir = lento
+        self.db.aprender("Trabado", {})
+        t0 = time.monotonic()
+        self.assertFalse(escritor.vaciar(0.2))
+        self.assertLess(time.monotonic() - t0, 5)
+        self.assertTrue(escritor.pendiente())
+
+        escritor.soltar()
+        t0 = time.monotonic()
+        self.db.cerrar()          # ya no lo espera
+        self.assertLess(time.monotonic() - t0, 5)
+        # Lo aprendido ya estaba en el journal: otro que abre lo ve
+        self.assertIn("Trabado", self.nombres_en_disco())
+        trabado.set()
+        self.assertEqual(escritor.avisos.get(timeout=10), (True, None))   # y el hilo termina su tanda
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Importar / exportar CSV y JSON lines: ida y vuelta, validación, archivo de rechazos y upsert."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBSQLite
+from adivina_coches.db import CarDB
+from adivina_coches.intercambio import exportar, importar
+from adivina_coches.simulacion import escribir_catalogo_sintetico
+
+
+def _foto(db):
+    return sorted((dict(c) for c in db.iterar_autos()), key=lambda c: c["name"])
+
+
+class Intercambio(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        escribir_catalogo_sintetico(self.json, 150, 2)
+        db = CarDB(self.json)
+        db.cargar()
+        # Extras fuera del esquema (van en la columna "extra" del CSV)
+        db.importar_autos([dict(db.cars[0], alias=["Viejo Nombre"]),
+                           dict(db.cars[1], color="rojo", name="Con Ñandú, \"comillas\" y coma")])
+        db.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def ruta(self, nombre):
+        return os.path.join(self.dir, nombre)
+
+    def abrir(self, nombre="c.json"):
+        db = CarDB(self.ruta(nombre))
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        return db
+
+    def escribir(self, nombre, texto, encoding="utf-8"):
+        with open(self.ruta(nombre), "w", encoding=encoding, newline="") as f:
+            f.write(texto)
+        return self.ruta(nombre)
+
+    def vacio(self, nombre="vacio.json"):
+        """Un catálogo sin autos, para importar encima."""
+        with open(self.ruta(nombre), "w", encoding="utf-8") as f:
+            json.dump({"attributes": [], "cars": []}, f)
+        return self.abrir(nombre)
+
+    def test_ida_y_vuelta(self):
+        origen = self.abrir()
+        for formato in ("csv", "jsonl"):
+            with self.subTest(formato=formato):
+                archivo = self.ruta(f"autos.{formato}")
+                self.assertEqual(exportar(origen, archivo), len(origen))
+                destino = self.vacio(f"vacio_{formato}.json")
+                for bloque in (1, 7, 10000):      # el tamaño de tanda no cambia nada
+                    reporte = importar(destino, archivo, bloque=bloque)
+                    self.assertEqual(reporte["rechazadas"], 0)
+                    self.assertIsNone(reporte["rechazos"])
+                self.assertEqual(reporte["leidas"], len(origen))
+                self.assertEqual((reporte["nuevos"], reporte["actualizados"]), (0, len(origen)))
+                self.assertEqual(_foto(destino), _foto(origen))
+                self.assertFalse(os.path.exists(self.ruta("autos.rechazos.jsonl")))
+
+    def test_valores_se_normalizan(self):
+        csv = self.escribir("norm.csv", "﻿name,marca,tipo,electrico,lujo,puertas,extra\n"
+                                        "  Auto   Uno ,Marca,SUV,sí,0,4,\"{\"\"color\"\": \"\"azul\"\"}\"\n"
+                                        "Auto Dos,,Sedan, TRUE ,no,,\n")
+        db = self.vacio()
+        reporte = importar(db, csv)
+        self.assertEqual((reporte["nuevos"], reporte["rechazadas"]), (2, 0))
+        uno, dos = db.buscar_por_nombre("Auto Uno"), db.buscar_por_nombre("auto dos")
+        self.assertEqual((uno["name"], uno["tipo"], uno["electrico"], uno["lujo"], uno["puertas"], uno["color"]),
+                         ("Auto Uno", "suv", True, False, "4", "azul"))
+        self.assertEqual((dos["marca"], dos["tipo"], dos["electrico"], dos["lujo"]), ("Auto", "sedan", True, False))
+
+    def test_rechazos(self):
+        lineas = [
+            {"name": "Bueno", "tipo": "suv", "puertas": 4},
+            {"name": "Tipo Malo", "tipo": "avion"},
+            {"tipo": "suv"},
+            "{esto no es json",
+            [1, 2, 3],
+            {"name": "Dos Errores", "electrico": "quizas", "origen": "marciana"},
+            {"name": "Otro Bueno", "origen": "CHINA"},
+        ]
+        texto = "\n".join(l if isinstance(l, str) else json.dumps(l) for l in lineas) + "\n"
+        archivo = self.escribir("lote.jsonl", texto)
+        db = self.vacio()
+        reporte = importar(db, archivo, bloque=2)
+        self.assertEqual((reporte["leidas"], reporte["nuevos"], reporte["rechazadas"]), (7, 2, 5))
+        self.assertEqual(reporte["rechazos"], self.ruta("lote.rechazos.jsonl"))
+        self.assertEqual(sorted(c["name"] for c in db.cars), ["Bueno", "Otro Bueno"])
+        self.assertEqual(db.buscar_por_nombre("Otro Bueno")["origen"], "china")
+
+        with open(reporte["rechazos"], encoding="utf-8") as f:
+            rechazos = [json.loads(l) for l in f]
+        self.assertEqual([r["linea"] for r in rechazos], [2, 3, 4, 5, 6])
+        self.assertIn("tipo", rechazos[0]["error"])
+        self.assertIn("falta 'name'", rechazos[1]["error"])
+        self.assertIn("JSON inválido", rechazos[2]["error"])
+        self.assertIn("no es un objeto", rechazos[3]["error"])
+        self.assertEqual(rechazos[4]["error"].count(";"), 1)     # TODOS los problemas de la fila
+        self.assertEqual(rechazos[0]["fila"], json.dumps(lineas[1]))   # la fila tal cual
+
+    def test_csv_con_columnas_de_mas(self):
+        csv = self.escribir("raro.csv", "name,tipo\nBien,suv\nMal,suv,sobra\n")
+        db = self.vacio()
+        reporte = importar(db, csv, rechazos=self.ruta("r.jsonl"))
+        self.assertEqual((reporte["nuevos"], reporte["rechazadas"]), (1, 1))
+        with open(self.ruta("r.jsonl"), encoding="utf-8") as f:
+            self.assertIn("más columnas", json.loads(f.readline())["error"])
+
+    def test_upsert_por_nombre_y_alias(self):
+        db = self.abrir()
+        n = len(db)
+        alias = self.escribir("upd.jsonl", json.dumps({"name": "viejo nombre", "precio": "lujo"}) + "\n")
+        reporte = importar(db, alias)
+        self.assertEqual((reporte["nuevos"], reporte["actualizados"]), (0, 1))
+        self.assertEqual(len(db), n)
+        car = db.buscar_por_nombre("Viejo Nombre")
+        self.assertEqual((car["name"], car["precio"], car["alias"]), (db.cars[0]["name"], "lujo", ["Viejo Nombre"]))
+        db.cerrar()
+        self.assertEqual(self.abrir().buscar_por_nombre("viejo nombre")["precio"], "lujo")   # quedó en disco
+
+    def test_sqlite(self):
+        origen = self.abrir()
+        archivo = self.ruta("autos.csv")
+        exportar(origen, archivo)
+        db = CarDBSQLite(self.ruta("c.sqlite3"), self.ruta("no_hay.json"))
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        reporte = importar(db, archivo)
+        self.assertEqual(reporte["rechazadas"], 0)
+        nombres = {c["name"] for c in db.iterar_autos()}
+        self.assertTrue({c["name"] for c in origen.cars} <= nombres)
+        self.assertEqual(db.buscar_por_nombre("Viejo Nombre")["name"], origen.cars[0]["name"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""El journal de aprender: repetirlo al cargar, saltar la línea cortada y compactar."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches import db as modulo_db
+from adivina_coches.catalogo import SCHEMA_VERSION, _revision_catalogo
+from adivina_coches.db import CarDB
+
+
+class Journal(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+        db = CarDB(self.ruta)
+        db.cargar()        # sin archivo: escribe el catálogo semilla
+        self.semilla = [c["name"] for c in db.cars]
+        db.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def abrir(self):
+        db = CarDB(self.ruta)
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        return db
+
+    def lineas_journal(self):
+        with open(CarDB(self.ruta).ruta_journal, "rb") as f:
+            return f.read().splitlines()
+
+    def test_aprender_no_reescribe_el_json(self):
+        antes = os.stat(self.ruta)
+        db = self.abrir()
+        db.aprender("Nuevo Uno", {"tipo": "suv"})
+        db.aprender("nuevo  uno", {"origen": "europea"})   # mismo auto: upsert por nombre
+        db.cerrar()
+        despues = os.stat(self.ruta)
+        self.assertEqual((despues.st_size, despues.st_mtime_ns), (antes.st_size, antes.st_mtime_ns))
+        base, *upserts = [json.loads(l) for l in self.lineas_journal()]
+        self.assertEqual(base["op"], "base")
+        self.assertEqual([e["op"] for e in upserts], ["upsert", "upsert"])
+
+        car = self.abrir().buscar_por_nombre("Nuevo Uno")
+        self.assertEqual((car["tipo"], car["origen"]), ("suv", "europea"))
+        self.assertEqual(sum(c["name"] == "Nuevo Uno" for c in self.abrir().cars), 1)
+
+    def test_linea_cortada_se_salta(self):
+        db = self.abrir()
+        db.aprender("Entero", {"tipo": "suv"})
+        db.cerrar()
+        with open(db.ruta_journal, "ab") as f:
+            f.write(b'{"op": "upsert", "v": 5, "car": {"name": "Cort')   # se cortó la luz
+        db = self.abrir()
+        self.assertIsNotNone(db.buscar_por_nombre("Entero"))
+        self.assertIsNone(db.buscar_por_nombre("Cort"))
+        # Lo próximo va en su propia línea: la cortada no arrastra a la nueva
+        db.aprender("Despues", {"tipo": "sedan"})
+        db.cerrar()
+        nombres = [c["name"] for c in self.abrir().cars]
+        self.assertEqual(nombres, self.semilla + ["Entero", "Despues"])
+
+    def test_basura_en_el_medio_no_corta_el_resto(self):
+        db = self.abrir()
+        db.aprender("Antes", {})
+        db.cerrar()
+        with open(db.ruta_journal, "ab") as f:
+            f.write(b"{no es json\n[1, 2]\n")
+        db = self.abrir()
+        db.aprender("Luego", {})
+        db.cerrar()
+        nombres = [c["name"] for c in self.abrir().cars]
+        self.assertEqual(nombres[-2:], ["Antes", "Luego"])
+
+    def test_compactar(self):
+        db = self.abrir()
+        revision = _revision_catalogo(self.ruta)
+        db.aprender("Compactado", {"tipo": "pickup"})
+        db.compactar()
+        self.assertFalse(os.path.exists(db.ruta_journal))
+        self.assertTrue(os.path.exists(db.ruta_journal_anterior))
+        self.assertEqual(_revision_catalogo(self.ruta), revision + 1)
+        with open(self.ruta, encoding="utf-8") as f:
+            self.assertIn("Compactado", [c["name"] for c in json.load(f)["cars"]])
+        # Lo de después va a un journal nuevo, encima de la revisión nueva
+        db.aprender("Tras Compactar", {})
+        self.assertEqual(json.loads(self.lineas_journal()[0]), {"op": "base", "revision": revision + 1})
+        db.cerrar()
+        nombres = [c["name"] for c in self.abrir().cars]
+        self.assertEqual(nombres, self.semilla + ["Compactado", "Tras Compactar"])
+
+    def test_compacta_solo_cada_tantas_lineas(self):
+        with mock.patch.object(modulo_db, "JOURNAL_COMPACTAR_CADA", 3):
+            db = self.abrir()
+            db.aprender("A", {})
+            db.aprender("B", {})
+            self.assertTrue(os.path.exists(db.ruta_journal))
+            db.aprender("C", {})
+            self.assertFalse(os.path.exists(db.ruta_journal))
+        self.assertEqual([c["name"] for c in self.abrir().cars], self.semilla + ["A", "B", "C"])
+
+    def test_compactacion_cortada_se_termina_al_cargar(self):
+        db = self.abrir()
+        db.aprender("Viejo", {"tipo": "suv", "origen": "europea"})
+        db.cerrar()
+        # Se cortó entre apartar el journal y escribir el JSON nuevo; alguien siguió aprendiendo
+        os.replace(db.ruta_journal, db.ruta_journal_viejo)
+        revision = _revision_catalogo(self.ruta)
+        with open(db.ruta_journal, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "base", "revision": revision + 1}) + "\n")
+            f.write(json.dumps({"op": "upsert", "v": SCHEMA_VERSION,
+                                "car": {"name": "Viejo", "marca": "Viejo", "tipo": "suv", "origen": "asiatica"}}) + "\n")
+        db = self.abrir()
+        self.assertFalse(os.path.exists(db.ruta_journal_viejo))
+        self.assertEqual(_revision_catalogo(self.ruta), revision + 1)
+        # El apartado es más viejo: va primero y el journal nuevo gana
+        car = self.abrir().buscar_por_nombre("Viejo")
+        self.assertEqual((car["tipo"], car["origen"]), ("suv", "asiatica"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Métricas: activar envuelve los métodos calientes, desactivar los deja como estaban, y lo que se junta."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBBinario
+from adivina_coches.db import CarDB
+from adivina_coches.metricas import activar_metricas, desactivar_metricas, resumen_metricas
+from adivina_coches.motor import MotorJuego
+
+
+class Metricas(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+        self.originales = {(cls, m): cls.__dict__[m] for cls, m in
+                           ((CarDB, "cargar"), (CarDB, "aprender"), (CarDBBinario, "cargar"),
+                            (MotorJuego, "adivinar"))}
+        self.addCleanup(desactivar_metricas)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_envolver_y_desenvolver(self):
+        met = activar_metricas()
+        self.assertIs(activar_metricas(), met)      # idempotente: no envuelvo dos veces
+        for (cls, m), fn in self.originales.items():
+            self.assertIs(cls.__dict__[m]._sin_medir, fn, f"{cls.__name__}.{m}")
+        self.assertEqual(CarDB.cargar.__name__, "cargar")
+
+        desactivar_metricas()
+        for (cls, m), fn in self.originales.items():
+            self.assertIs(cls.__dict__[m], fn, f"{cls.__name__}.{m}")
+        db = CarDB(self.ruta)
+        db.cargar()
+        db.cerrar()
+        self.assertEqual(met.datos, {})             # apagadas no se junta nada
+
+        otra = activar_metricas()                   # y se pueden volver a prender
+        self.assertIsNot(otra, met)
+        self.assertIs(CarDB.__dict__["cargar"]._sin_medir, self.originales[(CarDB, "cargar")])
+
+    def test_lo_que_se_junta(self):
+        met = activar_metricas()
+        db = CarDB(self.ruta)
+        db.cargar()             # sin archivo: escribe la semilla (guardar adentro de cargar)
+        n = len(db)
+        db.aprender("Medido", {"tipo": "suv", "origen": ""})
+        motor = MotorJuego(db)
+        motor.responder("tipo", "suv")
+        motor.adivinar()
+        db.cerrar()
+
+        d = met.a_dict()["metodos"]
+        for nombre in ("CarDB.cargar", "CarDB.guardar", "CarDB.aprender", "MotorJuego.responder",
+                       "MotorJuego.adivinar"):
+            self.assertEqual(d[nombre]["llamadas"], 1, nombre)
+            self.assertEqual(sum(d[nombre]["buckets"]), 1, nombre)
+        self.assertEqual(d["CarDB.cargar"]["tamano_total"], n)
+        self.assertEqual(d["CarDB.aprender"]["tamano_total"], 1)     # solo las respuestas con valor
+        # Tiempo propio: el de cargar no incluye el guardar que llamó
+        cargar, guardar = d["CarDB.cargar"], d["CarDB.guardar"]
+        self.assertAlmostEqual(cargar["propio"] + guardar["segundos"], cargar["segundos"], places=6)
+        self.assertIn("CarDB.cargar", resumen_metricas(met.a_dict()))
+
+    def test_excepciones_se_cuentan_y_siguen(self):
+        met = activar_metricas()
+        db = CarDB(os.path.join(self.dir, "no", "existe", "c.json"))
+        with self.assertRaises(OSError):
+            db.cargar()
+        self.assertEqual(met.datos["CarDB.cargar"]["llamadas"], 1)
+
+    def test_volcar(self):
+        met = activar_metricas()
+        db = CarDB(self.ruta)
+        db.cargar()
+        db.cerrar()
+        ruta_json, ruta_prom = os.path.join(self.dir, "m.json"), os.path.join(self.dir, "m.prom")
+        met.volcar(ruta_json)
+        met.volcar(ruta_prom)
+        with open(ruta_json, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["metodos"]["CarDB.cargar"]["llamadas"], 1)
+        with open(ruta_prom, encoding="utf-8") as f:
+            prom = f.read()
+        self.assertIn('adivina_llamadas_total{metodo="CarDB.cargar"} 1', prom)
+        self.assertIn('adivina_latencia_segundos_bucket{metodo="CarDB.cargar",le="+Inf"} 1', prom)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Migraciones de esquema: archivo viejo, pasos pendientes, journal y lo aprendido (que NO se migra)."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBSQLite
+from adivina_coches.catalogo import SCHEMA_VERSION, _escribir_catalogo, _recorrer_catalogo, _version_catalogo
+from adivina_coches.db import CarDB
+
+
+class Migraciones(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def escribir(self, cars, **cabecera):
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            json.dump(dict(cabecera, attributes=[], cars=cars), f)
+
+    def test_archivo_sin_version_se_migra_una_vez(self):
+        self.escribir([{"name": "Viejo Uno", "puertas": 4, "tipo": "coupe"}, {"marca": "Solo"}])
+        db = CarDB(self.ruta)
+        db.cargar()
+        self.assertEqual(_version_catalogo(self.ruta), SCHEMA_VERSION)
+        viejo, solo = db.cars
+        self.assertEqual(viejo["puertas"], "4")
+        self.assertEqual(viejo["origen"], "americana")
+        self.assertEqual(viejo["segmento"], "Deportivo")
+        self.assertEqual(solo["name"], "Solo")
+        db.cerrar()
+        # Ya al día: cargar de nuevo no reescribe el archivo
+        mtime = os.path.getmtime(self.ruta)
+        db = CarDB(self.ruta)
+        db.cargar()
+        db.cerrar()
+        self.assertEqual(os.path.getmtime(self.ruta), mtime)
+
+    def test_solo_corre_los_pasos_pendientes(self):
+        # En la versión 3 ya tenía combustible: el paso 3 no lo toca aunque falten banderas
+        self.escribir([{"name": "A B", "marca": "A", "puertas": 4, "combustible": ""}], schema_version=3)
+        db = CarDB(self.ruta)
+        db.cargar()
+        car = db.cars[0]
+        self.assertEqual(car["puertas"], 4)          # paso 1 no corrió
+        self.assertNotIn("electrico", car)           # paso 3 no corrió
+        self.assertEqual(car["origen"], "americana")  # paso 4 sí
+        self.assertIn("segmento", car)                # paso 5 sí
+        db.cerrar()
+
+    def test_lo_aprendido_queda_vacio_tras_journal_y_compactar(self):
+        db = CarDB(self.ruta)
+        db.cargar()
+        db.aprender("Nuevo Auto", {"tipo": "suv"})
+        car = db.buscar_por_nombre("Nuevo Auto")
+        self.assertEqual((car["tipo"], car["origen"], car["segmento"]), ("suv", "", ""))
+        db.cerrar()
+        for compactar in (False, True):
+            db = CarDB(self.ruta)
+            db.cargar()   # la primera vez, desde el journal; la segunda, desde el JSON
+            car = db.buscar_por_nombre("Nuevo Auto")
+            self.assertEqual((car["origen"], car["segmento"]), ("", ""), compactar)
+            if compactar:
+                db.compactar()
+            db.cerrar()
+
+    def test_journal_sin_version_se_migra(self):
+        db = CarDB(self.ruta)
+        db.cargar()
+        db.cerrar()
+        with open(db.ruta_journal, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "upsert", "car": {"name": "De Antes", "puertas": 2}}) + "\n")
+        db = CarDB(self.ruta)
+        db.cargar()
+        car = db.buscar_por_nombre("De Antes")
+        self.assertEqual((car["puertas"], car["origen"]), ("2", "americana"))
+        db.cerrar()
+
+    def test_sqlite_aprende_sin_valores_por_defecto(self):
+        db = CarDBSQLite(os.path.join(self.dir, "c.sqlite3"), self.ruta)
+        db.cargar()
+        db.aprender("Nuevo Auto", {"tipo": "suv"})
+        car = db.buscar_por_nombre("Nuevo Auto")
+        self.assertEqual(car["tipo"], "suv")
+        self.assertIn(car.get("origen"), ("", None))
+        db.cerrar()
+
+
+class RecorrerCatalogo(unittest.TestCase):
+    """El lector en flujo da lo mismo que json.load aunque cada valor quede cortado entre dos bloques."""
+
+    DATOS = {
+        "schema_version": 5, "revision": 12500,
+        "attributes": [{"key": "anio", "opciones": ["<2000", "2021+"]}, {"key": "electrico", "tipo": "bool"}],
+        "cars": [
+            {"name": "Ñandú \"Turbo\" \\ 2", "precio": 12500.0, "delta": -3, "exp": 1e5, "alias": []},
+            {"name": "Lleno", "extra": {"a": [1, [2, {}]], "b": None, "c": True, "d": False}},
+            {},
+        ],
+        "despues": "de los autos",
+    }
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def esperado(self, datos):
+        salida = []
+        for clave, v in datos.items():
+            salida += [("car", car) for car in v] if clave == "cars" else [(clave, v)]
+        return salida
+
+    def comparar(self, texto, datos):
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            f.write(texto)
+        for bloque in list(range(1, 12)) + [64, 1 << 16]:
+            self.assertEqual(list(_recorrer_catalogo(self.ruta, bloque)), self.esperado(datos), bloque)
+
+    def test_bloques_chicos(self):
+        for opciones in ({}, {"indent": 2}, {"ensure_ascii": False}, {"separators": (",", ":")}):
+            with self.subTest(**{k: str(v) for k, v in opciones.items()}):
+                self.comparar(json.dumps(self.DATOS, **opciones), self.DATOS)
+
+    def test_sin_autos_y_espacios_raros(self):
+        self.comparar(' {\r\n "revision" :\t7 ,"cars" : [ ] }\n', {"revision": 7, "cars": []})
+
+    def test_lo_que_escribe_guardar(self):
+        _escribir_catalogo(self.ruta, self.DATOS["attributes"], self.DATOS["cars"], 3)
+        with open(self.ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        for bloque in (1, 2, 3, 5, 8, 13):
+            self.assertEqual(list(_recorrer_catalogo(self.ruta, bloque)), self.esperado(datos), bloque)
+
+    def test_archivo_cortado(self):
+        texto = json.dumps(self.DATOS)
+        for corte in (0, 1, len(texto) // 2, len(texto) - 1):
+            with open(self.ruta, "w", encoding="utf-8") as f:
+                f.write(texto[:corte])
+            with self.assertRaises(ValueError, msg=corte):
+                list(_recorrer_catalogo(self.ruta, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
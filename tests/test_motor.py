@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""MotorJuego sin ventana: una partida entera, saltar y atrás, y que sin "gui" no se importa tkinter."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.db import CarDB
+from adivina_coches.motor import MotorJuego
+
+
+class PartidaSinUI(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = CarDB(os.path.join(self.dir, "c.json"))
+        self.db.cargar()            # catálogo semilla
+        self.addCleanup(self.db.cerrar)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_adivina_cada_auto(self):
+        total = len(self.db.attributes)
+        for modo in ("fijo", "ganancia"):
+            for car in list(self.db.cars):
+                with self.subTest(modo=modo, auto=car["name"]):
+                    motor = MotorJuego(self.db, modo)
+                    while motor.pregunta_actual() is not None:
+                        key = motor.pregunta_actual()["key"]
+                        motor.responder(key, car.get(key, ""))
+                    tipo, opciones = motor.adivinar()
+                    self.assertIn(tipo, ("exacto", "varios"))
+                    self.assertIn(car["name"], [c["name"] for c, _ in opciones])
+                    if modo == "fijo":
+                        self.assertEqual(motor.progreso(), (total, total))
+
+    def test_saltar_y_atras(self):
+        motor = MotorJuego(self.db, "fijo")
+        primera = motor.pregunta_actual()
+        self.assertEqual(motor.progreso(), (1, len(self.db.attributes)))
+        self.assertFalse(motor.atras())             # ya estoy en la primera
+        motor.saltar()
+        self.assertEqual(motor.respuestas, {primera["key"]: ""})
+        self.assertEqual(motor.n_vivos, len(self.db.cars))     # saltar no descarta a nadie
+        self.assertIn(f"• {primera['pregunta']}: —", motor.resumen())
+        self.assertEqual(motor.progreso()[0], 2)
+        self.assertTrue(motor.atras())
+        self.assertEqual(motor.pregunta_actual(), primera)
+        self.assertEqual(motor.respuestas, {})
+
+
+class SinVentana(unittest.TestCase):
+
+    def test_no_importa_tkinter(self):
+        """La CLI, el motor y los backends arrancan sin tkinter (solo el comando "gui" lo importa)."""
+        codigo = ("import sys; import adivina_coches.cli, adivina_coches.motor, adivina_coches.backends; "
+                  "print('tkinter' in sys.modules)")
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=comun.RAIZ,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(salida.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""El índice de nombres: sin acentos, casefold y espacios colapsados; aprender hace upsert por él."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBBinario, CarDBParticionado, CarDBSQLite
+from adivina_coches.db import CarDB
+from adivina_coches.nucleo import _normalizar_nombre
+
+
+class Normalizar(unittest.TestCase):
+
+    def test_variantes(self):
+        for variante in ("Citroën C3", "CITROEN c3", "  citroën   C3 ", "Citroën C3"):
+            with self.subTest(variante=variante):
+                self.assertEqual(_normalizar_nombre(variante), "citroen c3")
+        self.assertEqual(_normalizar_nombre("Straße"), "strasse")     # casefold, no lower
+        self.assertNotEqual(_normalizar_nombre("Kia Rio"), _normalizar_nombre("Kia Rio 5"))
+
+
+class UpsertPorNombre(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        db = CarDB(self.json)
+        db.cargar()            # catálogo semilla
+        self.n = len(db)
+        db.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    # Cada backend sobre su propia copia del catálogo (lo que aprende uno no lo ve otro)
+    BACKENDS = {
+        "json": lambda d, ruta: CarDB(ruta),
+        "sqlite": lambda d, ruta: CarDBSQLite(os.path.join(d, "c.sqlite3"), ruta),
+        "binario": lambda d, ruta: CarDBBinario(ruta, os.path.join(d, "c.bin")),
+        "particionado": lambda d, ruta: CarDBParticionado(os.path.join(d, "partes"), "origen", ruta),
+    }
+
+    def abrir(self, nombre):
+        d = os.path.join(self.dir, nombre)
+        if not os.path.isdir(d):
+            os.makedirs(d)
+            shutil.copy(self.json, os.path.join(d, "c.json"))
+        db = self.BACKENDS[nombre](d, os.path.join(d, "c.json"))
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        return db
+
+    def test_un_solo_auto_por_nombre(self):
+        for nombre in self.BACKENDS:
+            with self.subTest(backend=nombre):
+                db = self.abrir(nombre)
+                db.aprender("Citroën C3", {"tipo": "hatchback", "origen": "europea"})
+                db.aprender("CITROEN   c3", {"precio": "economico"})
+                db.aprender("toyota corolla", {"precio": "medio"})      # uno de la semilla
+                self.assertEqual(len(db), self.n + 1)
+                for variante in ("citroen c3", "Citroën  C3", "CITROËN C3"):
+                    car = db.buscar_por_nombre(variante)
+                    self.assertEqual((car["name"], car["tipo"], car["precio"]),
+                                     ("Citroën C3", "hatchback", "economico"))
+                self.assertEqual(db.buscar_por_nombre("TOYOTA  COROLLA")["name"], "Toyota Corolla")
+                self.assertIsNone(db.buscar_por_nombre("Citroën C4"))
+                db.cerrar()
+
+                # Y al volver a abrir (journal o tabla) sigue siendo uno
+                db = self.abrir(nombre)
+                nombres = [_normalizar_nombre(c["name"]) for c in db.iterar_autos()]
+                self.assertEqual(nombres.count("citroen c3"), 1)
+                self.assertEqual(len(nombres), len(set(nombres)))
+                self.assertEqual(db.buscar_por_nombre("citroen c3")["precio"], "economico")
+
+
+if __name__ == "__main__":
+    unittest.main()
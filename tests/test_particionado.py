@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Catálogo particionado: solo abre las partes que le tocan y solo reescribe las que cambiaron."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import CarDBParticionado
+from adivina_coches.catalogo import _stat_archivo
+from adivina_coches.db import CarDB
+from adivina_coches.nucleo import _normalizar_nombre
+from adivina_coches.simulacion import escribir_catalogo_sintetico
+
+ORIGENES = ("americana", "china", "coreana", "europea", "japonesa")
+
+
+class Particionado(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        self.partes = os.path.join(self.dir, "partes")
+        escribir_catalogo_sintetico(self.json, 300, 1)
+        self.abrir().cerrar()       # la primera vez reparte el JSON
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def abrir(self):
+        db = CarDBParticionado(self.partes, "origen", self.json)
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        return db
+
+    def referencia(self):
+        db = CarDB(self.json)
+        db.cargar()
+        db.cerrar()
+        return db
+
+    def ruta(self, origen, journal=False):
+        return os.path.join(self.partes, f"origen={origen}" + (".journal.jsonl" if journal else ".json"))
+
+    def cargadas(self, db):
+        return sorted(p.valor for p in db._particiones if p.cargada)
+
+    def fotos(self):
+        return {o: _stat_archivo(self.ruta(o)) for o in ORIGENES}
+
+    def romper(self, *origenes):
+        """Si alguien abre estas partes, falla: así sé que no las leyó."""
+        for o in origenes:
+            with open(self.ruta(o), "w", encoding="utf-8") as f:
+                f.write("{roto")
+
+    def test_reparto_y_manifiesto(self):
+        ref = self.referencia()
+        self.assertEqual(sorted(f for f in os.listdir(self.partes) if f.startswith("origen=")),
+                         sorted(f"origen={o}.json" for o in ORIGENES))
+        with open(os.path.join(self.partes, "manifiesto.json"), encoding="utf-8") as f:
+            manifiesto = json.load(f)
+        self.assertEqual((manifiesto["clave"], manifiesto["total"]), ("origen", len(ref)))
+        self.assertEqual(sum(p["n"] for p in manifiesto["particiones"]), len(ref))
+        # El mapa de nombres: cada auto apunta a la parte de su origen y a su posición en el JSON
+        valores = [p["valor"] for p in manifiesto["particiones"]]
+        nombres = manifiesto["nombres"]
+        for orden, car in enumerate(ref.cars):
+            parte, pos = nombres[_normalizar_nombre(car["name"])]
+            self.assertEqual((valores[parte], pos), (car["origen"], orden))
+
+    def test_cargar_no_abre_ninguna_parte(self):
+        self.romper(*ORIGENES)
+        db = self.abrir()
+        self.assertEqual(self.cargadas(db), [])
+        self.assertEqual(len(db), 300)
+        self.assertEqual(db.cars, [])
+
+    def test_cada_operacion_abre_solo_las_suyas(self):
+        ref = self.referencia()
+        car = next(c for c in ref.cars if c["origen"] == "japonesa")
+        self.romper("americana", "china", "coreana", "europea")
+        db = self.abrir()
+        self.assertEqual(db.buscar_por_nombre(car["name"]), car)
+        self.assertEqual(self.cargadas(db), ["japonesa"])
+
+        respuestas = {"origen": "japonesa", "tipo": "suv"}
+        self.assertEqual(db.nombres_de(db.ids_exactos(respuestas)), ref.nombres_de(ref.ids_exactos(respuestas)))
+        self.assertEqual(self.cargadas(db), ["japonesa"])
+
+        sesion = db.nueva_sesion()
+        sesion.responder("origen", "japonesa")
+        sesion.responder("tipo", "suv")
+        self.assertEqual([c["name"] for c in sesion.candidatos()], ref.nombres_de(ref.ids_exactos(respuestas)))
+        self.assertEqual(self.cargadas(db), ["japonesa"])
+
+    def test_aprender_escribe_el_journal_de_una_parte(self):
+        antes = self.fotos()
+        db = self.abrir()
+        db.aprender("Nuevo Coreano", {"origen": "coreana", "tipo": "pickup"})
+        self.assertEqual(self.cargadas(db), ["coreana"])
+        self.assertEqual([o for o in ORIGENES if os.path.exists(self.ruta(o, journal=True))], ["coreana"])
+        self.assertEqual(self.fotos(), antes)        # ningún JSON de parte se reescribió
+        self.assertEqual(len(db), 301)
+
+        # Actualizar uno que existe sin cambiarle el origen: solo su parte
+        db = self.abrir()
+        viejo = next(c for c in self.referencia().cars if c["origen"] == "europea")
+        db.aprender(viejo["name"], {"precio": "lujo"})
+        self.assertEqual(self.cargadas(db), ["europea"])
+        self.assertEqual(self.fotos(), antes)
+        self.assertEqual(len(db), 301)
+
+    def test_compactar_reescribe_solo_la_tocada(self):
+        db = self.abrir()
+        db.aprender("Nuevo Chino", {"origen": "china", "tipo": "suv"})
+        antes = self.fotos()
+        db.compactar()
+        despues = self.fotos()
+        self.assertNotEqual(despues.pop("china"), antes.pop("china"))
+        self.assertEqual(despues, antes)
+        self.assertFalse(os.path.exists(self.ruta("china", journal=True)))
+        db.cerrar()
+
+        self.romper("americana", "coreana", "europea", "japonesa")
+        db = self.abrir()
+        self.assertEqual(db.buscar_por_nombre("nuevo chino")["tipo"], "suv")
+        self.assertEqual(len(db), 301)
+
+    def test_mudarse_de_parte(self):
+        ref = self.referencia()
+        car = next(c for c in ref.cars if c["origen"] == "japonesa")
+        antes = self.fotos()
+        db = self.abrir()
+        db.aprender(car["name"], {"origen": "china"})
+        self.assertEqual(self.cargadas(db), ["china", "japonesa"])
+        # La vieja se reescribe sin él; la nueva lo tiene en el journal
+        despues = self.fotos()
+        self.assertNotEqual(despues.pop("japonesa"), antes.pop("japonesa"))
+        self.assertEqual(despues, antes)
+        self.assertTrue(os.path.exists(self.ruta("china", journal=True)))
+        db.cerrar()
+
+        db = self.abrir()
+        self.assertEqual(db.buscar_por_nombre(car["name"])["origen"], "china")
+        self.assertEqual(len(db), 300)
+        nombres = [c["name"] for c in db.iterar_autos()]
+        self.assertEqual(nombres.count(car["name"]), 1)
+        self.assertEqual(sorted(nombres), sorted(c["name"] for c in ref.cars))
+
+    def test_otra_instancia_ve_lo_aprendido_sin_cargar_todo(self):
+        db, otro = self.abrir(), self.abrir()
+        otro.aprender("Ajeno Americano", {"origen": "americana"})
+        self.assertGreater(db.refrescar(), 0)
+        self.assertEqual(self.cargadas(db), [])     # el journal va al mapa, no a memoria
+        self.assertEqual(len(db), 301)
+        self.assertEqual(db.buscar_por_nombre("ajeno americano")["origen"], "americana")
+        self.assertEqual(self.cargadas(db), ["americana"])
+
+
+if __name__ == "__main__":
+    unittest.main()
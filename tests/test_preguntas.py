@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Modo "ganancia", deshacer y aprender a media partida sobre catálogos chicos hechos
+a mano, donde la mejor pregunta y los candidatos de cada paso se saben de antemano.
+"""
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.catalogo import _escribir_catalogo
+from adivina_coches.db import CarDB
+from adivina_coches.juego import SelectorPreguntas, SesionArbol, SesionJuego
+from adivina_coches.motor import MotorJuego
+
+BASE = {"electrico": False, "hibrido": False, "combustible": "gasolina", "origen": "japonesa",
+        "lujo": False, "puertas": "5", "traccion": "delantera", "transmision": "manual", "precio": "medio",
+        "segmento": "mediano", "anio": "2016-2020"}
+# Todos iguales salvo tipo y anio. Cada tipo separa a uno (2 bits entre los 4 que lo
+# traen); "Sin Tipo" no trae el campo, así que sobrevive a cualquier respuesta de tipo.
+# (tipo es el único campo que cargar() no rellena en un catálogo viejo)
+AUTOS = [
+    dict(BASE, name="Suv", tipo="suv"),
+    dict(BASE, name="Sedan", tipo="sedan"),
+    dict(BASE, name="Hatch", tipo="hatchback"),
+    dict(BASE, name="Pickup", tipo="pickup"),
+    dict(BASE, name="Sin Tipo", anio="2021+"),
+]
+
+
+def filtrar(cars, respuestas):
+    """El filtro de la versión original: lo que no contesté o el auto no trae, no descarta."""
+    return sorted(c["name"] for c in cars
+                  if all(v in ("", None) or k not in c or c[k] == v for k, v in respuestas.items()))
+
+
+class PreguntasAMano(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)   # después de cerrar la db
+        ruta = os.path.join(self.dir, "c.json")
+        _escribir_catalogo(ruta, CarDB()._schema_attributes(), AUTOS)
+        self.db = CarDB(ruta)
+        self.db.cargar()
+        self.addCleanup(self.db.cerrar)
+
+    def sesiones(self):
+        return {"SesionJuego": SesionJuego(self.db, "ganancia"), "SesionArbol": self.db.nueva_sesion("ganancia")}
+
+    def siguiente(self, sesion):
+        return sesion.siguiente([a for a in self.db.attributes if a["key"] not in sesion.respuestas])
+
+    def test_ganancia_a_mano(self):
+        sel = SelectorPreguntas(self.db, self.db._todos)
+        # tipo: 4 con valor (1 c/u) + 1 sin campo -> E = 4 * 1/4 * log2(2) = 1
+        self.assertAlmostEqual(sel.ganancia("tipo"), math.log2(5) - 1)
+        # anio: 4 de 2016-2020 y 1 de 2021+
+        self.assertAlmostEqual(sel.ganancia("anio"), math.log2(5) - (0.8 * 2 + 0.2 * 0))
+        self.assertEqual(sel.ganancia("origen"), 0.0)       # todos iguales: no separa
+        self.assertEqual(sel.elegir(self.db.attributes)["key"], "tipo")
+
+    def test_pregunta_la_mejor_y_para_antes(self):
+        for nombre, sesion in self.sesiones().items():
+            with self.subTest(sesion=nombre):
+                self.assertIsInstance(sesion, SesionArbol if nombre == "SesionArbol" else SesionJuego)
+                self.assertEqual(self.siguiente(sesion)["key"], "tipo")
+                sesion.responder("tipo", "pickup")
+                self.assertEqual(sesion.n_vivos, 2)                         # Pickup y Sin Tipo
+                self.assertEqual(self.siguiente(sesion)["key"], "anio")     # no "electrico", la 2ª en orden fijo
+                sesion.responder("anio", "2016-2020")
+                self.assertEqual([c["name"] for c in sesion.candidatos()], ["Pickup"])
+                self.assertIsNone(self.siguiente(sesion))                   # queda uno: no pregunto más
+
+    def test_motor_en_dos_preguntas(self):
+        juegos = {}
+        for modo in ("fijo", "ganancia"):
+            motor = MotorJuego(self.db, modo)
+            while motor.pregunta_actual() is not None:
+                key = motor.pregunta_actual()["key"]
+                motor.responder(key, AUTOS[1].get(key, ""))
+            juegos[modo] = (motor.attr_index, motor.adivinar()[0], [c["name"] for c in motor.sesion.candidatos()])
+        self.assertEqual(juegos, {"fijo": (12, "exacto", ["Sedan"]), "ganancia": (2, "exacto", ["Sedan"])})
+
+    def test_deshacer_vuelve_a_cada_paso(self):
+        pasos = [("tipo", "hatchback"), ("origen", ""), ("anio", "2021+")]
+        for nombre, sesion in self.sesiones().items():
+            with self.subTest(sesion=nombre):
+                def foto():
+                    return dict(sesion.respuestas), sesion.n_vivos, sorted(c["name"] for c in sesion.candidatos())
+                fotos = []
+                for key, valor in pasos:
+                    fotos.append(foto())
+                    sesion.responder(key, valor)
+                    self.assertEqual(sorted(c["name"] for c in sesion.candidatos()),
+                                     filtrar(AUTOS, sesion.respuestas))
+                self.assertEqual(sesion.n_vivos, 1)                  # Sin Tipo
+                for key, _ in reversed(pasos):
+                    self.assertEqual(sesion.deshacer(), key)
+                    self.assertEqual(foto(), fotos.pop())
+                self.assertIsNone(sesion.deshacer())
+                self.assertEqual(sesion.n_vivos, 5)
+                self.assertEqual(self.siguiente(sesion)["key"], "tipo")
+
+    def aprender_a_media_partida(self, sesion):
+        sesion.responder("tipo", "pickup")
+        sesion.responder("anio", "2016-2020")
+        self.assertEqual(sesion.n_vivos, 1)
+        self.db.aprender("Pickup De Lujo", dict({k: v for k, v in AUTOS[3].items() if k != "name"}, lujo=True))
+        sesion.sincronizar()
+        cars = [dict(c.items()) for c in self.db.cars]
+        self.assertEqual(sorted(c["name"] for c in sesion.candidatos()), filtrar(cars, sesion.respuestas))
+        self.assertEqual(sesion.n_vivos, 2)
+        self.assertEqual(self.siguiente(sesion)["key"], "lujo")     # lo único que los separa
+        # La pila sobrevive: deshacer sigue volviendo paso a paso, ya con el auto nuevo
+        self.assertEqual(sesion.deshacer(), "anio")
+        self.assertEqual(sorted(c["name"] for c in sesion.candidatos()), filtrar(cars, {"tipo": "pickup"}))
+        self.assertEqual(sesion.deshacer(), "tipo")
+        self.assertEqual(sesion.n_vivos, len(self.db))
+
+    def test_aprender_a_media_partida(self):
+        self.aprender_a_media_partida(SesionJuego(self.db, "ganancia"))
+
+    def test_aprender_a_media_partida_arbol(self):
+        self.aprender_a_media_partida(self.db.nueva_sesion("ganancia"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Varios procesos sobre el mismo catálogo: cerrojo, ponerse al día antes de escribir y compactaciones cruzadas."""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from collections import Counter
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.catalogo import CerrojoArchivo, _revision_catalogo
+from adivina_coches.db import CarDB
+
+_CTX = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+def _nombres(db):
+    return [c["name"] for c in db.cars]
+
+
+def _trabajar(ruta, prefijo, n, barrera, salida):
+    """Un proceso: aprende n autos propios (y uno compartido), compacta y vuelve a cargar por el medio."""
+    db = CarDB(ruta)
+    db.cargar()
+    barrera.wait()
+    for i in range(n):
+        db.aprender(f"{prefijo} {i}", {"tipo": "sedan", "anio": str(2000 + i % 20)})
+        if i % 5 == 2:
+            db.aprender("Compartido", {"origen": prefijo})
+        if i % 7 == 3:
+            db.compactar()
+        if i % 11 == 5:
+            db.cerrar()
+            db = CarDB(ruta)
+            db.cargar()
+    barrera.wait()    # los dos terminaron de escribir: me pongo al día y cuento lo que veo
+    db.refrescar()
+    salida.put((prefijo, sorted(_nombres(db))))
+    db.cerrar()
+
+
+def _tomar_cerrojo(ruta, listo, salida):
+    listo.set()
+    with CerrojoArchivo.de(ruta):
+        salida.put(time.monotonic())
+
+
+class VariosProcesos(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+        db = CarDB(self.ruta)
+        db.cargar()        # sin archivo: escribe el catálogo semilla
+        self.semilla = _nombres(db)
+        db.cerrar()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def abrir(self):
+        db = CarDB(self.ruta)
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        return db
+
+    def test_dos_procesos_intercalados(self):
+        n = 40
+        barrera, salida = _CTX.Barrier(2), _CTX.Queue()
+        hijos = [_CTX.Process(target=_trabajar, args=(self.ruta, p, n, barrera, salida)) for p in ("Uno", "Dos")]
+        for h in hijos:
+            h.start()
+        vistos = dict(salida.get(timeout=120) for _ in hijos)
+        for h in hijos:
+            h.join(30)
+            self.assertEqual(h.exitcode, 0)
+
+        esperados = sorted(self.semilla + ["Compartido"] + [f"{p} {i}" for p in ("Uno", "Dos") for i in range(n)])
+        db = self.abrir()
+        nombres = _nombres(db)
+        self.assertEqual([k for k, c in Counter(nombres).items() if c > 1], [])
+        self.assertEqual(sorted(nombres), esperados)
+        # Cada proceso, tras refrescar, ve exactamente lo mismo que uno que carga de cero
+        self.assertEqual(vistos, {"Uno": esperados, "Dos": esperados})
+        db.compactar()
+        self.assertEqual(sorted(_nombres(self.abrir())), esperados)
+
+    def test_el_cerrojo_hace_esperar_a_otro_proceso(self):
+        listo, salida = _CTX.Event(), _CTX.Queue()
+        with CerrojoArchivo.de(self.ruta):
+            hijo = _CTX.Process(target=_tomar_cerrojo, args=(self.ruta, listo, salida))
+            hijo.start()
+            self.assertTrue(listo.wait(30))
+            time.sleep(0.3)
+            self.assertTrue(salida.empty())   # todavía lo tengo yo
+            soltado = time.monotonic()
+        self.assertGreaterEqual(salida.get(timeout=30), soltado)
+        hijo.join(30)
+        self.assertEqual(hijo.exitcode, 0)
+
+    def test_escribir_con_datos_viejos_no_pisa_lo_ajeno(self):
+        a, b = self.abrir(), self.abrir()
+        a.aprender("Solo De A", {"tipo": "sedan"})
+        b.aprender("Solo De B", {"tipo": "suv"})     # b no había visto el de a: se pone al día antes
+        self.assertIn("Solo De A", _nombres(b))
+        b.compactar()
+        nombres = _nombres(self.abrir())
+        self.assertEqual(nombres.count("Solo De A"), 1)
+        self.assertEqual(nombres.count("Solo De B"), 1)
+
+    def test_refrescar_tras_una_compactacion_ajena(self):
+        a, b = self.abrir(), self.abrir()
+        revision = _revision_catalogo(self.ruta)
+        a.aprender("Antes 1", {})
+        b.aprender("Antes 2", {})
+        b.compactar()
+        b.aprender("Despues", {})
+        self.assertEqual(_revision_catalogo(self.ruta), revision + 1)
+        self.assertTrue(os.path.exists(b.ruta_journal_anterior))
+        # Una compactación: termino el .anterior desde mi offset y sigo con el journal nuevo
+        cargado = a._leer_catalogo
+        a._leer_catalogo = lambda: self.fail("con una compactación no hace falta recargar todo")
+        self.assertEqual(a.refrescar(), 2)
+        a._leer_catalogo = cargado
+        self.assertEqual(sorted(_nombres(a)), sorted(_nombres(self.abrir())))
+
+    def test_refrescar_tras_dos_compactaciones_recarga(self):
+        a, b = self.abrir(), self.abrir()
+        for nombre in ("Uno", "Dos"):
+            b.aprender(nombre, {})
+            b.compactar()
+        self.assertGreater(a.refrescar(), 0)
+        self.assertEqual(sorted(_nombres(a)), sorted(_nombres(self.abrir())))
+        self.assertEqual(a.refrescar(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+El puntaje difuso con cuentas hechas a mano: pesos, cercanía en las ordinales y
+las respuestas redundantes. Y cada backend (SQLite con su CASE/MAX) igual que el JSON.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches import db as modulo_db
+from adivina_coches.backends import CarDBBinario, CarDBParticionado, CarDBSQLite
+from adivina_coches.catalogo import _escribir_catalogo
+from adivina_coches.db import CarDB
+from adivina_coches.simulacion import escribir_catalogo_sintetico
+
+# Pesos: tipo/anio/precio/combustible/segmento 4, hibrido 3; una opción de distancia
+# en una ordinal = int(4 * 0.25 + 0.5) = 1 punto; dos o más = 0.
+AUTOS = [
+    {"name": "A", "tipo": "suv", "anio": "2021+", "precio": "medio", "combustible": "hibrido", "hibrido": True,
+     "origen": "japonesa"},
+    {"name": "B", "tipo": "suv", "anio": "2016-2020", "precio": "premium", "combustible": "gasolina",
+     "hibrido": False, "origen": "europea"},
+    {"name": "C", "tipo": "sedan", "anio": "2021+", "precio": "economico", "combustible": "hibrido",
+     "hibrido": False, "origen": "japonesa"},
+    {"name": "D", "tipo": "suv", "anio": "≤2010", "precio": "medio", "combustible": "gasolina", "hibrido": True,
+     "origen": "americana"},
+    {"name": "E", "tipo": "suv", "anio": "2011-2015", "precio": "lujo", "origen": "coreana"},
+    {"name": "F", "tipo": "sedan", "segmento": "mediano", "origen": "china"},
+    {"name": "G", "tipo": "suv", "segmento": "SUV/Crossover", "origen": "china"},
+    {"name": "H", "tipo": "hatchback", "segmento": "compacto", "origen": "europea"},
+    {"name": "I", "tipo": "hatchback", "segmento": "subcompacto", "origen": "europea"},
+]
+
+HIBRIDO = {"tipo": "suv", "anio": "2021+", "precio": "medio", "combustible": "hibrido", "hibrido": True}
+
+
+class PuntajeAMano(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        _escribir_catalogo(self.json, CarDB()._schema_attributes(), AUTOS)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def backends(self):
+        d = self.dir
+        return {
+            "json": lambda: CarDB(self.json),
+            "sqlite": lambda: CarDBSQLite(os.path.join(d, "c.sqlite3"), self.json),
+            "binario": lambda: CarDBBinario(self.json, os.path.join(d, "c.bin")),
+            "particionado": lambda: CarDBParticionado(os.path.join(d, "partes"), "origen", self.json),
+        }
+
+    def abrir(self, nuevo):
+        db = nuevo()
+        db.cargar()
+        db.puntaje = "difuso"
+        self.addCleanup(db.cerrar)
+        return db
+
+    def puntajes(self, db, respuestas):
+        return {c["name"]: p for c, p in db.mejores_coincidencias(respuestas, len(AUTOS)) if p}
+
+    def cada_backend(self, respuestas, esperado):
+        numpy = [None] if modulo_db.np is None else [None, modulo_db.np]
+        for np in numpy:
+            for nombre, nuevo in self.backends().items():
+                with self.subTest(backend=nombre, numpy=np is not None), mock.patch.object(modulo_db, "np", np):
+                    self.assertEqual(self.puntajes(self.abrir(nuevo), respuestas), esperado)
+
+    def test_redundantes_cuentan_una_vez(self):
+        # A: 4 + 4 + 4 + max(4, 3)                    = 16
+        # D: 4 + 0 (≤2010, a 3) + 4 + max(0, 3)       = 11
+        # C: 0 + 4 + 1 (economico, a 1) + max(4, 0)   = 9
+        # B: 4 + 1 (2016-2020) + 1 (premium) + 0      = 6
+        # G: 4; E: 4 + 0 (a 2) + 0 (lujo, a 2)        = 4
+        self.cada_backend(HIBRIDO, {"A": 16, "D": 11, "C": 9, "B": 6, "E": 4, "G": 4})
+        db = self.abrir(self.backends()["json"])
+        self.assertEqual([c["name"] for c, _ in db.mejores_coincidencias(HIBRIDO, 3)], ["A", "D", "C"])
+        self.assertEqual(db.mejor_coincidencia(HIBRIDO), (db.buscar_por_nombre("A"), 16))
+
+    def test_sin_redundancia_se_suman(self):
+        # hibrido=False no dice lo mismo que combustible=hibrido: suman por separado
+        self.cada_backend({"combustible": "hibrido", "hibrido": False},
+                          {"C": 4 + 3, "A": 4, "B": 3})
+
+    def test_cercania_en_segmento(self):
+        # Solo los tamaños están en orden: SUV/Crossover no está "cerca" de nada
+        self.cada_backend({"segmento": "compacto"}, {"H": 4, "I": 1, "F": 1})
+        self.cada_backend({"segmento": "SUV/Crossover"}, {"G": 4})
+
+    def test_exacto_no_tiene_cercania(self):
+        db = self.abrir(self.backends()["json"])
+        db.puntaje = "exacto"
+        self.assertEqual(self.puntajes(db, HIBRIDO), {"A": 5, "D": 3, "C": 2, "B": 1, "E": 1, "G": 1})
+
+
+class DifusoIgualQueJSON(unittest.TestCase):
+    """Catálogo grande y respuestas al azar: SQLite (CASE/MAX), binario y particionado == JSON."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.json = os.path.join(self.dir, "c.json")
+        escribir_catalogo_sintetico(self.json, 800, 4)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_mismo_top(self):
+        d = self.dir
+        ref = CarDB(self.json)
+        ref.cargar()
+        ref.puntaje = "difuso"
+        self.addCleanup(ref.cerrar)
+        otros = {
+            "sqlite": CarDBSQLite(os.path.join(d, "c.sqlite3"), self.json),
+            "binario": CarDBBinario(self.json, os.path.join(d, "c.bin")),
+            "particionado": CarDBParticionado(os.path.join(d, "partes"), "origen", self.json),
+        }
+        for nombre, db in otros.items():
+            with self.subTest(backend=nombre):
+                db.cargar()
+                db.puntaje = "difuso"
+                self.addCleanup(db.cerrar)
+                rnd = random.Random(9)
+                for i in range(150):
+                    resp = {a["key"]: rnd.choice(([True, False] if a.get("tipo") == "bool" else a["opciones"]) + [""])
+                            for a in ref.attributes}
+                    if i % 4 == 0:
+                        resp["combustible"], resp["hibrido"] = "hibrido", True
+                    k = rnd.choice([1, 5, 20])
+                    self.assertEqual([(c["name"], p) for c, p in db.mejores_coincidencias(resp, k)],
+                                     [(c["name"], p) for c, p in ref.mejores_coincidencias(resp, k)], resp)
+
+
+if __name__ == "__main__":
+    unittest.main()
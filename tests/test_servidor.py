@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""ServidorJuego: el protocolo de líneas JSON, sesiones por conexión y la cola de un solo escritor."""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.db import CarDB
+from adivina_coches.servidor import ServidorJuego
+
+
+class Cliente:
+    """Una conexión: mando una línea JSON y leo una."""
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    async def pedir(self, **pedido):
+        self.writer.write((json.dumps(pedido) + "\n").encode("utf-8"))
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def cerrar(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+@unittest.skipUnless(hasattr(asyncio, "start_unix_server"), "sin sockets Unix")
+class Servidor(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = CarDB(os.path.join(self.dir, "c.json"))
+        self.db.cargar()        # sin archivo: escribe el catálogo semilla
+        self.addCleanup(self.db.cerrar)
+        self.socket = os.path.join(self.dir, "s.sock")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def correr(self, prueba):
+        """Levanto el servidor, corro prueba(servidor, conectar) y lo bajo (vaciando la cola)."""
+        async def todo():
+            servidor = ServidorJuego(self.db)
+            tarea = asyncio.create_task(servidor.correr(unix=self.socket))
+            while not os.path.exists(self.socket):
+                await asyncio.sleep(0.01)
+
+            async def conectar():
+                return Cliente(*await asyncio.open_unix_connection(self.socket))
+            try:
+                return await prueba(servidor, conectar)
+            finally:
+                tarea.cancel()
+                try:
+                    await tarea
+                except asyncio.CancelledError:
+                    pass
+        return asyncio.run(asyncio.wait_for(todo(), 60))
+
+    def test_protocolo(self):
+        async def prueba(servidor, conectar):
+            c = await conectar()
+            r = await c.pedir(op="start")
+            self.assertTrue(r["ok"])
+            sid, primera = r["sesion"], r["pregunta"]["key"]
+            self.assertEqual((r["paso"], r["vivos"]), (1, len(self.db)))
+
+            r = await c.pedir(op="answer", sesion=sid, valor=r["pregunta"]["opciones"][0])
+            self.assertEqual(r["paso"], 2)
+            self.assertLessEqual(r["vivos"], len(self.db))
+            r = await c.pedir(op="skip", sesion=sid)
+            self.assertEqual(r["paso"], 3)
+            r = await c.pedir(op="back", sesion=sid)
+            r = await c.pedir(op="back", sesion=sid)
+            self.assertEqual((r["paso"], r["pregunta"]["key"]), (1, primera))
+
+            r = await c.pedir(op="guess", sesion=sid)
+            self.assertTrue(r["ok"])
+            self.assertTrue(r["opciones"])
+            self.assertIn("name", r["opciones"][0])
+
+            r = await c.pedir(op="stats")
+            self.assertEqual(r["sesiones"], 1)
+            self.assertIn("tasa_aciertos", r["cache"])
+
+            # Los errores vuelven como {"ok": false} y la conexión sigue
+            for malo in ({"op": "answer", "sesion": "nadie"}, {"op": "volar", "sesion": sid},
+                         {"op": "learn", "sesion": sid}):
+                r = await c.pedir(**malo)
+                self.assertFalse(r["ok"], malo)
+                self.assertTrue(r["error"])
+            r = await c.pedir(op="end", sesion=sid)
+            self.assertTrue(r["ok"])
+            self.assertNotIn(sid, servidor.sesiones)
+            await c.cerrar()
+        self.correr(prueba)
+
+    def test_sesiones_se_borran_al_desconectar(self):
+        async def prueba(servidor, conectar):
+            a, b = await conectar(), await conectar()
+            await a.pedir(op="start")
+            await a.pedir(op="start")
+            sid_b = (await b.pedir(op="start"))["sesion"]
+            self.assertEqual(len(servidor.sesiones), 3)
+            await a.cerrar()
+            for _ in range(100):
+                if len(servidor.sesiones) == 1:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(list(servidor.sesiones), [sid_b])
+            await b.cerrar()
+        self.correr(prueba)
+
+    def test_un_solo_escritor(self):
+        adentro, maximo = [0], [0]
+        aprender = self.db.aprender
+
+        def contando(nombre, respuestas):
+            adentro[0] += 1
+            maximo[0] = max(maximo[0], adentro[0])
+            try:
+                return aprender(nombre, respuestas)
+            finally:
+                adentro[0] -= 1
+        self.db.aprender = contando
+        n = len(self.db)
+
+        async def prueba(servidor, conectar):
+            clientes = [await conectar() for _ in range(8)]
+            sids = [(await c.pedir(op="start"))["sesion"] for c in clientes]
+            miron = await conectar()
+            sid_miron = (await miron.pedir(op="start"))["sesion"]
+            respuestas = await asyncio.gather(*(c.pedir(op="learn", sesion=sid, nombre=f"Nuevo {i}")
+                                                for i, (c, sid) in enumerate(zip(clientes, sids))))
+            self.assertTrue(all(r["ok"] for r in respuestas))
+            # Una sesión que ya estaba abierta (y no aprendió) ve los autos nuevos en su próximo pedido
+            r = await miron.pedir(op="skip", sesion=sid_miron)
+            self.assertEqual(r["vivos"], n + len(clientes))
+            for c in clientes + [miron]:
+                await c.cerrar()
+        self.correr(prueba)
+        self.assertEqual(maximo[0], 1)
+        nombres = [c["name"] for c in self.db.cars]
+        self.assertEqual(sorted(nombres[n:]), [f"Nuevo {i}" for i in range(8)])
+
+    def test_solo_mis_sesiones(self):
+        async def prueba(servidor, conectar):
+            a, b = await conectar(), await conectar()
+            sid = (await a.pedir(op="start"))["sesion"]
+            for op in ("answer", "skip", "back", "guess", "learn", "end"):
+                r = await b.pedir(op=op, sesion=sid, valor=True, nombre="Intruso")
+                self.assertEqual((r["ok"], r["error"]), (False, f"sesión desconocida: {sid!r}"), op)
+            self.assertEqual((await a.pedir(op="skip", sesion=sid))["paso"], 2)
+            self.assertIsNone(self.db.buscar_por_nombre("Intruso"))
+            await a.cerrar()
+            await b.cerrar()
+        self.correr(prueba)
+
+    def test_respuesta_mala_no_toca_la_sesion(self):
+        async def prueba(servidor, conectar):
+            c = await conectar()
+            r = await c.pedir(op="start")
+            sid, tipo = r["sesion"], r["pregunta"]
+            self.assertIn("opciones", tipo)
+            paso = servidor.sesiones[sid].attr_index
+            for malo in (["suv"], {"a": 1}, 3, "avion", True):
+                r = await c.pedir(op="answer", sesion=sid, valor=malo)
+                self.assertFalse(r["ok"], malo)
+                self.assertEqual(servidor.sesiones[sid].attr_index, paso)
+                self.assertNotIn(tipo["key"], servidor.sesiones[sid].respuestas)
+            for malo in (["Otro"], 7, "   "):
+                r = await c.pedir(op="learn", sesion=sid, nombre=malo)
+                self.assertEqual((r["ok"], r["error"]), (False, "falta 'nombre'"), malo)
+            r = await c.pedir(op="answer", sesion=sid, valor=tipo["opciones"][0])
+            self.assertTrue(r["ok"])
+            r = await c.pedir(op="learn", sesion=sid, nombre="Bien Formado")
+            self.assertTrue(r["ok"])
+            self.assertEqual(self.db.buscar_por_nombre("Bien Formado")[tipo["key"]], tipo["opciones"][0])
+            await c.cerrar()
+        self.correr(prueba)
+
+    def test_aprender_malo_deja_el_catalogo_entero(self):
+        n = len(self.db)
+        with self.assertRaises(TypeError):
+            self.db.aprender("Roto", {"tipo": ["suv"]})
+        viejo = self.db.cars[0]["name"]
+        with self.assertRaises(TypeError):
+            self.db.aprender(viejo, {"tipo": ["suv"]})
+        self.assertEqual((len(self.db.cars), len(self.db._mat)), (n, n))
+        self.assertIsNone(self.db.buscar_por_nombre("Roto"))
+        self.assertEqual(self.db.cars[0]["name"], viejo)
+
+        async def prueba(servidor, conectar):
+            c = await conectar()
+            sid = (await c.pedir(op="start"))["sesion"]
+            await c.pedir(op="answer", sesion=sid, valor="suv")
+            r = await c.pedir(op="guess", sesion=sid)
+            self.assertTrue(r["ok"])
+            self.assertEqual(self.db.mejor_coincidencia({"tipo": "avion"})[1], 0)
+            await c.cerrar()
+        self.correr(prueba)
+
+    def test_aprender_no_traba_el_loop(self):
+        sigue = threading.Event()
+        aprender = self.db.aprender
+
+        def lento(nombre, respuestas):
+            sigue.wait(10)       # como un cerrojo de archivo tomado por otro proceso
+            return aprender(nombre, respuestas)
+        self.db.aprender = lento
+
+        async def prueba(servidor, conectar):
+            a, b = await conectar(), await conectar()
+            sid_a = (await a.pedir(op="start"))["sesion"]
+            aprendiendo = asyncio.ensure_future(a.pedir(op="learn", sesion=sid_a, nombre="Lento"))
+            sid_b = (await b.pedir(op="start"))["sesion"]
+            r = await b.pedir(op="skip", sesion=sid_b)      # mientras tanto, los demás juegan
+            self.assertEqual(r["paso"], 2)
+            self.assertFalse(aprendiendo.done())
+            sigue.set()
+            self.assertTrue((await aprendiendo)["ok"])
+            await a.cerrar()
+            await b.cerrar()
+        self.correr(prueba)
+
+    def test_error_al_aprender_llega_a_quien_pidio(self):
+        def falla(nombre, respuestas):
+            raise OSError("disco lleno")
+        self.db.aprender = falla
+
+        async def prueba(servidor, conectar):
+            c = await conectar()
+            sid = (await c.pedir(op="start"))["sesion"]
+            r = await c.pedir(op="learn", sesion=sid, nombre="No Entra")
+            self.assertEqual((r["ok"], r["error"]), (False, "disco lleno"))
+            r = await c.pedir(op="guess", sesion=sid)   # el escritor sigue vivo y la sesión también
+            self.assertTrue(r["ok"])
+            await c.cerrar()
+        self.correr(prueba)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+simular y los catálogos sintéticos (coherentes, repetibles por semilla y sin tocar
+disco), y evaluar_paralelo contra simular: repartir en procesos no cambia el resultado.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.backends import compilar_binario
+from adivina_coches.db import CarDB
+from adivina_coches.simulacion import (autos_sinteticos, db_sintetica, escribir_catalogo_sintetico, evaluar,
+                                       evaluar_paralelo, simular)
+
+# Lo que tiene que dar igual (las latencias y la cache dependen de cómo se repartió)
+_IGUALES = ("autos", "juegos", "aciertos", "empates", "precision", "en_top3", "preguntas_promedio")
+
+
+def sin_latencias(reporte):
+    return {k: reporte[k] for k in _IGUALES}
+
+
+class CatalogoSintetico(unittest.TestCase):
+
+    def test_sigue_el_esquema(self):
+        attrs = CarDB()._schema_attributes()
+        for car in autos_sinteticos(300, semilla=1):
+            for a in attrs:
+                valido = (True, False) if a.get("tipo") == "bool" else a["opciones"]
+                self.assertIn(car[a["key"]], valido, (car["name"], a["key"]))
+            if car["electrico"]:
+                self.assertEqual((car["combustible"], car["transmision"]), ("electrico", "automatica"))
+            if car["tipo"] in ("coupe", "convertible"):
+                self.assertEqual(car["puertas"], "2")
+            if car["tipo"] == "pickup":
+                self.assertEqual(car["traccion"], "4x4")
+
+    def test_misma_semilla_mismo_catalogo(self):
+        self.assertEqual(list(autos_sinteticos(50, semilla=4)), list(autos_sinteticos(50, semilla=4)))
+        self.assertNotEqual(list(autos_sinteticos(50, semilla=4)), list(autos_sinteticos(50, semilla=5)))
+        d = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, d, ignore_errors=True)
+        ruta = os.path.join(d, "c.json")
+        escribir_catalogo_sintetico(ruta, 50, semilla=4)
+        db = CarDB(ruta)
+        db.cargar()
+        self.addCleanup(db.cerrar)
+        self.assertEqual([c["name"] for c in db.iterar_autos()],
+                         [c["name"] for c in db_sintetica(50, semilla=4).iterar_autos()])
+
+    def test_en_memoria(self):
+        db = db_sintetica(50, semilla=4)
+        with mock.patch("builtins.open", side_effect=AssertionError("tocó disco")):
+            db.aprender("Van Nueva", {"tipo": "van"})
+            db.compactar()
+        self.assertEqual(len(db), 51)
+        self.assertIn("Van Nueva", [c["name"] for c in db.candidatos_exactos({"tipo": "van"})])
+
+
+class Simular(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = db_sintetica(120, semilla=2)
+
+    def test_sin_ruido_acierta_siempre(self):
+        for modo in ("fijo", "ganancia"):
+            with self.subTest(modo=modo):
+                rep = simular(self.db, modo)
+                self.assertEqual((rep["autos"], rep["juegos"], rep["aciertos"]), (120, 120, 120))
+                self.assertEqual((rep["precision"], rep["en_top3"]), (1.0, 1.0))
+                self.assertEqual(sin_latencias(evaluar(self.db, modo)), sin_latencias(rep))
+                if modo == "fijo":
+                    self.assertEqual(rep["preguntas_promedio"], 12)
+                else:
+                    self.assertLess(rep["preguntas_promedio"], 12)
+
+    def test_con_ruido_se_repite_con_la_semilla(self):
+        rep = simular(self.db, ruido=0.2, saltos=0.1, limite=40, semilla=5)
+        self.assertEqual(rep["juegos"], 40)
+        self.assertLess(rep["precision"], 1.0)
+        self.assertLessEqual(rep["precision"], rep["en_top3"])
+        self.assertEqual(sin_latencias(simular(self.db, ruido=0.2, saltos=0.1, limite=40, semilla=5)),
+                         sin_latencias(rep))
+        self.assertEqual(set(rep["latencia_ms"]), {"juego", "candidatos_exactos", "mejor_coincidencia"})
+
+
+
+class ParaleloContraSerie(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.db = db_sintetica(240, semilla=3)
+        cls.ruta_bin = os.path.join(cls.dir, "c.bin")
+        compilar_binario(cls.db.cars, cls.db.attributes, cls.ruta_bin)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir, ignore_errors=True)
+
+    def comparar(self, serie, paralelo):
+        self.assertEqual(sin_latencias(paralelo), sin_latencias(serie))
+
+    def test_igual_que_en_serie(self):
+        for modo in ("fijo", "ganancia"):
+            with self.subTest(modo=modo):
+                serie = simular(self.db, modo)
+                for procesos in (1, 3):
+                    paralelo = evaluar_paralelo(self.ruta_bin, procesos, modo)
+                    self.comparar(serie, paralelo)
+                    self.assertEqual(paralelo["procesos"], procesos)
+                    self.assertEqual(sum(h["juegos"] for h in paralelo["por_proceso"]), serie["juegos"])
+
+    def test_misma_muestra(self):
+        serie = simular(self.db, limite=50, semilla=7)
+        paralelo = evaluar_paralelo(self.ruta_bin, 2, limite=50, semilla=7)
+        self.assertEqual(serie["juegos"], 50)
+        self.comparar(serie, paralelo)
+
+    def test_con_ruido_no_depende_del_reparto(self):
+        serie = simular(self.db, ruido=0.2, saltos=0.1, limite=60, semilla=5)
+        for procesos in (1, 4):
+            with self.subTest(procesos=procesos):
+                self.comparar(serie, evaluar_paralelo(self.ruta_bin, procesos, ruido=0.2, saltos=0.1,
+                                                      limite=60, semilla=5))
+        # Y la semilla sí importa
+        otra = simular(self.db, ruido=0.2, saltos=0.1, limite=60, semilla=6)
+        self.assertNotEqual(sin_latencias(otra), sin_latencias(serie))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""La ventana sin pantalla: App.__new__ (sin Tk de verdad) con widgets de mentira."""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from array import array
+
+import comun  # noqa: F401  (deja importar adivina_coches)
+from adivina_coches.db import CarDB
+from adivina_coches.motor import MotorJuego
+from adivina_coches.simulacion import db_sintetica
+
+try:
+    from adivina_coches import ui_tk
+except ImportError:     # Python sin tkinter
+    ui_tk = None
+
+
+class Etiqueta:
+    def __init__(self):
+        self.texto = ""
+
+    def config(self, text=""):
+        self.texto = text
+
+
+class Mensajes:
+    """Reemplaza a messagebox: anoto (tipo, título, texto) en vez de abrir un diálogo."""
+
+    def __init__(self):
+        self.vistos = []
+
+    def __getattr__(self, tipo):
+        return lambda titulo, texto: self.vistos.append((tipo, titulo, texto))
+
+
+class Listbox:
+    """Un Listbox de mentira: las filas en una lista y cuántas veces me tocaron."""
+
+    def __init__(self):
+        self.filas = []
+        self.toques = 0
+
+    def _indice(self, i):
+        return len(self.filas) if i == "end" else i
+
+    def insert(self, i, texto):
+        self.filas.insert(self._indice(i), texto)
+        self.toques += 1
+
+    def delete(self, desde, hasta=None):
+        desde = self._indice(desde)
+        hasta = desde if hasta is None else self._indice(hasta)
+        del self.filas[desde:hasta + 1]
+        self.toques += 1
+
+
+class Barra:
+    def __init__(self):
+        self.posicion = None
+
+    def set(self, arriba, abajo):
+        self.posicion = (arriba, abajo)
+
+
+class Evento:
+    def __init__(self, num=None, delta=0):
+        self.num, self.delta = num, delta
+
+
+@unittest.skipIf(ui_tk is None, "sin tkinter")
+class ListaVirtual(unittest.TestCase):
+
+    def setUp(self):
+        self.db = db_sintetica(300, semilla=2)
+        lista = self.lista = ui_tk.ListaCandidatos.__new__(ui_tk.ListaCandidatos)
+        lista.db, lista.filas = self.db, 5
+        lista.lbl, lista.lista, lista.barra = Etiqueta(), Listbox(), Barra()
+        lista._ids, lista._puntos, lista._ordenados = array("q"), None, True
+        lista._inicio, lista._mostradas, lista._pintado = 0, [], (None, 0)
+
+    def nombres(self, ids):
+        return [self.db.cars[i]["name"] for i in ids]
+
+    def toques(self, hacer):
+        antes = self.lista.lista.toques
+        hacer()
+        return self.lista.lista.toques - antes
+
+    def test_solo_pinta_las_visibles(self):
+        ids = array("q", range(0, 300, 2))
+        self.lista.mostrar(ids, "150 posibles")
+        self.assertEqual(self.lista.lista.filas, self.nombres(ids[:5]))
+        self.assertEqual(self.lista.lbl.texto, "150 posibles")
+        self.assertEqual(self.lista.barra.posicion, (0, 5 / 150))
+        self.assertEqual(self.toques(lambda: self.lista.mostrar(ids, "otra vez")), 0)   # nada cambió
+
+    def test_desplazar_corre_las_filas(self):
+        ids = array("q", range(100))
+        self.lista.mostrar(ids, "")
+        # Bajar 3: borro las 3 de arriba de una vez y agrego 3 abajo
+        self.assertEqual(self.toques(lambda: self.lista._desplazar("scroll", "3", "units")), 1 + 3)
+        self.assertEqual(self.lista.lista.filas, self.nombres(ids[3:8]))
+        # Subir 2: inserto 2 arriba y borro lo que sobra abajo de una vez
+        self.assertEqual(self.toques(lambda: self.lista._desplazar("scroll", "-2", "units")), 2 + 1)
+        self.assertEqual(self.lista.lista.filas, self.nombres(ids[1:6]))
+        # Una página, la rueda (X11 y Windows) y la barra
+        self.lista._desplazar("scroll", "1", "pages")
+        self.assertEqual(self.lista.lista.filas, self.nombres(ids[6:11]))
+        self.assertEqual(self.lista._rueda(Evento(num=5)), "break")
+        self.assertEqual(self.lista._inicio, 9)
+        self.lista._rueda(Evento(delta=120))
+        self.assertEqual(self.lista._inicio, 6)
+        self.lista._desplazar("moveto", "0.5")
+        self.assertEqual(self.lista.lista.filas, self.nombres(ids[50:55]))
+        self.assertEqual(self.lista.barra.posicion, (0.5, 0.55))
+        # Nunca más allá de los bordes
+        self.lista._desplazar("moveto", "1.0")
+        self.assertEqual(self.lista.lista.filas, self.nombres(ids[95:]))
+        self.lista._desplazar("scroll", "-500", "units")
+        self.assertEqual(self.lista._inicio, 0)
+
+    def test_al_estrechar_no_salta(self):
+        ids = array("q", range(100))
+        self.lista.mostrar(ids, "")
+        self.lista._desplazar("moveto", "0.4")          # arriba de todo: el 40
+        quedan = array("q", [i for i in ids if i % 3])   # el 40 sigue vivo
+        self.lista.mostrar(quedan, "")
+        self.assertEqual(self.lista.lista.filas[0], self.nombres([40])[0])
+        # Si el que estaba arriba se fue, anclo en el siguiente que queda
+        self.lista.mostrar(array("q", [i for i in quedan if i != 40]), "")
+        self.assertEqual(self.lista.lista.filas[0], self.nombres([41])[0])
+        # Cerca del final la ventana no queda a medias
+        self.lista.mostrar(array("q", [41, 43, 44, 46]), "")
+        self.assertEqual(self.lista.lista.filas, self.nombres([41, 43, 44, 46]))
+        self.assertEqual(self.lista._inicio, 0)
+
+    def test_diff_toca_solo_lo_que_cambio(self):
+        ids = array("q", range(100))
+        self.lista.mostrar(ids, "")
+        sin_uno = array("q", [i for i in ids if i != 3])
+        # Filas 0-2 iguales; 3 y 4 cambian (cada una: borrar + insertar)
+        self.assertEqual(self.toques(lambda: self.lista.mostrar(sin_uno, "")), 2 * 2)
+        self.assertEqual(self.lista.lista.filas, self.nombres([0, 1, 2, 4, 5]))
+        self.assertEqual(self.toques(lambda: self.lista.mostrar(array("q", [0, 1]), "")), 1)   # borro el resto
+        self.assertEqual(self.lista.lista.filas, self.nombres([0, 1]))
+        self.lista.mostrar(array("q"), "ninguno")
+        self.assertEqual((self.lista.lista.filas, self.lista.barra.posicion), ([], (0, 1)))
+
+    def test_aproximado_con_puntos_empieza_arriba(self):
+        self.lista.mostrar(array("q", range(100)), "")
+        self.lista._desplazar("moveto", "0.5")
+        top = array("q", [70, 12, 55])           # por puntaje: no están en orden, no anclo
+        self.lista.mostrar(top, "aproximado", {70: 9, 12: 7, 55: 7})
+        self.assertEqual(self.lista.lista.filas,
+                         [f"{n}  ({p} pts)" for n, p in zip(self.nombres(top), (9, 7, 7))])
+        # Y al volver a exactos tampoco: el ancla venía de una lista sin orden
+        self.lista.mostrar(array("q", range(100)), "")
+        self.assertEqual(self.lista._inicio, 0)
+
+
+@unittest.skipIf(ui_tk is None, "sin tkinter")
+class AppSinPantalla(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ruta = os.path.join(self.dir, "c.json")
+        self.db = CarDB(self.ruta)
+        self.db.cargar()
+        self.mensajes = Mensajes()
+        messagebox, ui_tk.messagebox = ui_tk.messagebox, self.mensajes
+        self.addCleanup(setattr, ui_tk, "messagebox", messagebox)
+
+        app = self.app = ui_tk.App.__new__(ui_tk.App)
+        app.db = self.db
+        app.motor = MotorJuego(self.db)
+        app.escritor = self.db.iniciar_escritor(espera=0)
+        app._listos = queue.Queue()
+        app._refrescando = False
+        app.lbl_guardado = Etiqueta()
+        app.after = lambda ms, f: None
+        self.repintadas = 0
+
+        def repintar():
+            self.repintadas += 1
+        app._update_progress = app._refrescar_candidatos = repintar
+
+    def tearDown(self):
+        self.db.cerrar()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def esperar(self, hasta):
+        """Como el after() de Tk: atiendo lo que terminó el escritor hasta que se cumpla 'hasta'."""
+        fin = time.monotonic() + 10
+        while not hasta() and time.monotonic() < fin:
+            self.app._revisar_guardado()
+            time.sleep(0.01)
+        self.assertTrue(hasta())
+
+    def test_aprender_no_corre_en_el_hilo_de_tk(self):
+        sigue = threading.Event()
+        aprender, hilos = self.db.aprender, []
+
+        def lento(nombre, respuestas):
+            hilos.append(threading.current_thread())
+            sigue.wait(10)          # el cerrojo del archivo lo tiene otro proceso
+            return aprender(nombre, respuestas)
+        self.db.aprender = lento
+
+        self.app.motor.responder("tipo", "van")
+        t0 = time.monotonic()
+        self.app._aprender("Desde La Ventana")
+        self.assertLess(time.monotonic() - t0, 1)
+        self.assertEqual(self.app.lbl_guardado.texto, "Guardando…")
+        self.app._revisar_guardado()
+        self.assertEqual(self.mensajes.vistos, [])
+        sigue.set()
+        self.esperar(lambda: self.mensajes.vistos)
+        self.assertEqual(hilos, [self.app.escritor._hilo])
+        self.assertEqual(self.mensajes.vistos[0][:2], ("showinfo", "Aprender"))
+        self.assertEqual(self.db.buscar_por_nombre("desde la ventana")["tipo"], "van")
+        self.assertEqual(self.app.motor.n_vivos, len(self.db.ids_exactos({"tipo": "van"})))
+        self.assertGreater(self.repintadas, 0)
+        self.esperar(lambda: self.app.lbl_guardado.texto == "Guardado ✓")
+
+    def test_error_al_aprender_se_muestra(self):
+        def falla(nombre, respuestas):
+            raise OSError("disco lleno")
+        self.db.aprender = falla
+        self.app._aprender("No Entra")
+        self.esperar(lambda: self.mensajes.vistos)
+        tipo, _, texto = self.mensajes.vistos[0]
+        self.assertEqual(tipo, "showerror")
+        self.assertIn("disco lleno", texto)
+        self.assertEqual(self.app.lbl_guardado.texto, "Error al guardar")
+
+    def test_refrescar_va_al_escritor(self):
+        otro = CarDB(self.ruta)
+        otro.cargar()
+        otro.aprender("De Otra Ventana", {"tipo": "van"})
+        otro.cerrar()
+        refrescar, hilos = self.db.refrescar, []
+
+        def contando():
+            hilos.append(threading.current_thread())
+            return refrescar()
+        self.db.refrescar = contando
+        self.app._revisar_catalogo()
+        self.app._revisar_catalogo()     # el anterior no volvió: no encargo otro
+        self.esperar(lambda: not self.app._refrescando)
+        self.assertEqual(hilos, [self.app.escritor._hilo])
+        self.assertIsNotNone(self.db.buscar_por_nombre("de otra ventana"))
+        self.assertGreater(self.repintadas, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()